@@ -1,6 +1,8 @@
 #!/bin/sh
 
 flask db upgrade
+flask users manage-loginlog-partitions
+flask users rotate-signing-keys
 
 gunicorn --worker-class gevent \
   --workers 2 \
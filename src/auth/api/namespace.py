@@ -4,10 +4,14 @@ from auth.api.openapi import wrap_model
 
 
 class Namespace(_Namespace):
-    """Resources wrapped with a `data` key."""
+    """Resources wrapped with a `data` key.
+
+    Models that define the envelope themselves (e.g. pages) are registered with `envelope=False`.
+    """
 
     def response(self, code, description, model=None, **kwargs):
-        if model is None:
+        envelope = kwargs.pop("envelope", True)
+        if model is None or not envelope:
             return super(Namespace, self).response(code, description, model, **kwargs)
         as_list = kwargs.pop("as_list", False)
         model = wrap_model(model, self, as_list=as_list)
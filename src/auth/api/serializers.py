@@ -1,8 +1,9 @@
 import functools
 from typing import Any, Callable, ClassVar, Type
 
+from flask_restx import inputs
 from flask_restx.reqparse import RequestParser
-from marshmallow import Schema, post_dump, post_load, pre_load
+from marshmallow import Schema, fields, post_dump, post_load, pre_load
 
 
 class BaseSerializer(Schema):
@@ -32,6 +33,25 @@ class BaseSerializer(Schema):
         return self.model(**data)
 
 
+class PageSerializer(BaseSerializer):
+    """Page of items: `{"data": [...], "next": <next page cursor>, "count": <total count, if requested>}`."""
+
+    item_serializer: ClassVar[Type[BaseSerializer]]
+
+    data = fields.Method("dump_items")
+    next = fields.String(attribute="next_cursor", allow_none=True)  # noqa: VNE003
+    count = fields.Integer()
+
+    def dump_items(self, page) -> list:
+        return self.item_serializer().dump(page.items, many=True)[self.item_serializer.envelope["many"]]
+
+    @post_dump(pass_many=True)
+    def wrap_with_envelope(self, data, many, **kwargs) -> dict:
+        if data["count"] is None:
+            del data["count"]
+        return data
+
+
 def serialize(serializer_class: Type[BaseSerializer], many: bool = False) -> Callable:
     """Decorator for serializing object with the given `serializer_class`."""
 
@@ -51,5 +71,7 @@ def serialize(serializer_class: Type[BaseSerializer], many: bool = False) -> Cal
 
 
 pagination_parser = RequestParser(bundle_errors=True)
-pagination_parser.add_argument(name="page", location="args", type=int, required=False, default=1)
-pagination_parser.add_argument(name="per_page", location="args", type=int, required=False, default=10)
+pagination_parser.add_argument(name="cursor", location="args", type=str, required=False)
+pagination_parser.add_argument(
+    name="per_page", location="args", type=inputs.int_range(1, 100), required=False, default=10)
+pagination_parser.add_argument(name="with_count", location="args", type=inputs.boolean, required=False, default=False)
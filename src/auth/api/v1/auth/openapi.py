@@ -1,5 +1,9 @@
 from flask_restx import OrderedModel, fields
 
+from auth.core.config import get_settings
+
+settings = get_settings()
+
 user_registration = OrderedModel(
     "UserRegistration",
     {
@@ -15,3 +19,28 @@ user_login = OrderedModel(
         "refresh_token": fields.String(),
     },
 )
+
+token_introspection = OrderedModel(
+    "TokenIntrospection",
+    {
+        "active": fields.Boolean(description="Whether the token is valid, claims are returned for active tokens."),
+        "sub": fields.String(description="User ID."),
+        "jti": fields.String(),
+        "token_type": fields.String(enum=["access", "refresh"]),
+        "iat": fields.Integer(),
+        "exp": fields.Integer(),
+        "roles": fields.List(fields.String(), description="Current user roles."),
+    },
+)
+
+token_introspection_batch_request = OrderedModel(
+    "TokenIntrospectionBatchRequest",
+    {
+        "tokens": fields.List(
+            fields.String(),
+            required=True,
+            min_items=1,
+            max_items=settings.INTROSPECTION_BATCH_MAX_SIZE,
+        ),
+    },
+)
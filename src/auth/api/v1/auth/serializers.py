@@ -13,6 +13,10 @@ login_parser = RequestParser(bundle_errors=True)
 login_parser.add_argument(name="email", type=email(), location="form", required=True, nullable=False)
 login_parser.add_argument(name="password", type=str, location="form", required=True, nullable=False)
 
+introspection_parser = RequestParser(bundle_errors=True)
+introspection_parser.add_argument(name="token", type=str, location="form", required=True, nullable=False)
+introspection_parser.add_argument(name="token_type_hint", type=str, location="form", required=False)
+
 
 class UserRegistrationSerializer(BaseSerializer):
     model = types.User
@@ -14,14 +14,18 @@ from auth.api.openapi import register_openapi_models
 from auth.api.serializers import serialize
 from auth.containers import Container
 from auth.core.config import get_settings
+from auth.domain.oauth.utils import requires_auth
 from auth.domain.users import types
 from auth.throttling import limiter
 from auth.tracer import traced
 
 from . import openapi
-from .serializers import JWTCredentialsSerializer, UserRegistrationSerializer, auth_request_parser, login_parser
+from .serializers import (
+    JWTCredentialsSerializer, UserRegistrationSerializer, auth_request_parser, introspection_parser, login_parser,
+)
 
 if TYPE_CHECKING:
+    from auth.domain.users.introspection import TokenIntrospector
     from auth.domain.users.services import UserService
     current_user: types.User
 
@@ -83,9 +87,8 @@ class UserLogin(Resource):
     @staticmethod
     @traced("_login")
     def _login(user_service: UserService, email: str, password: str) -> types.JWTCredentials:
-        credentials, user = user_service.login(email, password)
-        user_service.update_login_history(
-            user=user,
+        credentials, _ = user_service.login(
+            email, password,
             ip_addr=request.remote_addr,
             user_agent=request.user_agent.string,
         )
@@ -109,23 +112,81 @@ class UserLogout(Resource):
         return "", HTTPStatus.NO_CONTENT
 
 
+@auth_ns.route("/logout-all")
+class UserLogoutEverywhere(Resource):
+    """Logout from all devices."""
+
+    @auth_ns.doc(security="JWT", description="Logout from all devices, all previously issued tokens are revoked.")
+    @auth_ns.response(HTTPStatus.NO_CONTENT.value, "User has been logged out from all devices.")
+    @auth_ns.response(HTTPStatus.UNAUTHORIZED.value, "Invalid access token.")
+    @auth_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR.value, "Server error.")
+    @jwt_required()
+    @inject
+    def post(self, user_service: UserService = Provide[Container.user_package.user_service]):
+        """Logout user from all devices."""
+        user_service.logout_everywhere(current_user)
+        return "", HTTPStatus.NO_CONTENT
+
+
 @auth_ns.route("/refresh")
 class UserRefreshToken(Resource):
     """Renew access token."""
 
-    @auth_ns.doc(security="JWT", description="Use refresh token to get a new pair of access/refresh tokens.")
+    @auth_ns.doc(
+        security="JWT",
+        description="Use refresh token to get a new pair of access/refresh tokens. Refresh token can be used once, "
+                    "reuse of a refresh token revokes all tokens issued since the login.",
+    )
     @auth_ns.response(HTTPStatus.OK.value, "Credentials.", openapi.user_login)
-    @auth_ns.response(HTTPStatus.UNAUTHORIZED.value, "Invalid access token.")
+    @auth_ns.response(HTTPStatus.UNAUTHORIZED.value, "Invalid, revoked or reused refresh token.")
     @auth_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR.value, "Server error.")
     @jwt_required(refresh=True)
     @serialize(JWTCredentialsSerializer)
     @inject
     def post(self, user_service: UserService = Provide[Container.user_package.user_service]):
         """Get new access token."""
-        jti = get_jwt()["jti"]
-        credentials = user_service.refresh_credentials(jti, current_user)
+        credentials = user_service.refresh_credentials(get_jwt(), current_user)
         headers = {
             "Cache-Control": "no-store",
             "Pragma": "no-cache",
         }
         return credentials, HTTPStatus.OK, headers
+
+
+@auth_ns.route("/introspect")
+class TokenIntrospection(Resource):
+    """Token introspection (RFC 7662)."""
+
+    # resource servers introspect tokens on their requests, so the endpoint is not throttled
+    decorators = [limiter.exempt, requires_auth(required_scope="introspect:tokens")]
+
+    @auth_ns.expect(introspection_parser, validate=True)
+    @auth_ns.doc(security="auth0", description="Check whether a user token is active and get its claims.")
+    @auth_ns.response(HTTPStatus.OK.value, "Token state.", openapi.token_introspection, envelope=False)
+    @auth_ns.response(HTTPStatus.BAD_REQUEST.value, "Invalid request.")
+    @auth_ns.response(HTTPStatus.UNAUTHORIZED.value, "Authorization required.")
+    @auth_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR.value, "Server error.")
+    @inject
+    def post(self, token_introspector: TokenIntrospector = Provide[Container.user_package.token_introspector]):
+        """Introspect token."""
+        request_data = introspection_parser.parse_args()
+        return token_introspector.introspect(request_data.get("token")), HTTPStatus.OK
+
+
+@auth_ns.route("/introspect/batch")
+class TokenIntrospectionBatch(Resource):
+    """Bulk token introspection."""
+
+    decorators = [limiter.exempt, requires_auth(required_scope="introspect:tokens")]
+
+    @auth_ns.expect(openapi.token_introspection_batch_request, validate=True)
+    @auth_ns.doc(security="auth0", description="Introspect several tokens, results are in the order of `tokens`.")
+    @auth_ns.response(HTTPStatus.OK.value, "Tokens states.", openapi.token_introspection, as_list=True)
+    @auth_ns.response(HTTPStatus.BAD_REQUEST.value, "Invalid request.")
+    @auth_ns.response(HTTPStatus.UNAUTHORIZED.value, "Authorization required.")
+    @auth_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR.value, "Server error.")
+    @inject
+    def post(self, token_introspector: TokenIntrospector = Provide[Container.user_package.token_introspector]):
+        """Introspect tokens."""
+        tokens = auth_ns.payload["tokens"]
+        return {"data": token_introspector.introspect_many(tokens)}, HTTPStatus.OK
@@ -1,6 +1,8 @@
 from flask_restx import Resource
 
 from auth.api.namespace import Namespace
+from auth.domain.oauth.utils import requires_auth
+from auth.metrics import metrics
 from auth.throttling import limiter
 
 health_ns = Namespace("health", description="Healthcheck")
@@ -15,3 +17,16 @@ class Healthcheck(Resource):
     def get(self):
         """Check service health."""
         return {"status": "ok"}
+
+
+@health_ns.route("/metrics")
+class Metrics(Resource):
+    """Service metrics."""
+
+    # metrics are scraped frequently, so the endpoint is not throttled, but it is available only to services
+    decorators = [limiter.exempt, requires_auth(required_scope="read:metrics")]
+
+    @health_ns.doc(security="auth0")
+    def get(self):
+        """Get metrics of the current worker process."""
+        return metrics.collect()
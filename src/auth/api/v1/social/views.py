@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import datetime
 from http import HTTPStatus
 from typing import TYPE_CHECKING
 
@@ -9,7 +10,7 @@ from dependency_injector.wiring import Provide, Provider, inject
 from flask_restx import Resource
 from werkzeug.exceptions import BadRequestKeyError
 
-from flask import url_for
+from flask import request, url_for
 
 from auth.api.namespace import Namespace
 from auth.api.serializers import serialize
@@ -87,5 +88,11 @@ class SocialAuth(Resource):
     ) -> types.JWTCredentials:
         user_info = social_auth.get_user_info()
         user = social_service.handle_social_auth(user_info)
-        credentials = jwt_auth.generate_tokens(user)
+        login_event = types.LoginEvent(
+            user_id=user.id,
+            ip_addr=request.remote_addr,
+            user_agent=request.user_agent.string,
+            created_at=datetime.datetime.utcnow(),
+        )
+        credentials = jwt_auth.generate_tokens(user, login_event=login_event)
         return credentials
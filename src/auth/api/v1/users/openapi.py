@@ -1,7 +1,12 @@
 from flask_restx import OrderedModel, fields
 
+from auth.core.config import get_settings
 from auth.domain.users import types
 
+settings = get_settings()
+
+UUID_PATTERN = "^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$"
+
 login_history = OrderedModel(
     "LoginHistory",
     {
@@ -13,3 +18,86 @@ login_history = OrderedModel(
         "device_type": fields.String(enum=types.LoginLog.DeviceType.list()),
     },
 )
+
+login_history_page = OrderedModel(
+    "LoginHistoryPage",
+    {
+        "data": fields.List(fields.Nested(login_history)),
+        "next": fields.String(description="Cursor of the next page, `null` on the last page."),
+        "count": fields.Integer(description="Total number of records, returned if `with_count` is set."),
+    },
+)
+
+session = OrderedModel(
+    "Session",
+    {
+        "id": fields.String(),
+        "created_at": fields.DateTime(description="Login time."),
+        "expires_at": fields.DateTime(description="Session expires if it's not refreshed until this time."),
+        "user_agent": fields.String(),
+        "ip_addr": fields.String(),
+        "device_type": fields.String(enum=types.LoginLog.DeviceType.list()),
+        "current": fields.Boolean(description="Whether the request is made from this session."),
+    },
+)
+
+user_role_pair = OrderedModel(
+    "UserRolePair",
+    {
+        "user_id": fields.String(required=True, pattern=UUID_PATTERN),
+        "role_id": fields.String(required=True, pattern=UUID_PATTERN),
+    },
+)
+
+roles_check_request = OrderedModel(
+    "RolesCheckRequest",
+    {
+        "pairs": fields.List(
+            fields.Nested(user_role_pair),
+            max_items=settings.USER_ROLES_BATCH_MAX_SIZE,
+            description="(user, role) pairs to check.",
+        ),
+        "user_ids": fields.List(
+            fields.String(pattern=UUID_PATTERN),
+            max_items=settings.USER_ROLES_BATCH_MAX_SIZE,
+            description="Users to check against all `role_ids`.",
+        ),
+        "role_ids": fields.List(
+            fields.String(pattern=UUID_PATTERN),
+            max_items=settings.USER_ROLES_BATCH_MAX_SIZE,
+            description="Roles to check for all `user_ids`.",
+        ),
+    },
+)
+
+roles_check = OrderedModel(
+    "RolesCheck",
+    {
+        "bitmap": fields.String(description="'1' if user has the role, '0' otherwise, for every checked pair."),
+    },
+)
+
+roles_grant_request = OrderedModel(
+    "RolesGrantRequest",
+    {
+        "user_ids": fields.List(
+            fields.String(pattern=UUID_PATTERN),
+            required=True,
+            min_items=1,
+            max_items=settings.USER_ROLES_BATCH_MAX_SIZE,
+        ),
+        "role_ids": fields.List(
+            fields.String(pattern=UUID_PATTERN),
+            required=True,
+            min_items=1,
+            max_items=settings.USER_ROLES_BATCH_MAX_SIZE,
+        ),
+    },
+)
+
+roles_grant = OrderedModel(
+    "RolesGrant",
+    {
+        "granted": fields.Integer(description="Number of new (user, role) assignments."),
+    },
+)
@@ -1,8 +1,9 @@
+from flask_restx import inputs
 from flask_restx.reqparse import RequestParser
 from marshmallow import fields
 from marshmallow_enum import EnumField
 
-from auth.api.serializers import BaseSerializer
+from auth.api.serializers import BaseSerializer, PageSerializer
 from auth.domain.users import types
 
 password_change_parser = RequestParser(bundle_errors=True)
@@ -10,6 +11,18 @@ password_change_parser.add_argument(name="old_password", type=str, location="for
 password_change_parser.add_argument(name="new_password1", type=str, location="form", required=True, nullable=False)
 password_change_parser.add_argument(name="new_password2", type=str, location="form", required=True, nullable=False)
 
+login_history_export_parser = RequestParser(bundle_errors=True)
+login_history_export_parser.add_argument(
+    name="format", location="args", type=str, choices=types.LoginLog.ExportFormat.list(), required=False,
+    default=types.LoginLog.ExportFormat.NDJSON.value,
+)
+
+login_history_bulk_export_parser = login_history_export_parser.copy()
+login_history_bulk_export_parser.add_argument(
+    name="since", location="args", type=inputs.datetime_from_iso8601, required=True, nullable=False)
+login_history_bulk_export_parser.add_argument(
+    name="until", location="args", type=inputs.datetime_from_iso8601, required=True, nullable=False)
+
 
 class LoginLogSerializer(BaseSerializer):
     model = types.LoginLog
@@ -19,3 +32,30 @@ class LoginLogSerializer(BaseSerializer):
 
     class Meta:
         additional = ("id", "created_at", "user_agent", "ip_addr")
+
+
+class LoginLogPageSerializer(PageSerializer):
+    item_serializer = LoginLogSerializer
+
+
+class SessionSerializer(BaseSerializer):
+    model = types.Session
+
+    device_type = EnumField(types.LoginLog.DeviceType, by_value=True, allow_none=True)
+
+    class Meta:
+        additional = ("id", "created_at", "expires_at", "user_agent", "ip_addr", "current")
+
+
+class RolesCheckSerializer(BaseSerializer):
+    model = types.RolesCheck
+
+    class Meta:
+        fields = ("bitmap",)
+
+
+class RolesGrantSerializer(BaseSerializer):
+    model = types.RolesGrant
+
+    class Meta:
+        fields = ("granted",)
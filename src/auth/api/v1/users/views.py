@@ -1,26 +1,33 @@
 from __future__ import annotations
 
+import datetime
 from http import HTTPStatus
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterator
 from uuid import UUID
 
 from dependency_injector.wiring import Provide, inject
 from flask_jwt_extended import current_user, get_jwt, jwt_required
 from flask_restx import Resource
 
+from flask import Response, stream_with_context
+
 from auth.api.namespace import Namespace
 from auth.api.openapi import register_openapi_models
 from auth.api.serializers import pagination_parser, serialize
-from auth.common.types import PageNumberPagination
+from auth.common.types import CursorPagination
 from auth.containers import Container
 from auth.domain.oauth.utils import requires_auth
 from auth.domain.users import types
 
 from . import openapi
-from .serializers import LoginLogSerializer, password_change_parser
+from .serializers import (
+    LoginLogPageSerializer, RolesCheckSerializer, RolesGrantSerializer, SessionSerializer,
+    login_history_bulk_export_parser, login_history_export_parser, password_change_parser,
+)
 
 if TYPE_CHECKING:
     from auth.domain.social.repositories import SocialAccountRepository
+    from auth.domain.users.export import LoginHistoryExporter
     from auth.domain.users.repositories import LoginLogRepository, UserRepository
     from auth.domain.users.services import UserService
     current_user: types.User
@@ -35,20 +42,120 @@ class UserLoginHistory(Resource):
 
     @user_ns.expect(pagination_parser, validate=True)
     @user_ns.doc(security="JWT", description="View account login history.")
-    @user_ns.response(HTTPStatus.OK.value, "Login history.", openapi.login_history, as_list=True)
+    @user_ns.response(HTTPStatus.OK.value, "Login history.", openapi.login_history_page, envelope=False)
+    @user_ns.response(HTTPStatus.BAD_REQUEST.value, "Invalid pagination cursor.")
     @user_ns.response(HTTPStatus.UNAUTHORIZED.value, "Invalid access token.")
     @user_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR.value, "Server error.")
     @jwt_required()
-    @serialize(LoginLogSerializer, many=True)
+    @serialize(LoginLogPageSerializer)
     @inject
     def get(self, login_log_repository: LoginLogRepository = Provide[Container.user_package.login_log_repository]):
         """Login history."""
         request_data = pagination_parser.parse_args()
-        pagination = PageNumberPagination(request_data.get("page"), request_data.get("per_page"))
+        pagination = CursorPagination(
+            request_data.get("cursor"), request_data.get("per_page"), with_count=request_data.get("with_count"))
         login_history = login_log_repository.get_user_login_history(current_user, pagination)
         return login_history, HTTPStatus.OK
 
 
+@user_ns.route("/me/login-history/export")
+class UserLoginHistoryExport(Resource):
+    """Account login history export."""
+
+    @user_ns.expect(login_history_export_parser, validate=True)
+    @user_ns.doc(security="JWT", description="Stream the whole account login history as NDJSON or CSV.")
+    @user_ns.response(HTTPStatus.OK.value, "Login history.")
+    @user_ns.response(HTTPStatus.UNAUTHORIZED.value, "Invalid access token.")
+    @user_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR.value, "Server error.")
+    @jwt_required()
+    @inject
+    def get(
+        self,
+        login_history_exporter: LoginHistoryExporter = Provide[Container.user_package.login_history_exporter],
+    ):
+        """Export login history."""
+        request_data = login_history_export_parser.parse_args()
+        export_format = types.LoginLog.ExportFormat(request_data.get("format"))
+        records = login_history_exporter.export_user_history(current_user.id, export_format)
+        mimetype = login_history_exporter.mimetypes[export_format]
+        return _stream_export(records, mimetype, filename=f"login-history.{export_format.value}")
+
+
+@user_ns.route("/login-history/export")
+class LoginHistoryBulkExport(Resource):
+    """Login history export of all users."""
+
+    @user_ns.expect(login_history_bulk_export_parser, validate=True)
+    @user_ns.doc(
+        security="auth0",
+        description="Stream login history of all users for the [since, until) period as NDJSON or CSV.",
+    )
+    @user_ns.response(HTTPStatus.OK.value, "Login history.")
+    @user_ns.response(HTTPStatus.BAD_REQUEST.value, "Invalid request.")
+    @user_ns.response(HTTPStatus.UNAUTHORIZED.value, "Authorization required.")
+    @user_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR.value, "Server error.")
+    @requires_auth(required_scope="read:login_history")
+    @inject
+    def get(
+        self,
+        login_history_exporter: LoginHistoryExporter = Provide[Container.user_package.login_history_exporter],
+    ):
+        """Export login history of all users."""
+        request_data = login_history_bulk_export_parser.parse_args()
+        export_format = types.LoginLog.ExportFormat(request_data.get("format"))
+        since, until = _to_naive_utc(request_data.get("since")), _to_naive_utc(request_data.get("until"))
+        records = login_history_exporter.export_history(since, until, export_format)
+        mimetype = login_history_exporter.mimetypes[export_format]
+        filename = f"login-history-{since:%Y%m%d}-{until:%Y%m%d}.{export_format.value}"
+        return _stream_export(records, mimetype, filename=filename)
+
+
+def _stream_export(records: Iterator[str], mimetype: str, filename: str) -> Response:
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    return Response(stream_with_context(records), mimetype=mimetype, headers=headers)
+
+
+def _to_naive_utc(value: datetime.datetime) -> datetime.datetime:
+    # login dates are stored as UTC `timestamp without time zone`
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+@user_ns.route("/me/sessions")
+class UserSessions(Resource):
+    """Account active sessions."""
+
+    @user_ns.doc(security="JWT", description="View devices the account is logged in on, the most recently used first.")
+    @user_ns.response(HTTPStatus.OK.value, "Active sessions.", openapi.session, as_list=True)
+    @user_ns.response(HTTPStatus.UNAUTHORIZED.value, "Invalid access token.")
+    @user_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR.value, "Server error.")
+    @jwt_required()
+    @serialize(SessionSerializer, many=True)
+    @inject
+    def get(self, user_service: UserService = Provide[Container.user_package.user_service]):
+        """Active sessions."""
+        sessions = user_service.get_sessions(current_user, current_session_id=get_jwt().get("fid"))
+        return sessions, HTTPStatus.OK
+
+
+@user_ns.route("/me/sessions/<string:session_id>")
+class UserSession(Resource):
+    """Account session."""
+
+    @user_ns.doc(security="JWT", description="Logout from the device of the session, all its tokens are revoked.")
+    @user_ns.response(HTTPStatus.NO_CONTENT.value, "Session has been revoked.")
+    @user_ns.response(HTTPStatus.NOT_FOUND.value, "Session not found.")
+    @user_ns.response(HTTPStatus.UNAUTHORIZED.value, "Invalid access token.")
+    @user_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR.value, "Server error.")
+    @jwt_required()
+    @inject
+    def delete(self, session_id: str, user_service: UserService = Provide[Container.user_package.user_service]):
+        """Revoke session."""
+        user_service.revoke_session(current_user, session_id)
+        return "", HTTPStatus.NO_CONTENT
+
+
 @user_ns.route("/me/social/<string:provider_slug>")
 class UserSocialAccount(Resource):
     """User social account."""
@@ -84,12 +191,87 @@ class UserChangePassword(Resource):
     @inject
     def post(self, user_service: UserService = Provide[Container.user_package.user_service]):
         """Change password."""
-        jwt = get_jwt()
         passwords_data = password_change_parser.parse_args()
-        user_service.change_password(jwt, current_user, **passwords_data)
+        user_service.change_password(current_user, **passwords_data)
         return "", HTTPStatus.NO_CONTENT
 
 
+@user_ns.route("/<uuid:user_id>/deactivate")
+class UserDeactivateView(Resource):
+    """User deactivation."""
+
+    @user_ns.doc(security="auth0", description="Deactivate user and revoke all user tokens.")
+    @user_ns.response(HTTPStatus.NO_CONTENT.value, "User has been deactivated.")
+    @user_ns.response(HTTPStatus.NOT_FOUND.value, "User not found.")
+    @user_ns.response(HTTPStatus.UNAUTHORIZED.value, "Authorization required.")
+    @user_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR.value, "Server error.")
+    @requires_auth(required_scope="deactivate:users")
+    @inject
+    def post(self, user_id: UUID, user_service: UserService = Provide[Container.user_package.user_service]):
+        """Deactivate user."""
+        user_service.deactivate_user(user_id)
+        return "", HTTPStatus.NO_CONTENT
+
+
+@user_ns.route("/roles/check")
+class UserRolesCheckView(Resource):
+    """Bulk users roles check."""
+
+    # authorization goes before the request payload validation
+    decorators = [requires_auth(required_scope="validate:roles")]
+
+    @user_ns.expect(openapi.roles_check_request, validate=True)
+    @user_ns.doc(
+        security="auth0",
+        description=(
+            "Check whether users have roles. "
+            "Either `pairs` or `user_ids` with `role_ids` (all combinations, user by user) must be given."
+        ),
+    )
+    @user_ns.response(HTTPStatus.OK.value, "Bitmap of checked pairs.", openapi.roles_check)
+    @user_ns.response(HTTPStatus.BAD_REQUEST.value, "Invalid request.")
+    @user_ns.response(HTTPStatus.UNAUTHORIZED.value, "Authorization required.")
+    @user_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR.value, "Server error.")
+    @serialize(RolesCheckSerializer)
+    @inject
+    def post(self, user_service: UserService = Provide[Container.user_package.user_service]):
+        """Check users roles."""
+        request_data = user_ns.payload
+        pairs = user_ids = role_ids = None
+        if "pairs" in request_data:
+            pairs = [(UUID(pair["user_id"]), UUID(pair["role_id"])) for pair in request_data["pairs"]]
+        if "user_ids" in request_data:
+            user_ids = [UUID(user_id) for user_id in request_data["user_ids"]]
+        if "role_ids" in request_data:
+            role_ids = [UUID(role_id) for role_id in request_data["role_ids"]]
+        roles_check = user_service.check_roles(pairs=pairs, user_ids=user_ids, role_ids=role_ids)
+        return roles_check, HTTPStatus.OK
+
+
+@user_ns.route("/roles/grant")
+class UserRolesGrantView(Resource):
+    """Bulk roles assignment."""
+
+    # authorization goes before the request payload validation
+    decorators = [requires_auth(required_scope="assign:roles")]
+
+    @user_ns.expect(openapi.roles_grant_request, validate=True)
+    @user_ns.doc(security="auth0", description="Assign all given roles to all given users.")
+    @user_ns.response(HTTPStatus.OK.value, "Roles have been assigned.", openapi.roles_grant)
+    @user_ns.response(HTTPStatus.BAD_REQUEST.value, "Invalid request.")
+    @user_ns.response(HTTPStatus.UNAUTHORIZED.value, "Authorization required.")
+    @user_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR.value, "Server error.")
+    @serialize(RolesGrantSerializer)
+    @inject
+    def post(self, user_service: UserService = Provide[Container.user_package.user_service]):
+        """Assign roles to users."""
+        request_data = user_ns.payload
+        user_ids = [UUID(user_id) for user_id in request_data["user_ids"]]
+        role_ids = [UUID(role_id) for role_id in request_data["role_ids"]]
+        roles_grant = user_service.grant_roles(user_ids, role_ids)
+        return roles_grant, HTTPStatus.OK
+
+
 @user_ns.route("/<uuid:user_id>/roles/<uuid:role_id>")
 class UserRolesView(Resource):
     """User roles."""
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from dependency_injector.wiring import Provide, inject
+
+from flask import Blueprint, Response, jsonify
+
+from auth.containers import Container
+from auth.core.config import get_settings
+
+if TYPE_CHECKING:
+    from auth.domain.users.keyring import KeyRing
+
+settings = get_settings()
+
+well_known = Blueprint("well_known", __name__, url_prefix="/.well-known")
+
+
+@well_known.route("/jwks.json")
+@inject
+def jwks(key_ring: KeyRing = Provide[Container.user_package.key_ring]) -> Response:
+    """Public keys for verifying user tokens (RFC 7517)."""
+    response = jsonify(key_ring.jwks())
+    response.cache_control.public = True
+    response.cache_control.max_age = settings.JWT_JWKS_MAX_AGE
+    return response
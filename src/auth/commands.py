@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from auth.domain.users.commands import users_cli
+
+if TYPE_CHECKING:
+    from flask import Flask
+
+
+def init_commands(app: Flask) -> None:
+    """Register management commands."""
+    app.cli.add_command(users_cli)
@@ -65,3 +65,11 @@ class RequiredHeaderMissingError(NetflixAuthError):
     message = "Required header is missing"
     code = "missing_header"
     status_code = HTTPStatus.BAD_REQUEST
+
+
+class InvalidCursorError(NetflixAuthError):
+    """Pagination cursor is malformed."""
+
+    message = "Invalid pagination cursor"
+    code = "invalid_cursor"
+    status_code = HTTPStatus.BAD_REQUEST
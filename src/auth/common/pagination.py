@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import datetime
+import json
+import uuid
+from typing import Any
+
+from .exceptions import InvalidCursorError
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode position of the last item of the page (values of the ordering keys) to an opaque cursor."""
+    payload = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *value_types: type) -> tuple:
+    """Decode cursor to the values of the ordering keys."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+        if not isinstance(values, list) or len(values) != len(value_types):
+            raise InvalidCursorError()
+        return tuple(_decode_value(value, value_type) for value, value_type in zip(values, value_types))
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursorError()
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _decode_value(value: Any, value_type: type) -> Any:
+    # datetimes and UUIDs are encoded as strings, other JSON types fail with unrelated errors
+    if value_type in (datetime.datetime, uuid.UUID) and not isinstance(value, str):
+        raise TypeError(f"Cursor value of {value_type.__name__} has to be a string")
+    if value_type is datetime.datetime:
+        return datetime.datetime.fromisoformat(value)
+    return value_type(value)
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Generic, TypeVar
 from uuid import UUID
 
 seconds = int
@@ -7,10 +8,25 @@ Id = int | str | UUID
 
 Query = dict | str
 
+T = TypeVar("T")
+
 
 @dataclass(frozen=True, slots=True)
-class PageNumberPagination:
-    """Page number pagination params."""
+class CursorPagination:
+    """Cursor pagination params.
+
+    `cursor` is an opaque position after the last item of the previous page, the first page is requested without it.
+    """
 
-    page: int
+    cursor: str | None
     per_page: int
+    with_count: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class Page(Generic[T]):
+    """Page of items with a cursor of the next page."""
+
+    items: list[T]
+    next_cursor: str | None = None
+    count: int | None = None
@@ -1,11 +1,12 @@
 from dependency_injector import containers, providers
 
 from auth.core.logging import configure_logger
+from auth.domain.oauth.containers import OAuthContainer
 from auth.domain.roles.containers import RoleContainer
 from auth.domain.social.auth.stubs import GoogleSocialAuthStub, OauthClientStub, YandexSocialAuthStub
 from auth.domain.social.containers import SocialContainer
 from auth.domain.users.containers import UserContainer
-from auth.infrastructure.db import cache, jwt_storage, redis
+from auth.infrastructure.db import cache, jwt_storage, redis, revocation, token_families
 from auth.integrations import notifications
 from auth.integrations.notifications.stubs import NetflixNotificationsClientStub
 
@@ -16,11 +17,14 @@ class Container(containers.DeclarativeContainer):
     wiring_config = containers.WiringConfiguration(
         modules=[
             "auth.jwt_manager",
+            "auth.domain.oauth.validator",
             "auth.domain.users.signals",
+            "auth.domain.users.commands",
             "auth.api.v1.auth.views",
             "auth.api.v1.users.views",
             "auth.api.v1.roles.views",
             "auth.api.v1.social.views",
+            "auth.api.well_known",
         ],
     )
 
@@ -30,6 +34,14 @@ class Container(containers.DeclarativeContainer):
 
     # Infrastructure
 
+    redis_pool_options = providers.Dict(
+        max_connections=config.REDIS_POOL_MAX_CONNECTIONS,
+        timeout=config.REDIS_POOL_TIMEOUT,
+        socket_timeout=config.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=config.REDIS_SOCKET_CONNECT_TIMEOUT,
+        socket_keepalive=config.REDIS_SOCKET_KEEPALIVE,
+        health_check_interval=config.REDIS_HEALTH_CHECK_INTERVAL,
+    )
     redis_connection = providers.Resource(
         redis.init_redis,
         host=config.REDIS_HOST,
@@ -37,10 +49,23 @@ class Container(containers.DeclarativeContainer):
         encoding=config.REDIS_DEFAULT_CHARSET,
         decode_responses=config.REDIS_DECODE_RESPONSES,
         retry_on_timeout=config.REDIS_RETRY_ON_TIMEOUT,
+        pool_options=redis_pool_options,
+    )
+    redis_shards = providers.Resource(
+        redis.init_redis_shards,
+        redis_client=redis_connection,
+        replicas=config.REDIS_REPLICAS,
+        shards=config.REDIS_SHARDS,
+        encoding=config.REDIS_DEFAULT_CHARSET,
+        decode_responses=config.REDIS_DECODE_RESPONSES,
+        retry_on_timeout=config.REDIS_RETRY_ON_TIMEOUT,
+        failover_cooldown=config.REDIS_FAILOVER_COOLDOWN,
+        pool_options=redis_pool_options,
     )
     redis_client = providers.Singleton(
         redis.RedisClient,
         redis_client=redis_connection,
+        shards=redis_shards,
     )
     cache = providers.Singleton(
         cache.RedisCache,
@@ -48,9 +73,31 @@ class Container(containers.DeclarativeContainer):
         default_ttl=config.REDIS_DEFAULT_TIMEOUT,
     )
 
+    revocation_feed = providers.Singleton(
+        revocation.RevocationFeed,
+        redis_client=redis_client,
+        channel=config.JWT_REVOCATION_CHANNEL,
+        index_key=config.JWT_REVOCATION_INDEX_KEY,
+        generations_key=config.JWT_GENERATIONS_KEY,
+        generation_ttl=config.JWT_REFRESH_TOKEN_EXPIRES,
+    )
+    local_revocation_cache = providers.Singleton(
+        revocation.LocalRevocationCache,
+        feed=revocation_feed,
+        enabled=config.JWT_LOCAL_REVOCATION_CACHE,
+    )
+
     jwt_storage = providers.Singleton(
         jwt_storage.JWTStorage,
         cache=cache,
+        revocation_feed=revocation_feed,
+        local_cache=local_revocation_cache,
+    )
+    token_families = providers.Singleton(
+        token_families.RefreshTokenFamilies,
+        redis_client=redis_client,
+        key_prefix=config.JWT_REFRESH_FAMILY_KEY_PREFIX,
+        sessions_key_prefix=config.JWT_SESSIONS_KEY_PREFIX,
     )
 
     # Integrations
@@ -59,11 +106,21 @@ class Container(containers.DeclarativeContainer):
 
     # Domain
 
+    oauth_package = providers.Container(
+        OAuthContainer,
+        config=config,
+    )
+
     role_package = providers.Container(RoleContainer)
 
     user_package = providers.Container(
         UserContainer,
+        config=config,
+        cache=cache,
         jwt_storage=jwt_storage,
+        token_families=token_families,
+        revocation_feed=revocation_feed,
+        local_revocation_cache=local_revocation_cache,
         role_repository=role_package.role_repository,
     )
 
@@ -40,6 +40,60 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str = None
     JWT_ACCESS_TOKEN_EXPIRES: timedelta = timedelta(minutes=10)
     JWT_REFRESH_TOKEN_EXPIRES: timedelta = timedelta(days=3)
+    JWT_LAZY_USER_LOADING: bool = Field(False)
+    JWT_LOCAL_REVOCATION_CACHE: bool = Field(True)
+    JWT_REVOCATION_CHANNEL: str = "jwt:revocations"
+    JWT_REVOCATION_INDEX_KEY: str = "jwt:revoked"
+    JWT_GENERATIONS_KEY: str = "jwt:generations"
+    JWT_REFRESH_FAMILY_KEY_PREFIX: str = "jwt:family:"
+    JWT_SESSIONS_KEY_PREFIX: str = "jwt:sessions:"
+    JWT_ALGORITHM: Literal["HS256", "RS256", "EdDSA"] = "HS256"
+    # PEM private keys of RS256/EdDSA, the first key signs tokens, all keys verify them: `path,path`
+    JWT_PRIVATE_KEYS: Union[str, list[str]] = Field(default_factory=list)
+    # tokens signed with `JWT_SECRET_KEY` are still accepted after switching to RS256/EdDSA,
+    # only for the migration: every holder of the secret can issue user tokens while it is enabled
+    JWT_ACCEPT_SECRET_KEY_TOKENS: bool = Field(False)
+    JWT_JWKS_MAX_AGE: seconds = 60 * 60  # 1 hour
+    # keys stored in the database (without `JWT_PRIVATE_KEYS`)
+    JWT_KEY_ROTATION_INTERVAL: timedelta = timedelta(days=30)
+    JWT_KEYS_REFRESH_INTERVAL: seconds = 60
+
+    # Users cache
+    USER_CACHE_TTL: seconds = 5 * 60  # 5 minutes
+    USER_CACHE_LOCAL_TTL: seconds = 60
+    USER_CACHE_LOCAL_MAXSIZE: int = 1024
+
+    # Tokens introspection
+    INTROSPECTION_CACHE_MAXSIZE: int = 10_000
+    INTROSPECTION_BATCH_MAX_SIZE: int = 100
+
+    # Users roles
+    USER_ROLES_BATCH_MAX_SIZE: int = 1000
+
+    # Login history
+    LOGIN_LOG_ASYNC_WRITES: bool = Field(True)
+    LOGIN_LOG_BUFFER_SIZE: int = 10_000
+    LOGIN_LOG_BATCH_SIZE: int = 500
+    LOGIN_LOG_FLUSH_INTERVAL: seconds = 1
+    LOGIN_LOG_EXPORT_BATCH_SIZE: int = 1000
+    LOGIN_LOG_PARTITIONS_AHEAD: int = 3
+    # 0 - retention is disabled
+    LOGIN_LOG_RETENTION_MONTHS: int = 0
+    USER_AGENT_CACHE_MAXSIZE: int = 4096
+    USER_AGENT_CACHE_WARM_UP_SIZE: int = 0
+
+    # Password hashing
+    PASSWORD_HASHER: Literal["pbkdf2", "scrypt", "argon2"] = "pbkdf2"
+    PASSWORD_HASHER_PBKDF2_ITERATIONS: int = 260_000
+    PASSWORD_HASHER_SCRYPT_COST: int = 2 ** 15
+    PASSWORD_HASHER_SCRYPT_BLOCK_SIZE: int = 8
+    PASSWORD_HASHER_SCRYPT_PARALLELISM: int = 1
+    PASSWORD_HASHER_ARGON2_TIME_COST: int = 3
+    PASSWORD_HASHER_ARGON2_MEMORY_COST: int = 64 * 1024  # KiB
+    PASSWORD_HASHER_ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASHING_WORKERS: int = 2
+    PASSWORD_HASHING_QUEUE_SIZE: int = 32
+    PASSWORD_HASHING_TIMEOUT: seconds = 10
 
     # Tracing
     OTEL_ENABLE_TRACING: bool = Field(True)
@@ -49,6 +103,12 @@ class Settings(BaseSettings):
     AUTH0_API_AUDIENCE: str
     AUTH0_ISSUER: str
     AUTH0_ALGORITHMS: list[str] = ["RS256"]
+    AUTH0_JWKS_CACHE_TTL: seconds = 10 * 60  # 10 minutes, if provider doesn't send `Cache-Control: max-age`
+    AUTH0_JWKS_MIN_CACHE_TTL: seconds = 60  # 1 minute
+    AUTH0_JWKS_MAX_CACHE_TTL: seconds = 24 * 60 * 60  # 1 day
+    AUTH0_JWKS_REFRESH_COOLDOWN: seconds = 30
+    AUTH0_JWKS_REQUEST_TIMEOUT: seconds = 5
+    AUTH0_TOKEN_CACHE_SIZE: int = 1024
 
     # Social
     SOCIAL_GOOGLE_CLIENT_ID: str
@@ -71,6 +131,15 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASSWORD: str
     DB_URL: str = None
+    # connection pool of every worker process, total connections: `workers * (size + max overflow)`
+    DB_POOL_SIZE: int = 10
+    DB_POOL_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: seconds = 10  # max wait for a free connection
+    DB_POOL_RECYCLE: seconds = 30 * 60  # 30 minutes
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT: seconds = 30  # 0 - no timeout
+    # connections go through an external pooler in transaction mode (e.g. PgBouncer), app pool is disabled
+    DB_EXTERNAL_POOLER: bool = False
 
     # Redis
     REDIS_HOST: str
@@ -80,6 +149,18 @@ class Settings(BaseSettings):
     REDIS_DECODE_RESPONSES: bool | Literal[True, False] = True
     REDIS_RETRY_ON_TIMEOUT: bool = True
     REDIS_DEFAULT_TIMEOUT: seconds = 5 * 60  # 5 minutes
+    # replicas of the default instance: `host:port,host:port`
+    REDIS_REPLICAS: Union[str, list[str]] = Field(default_factory=list)
+    # keys are spread over shards by consistent hashing: `primary:port,replica:port;primary:port`
+    REDIS_SHARDS: Union[str, list[list[str]]] = Field(default_factory=list)
+    REDIS_FAILOVER_COOLDOWN: seconds = 5
+    # connection pool of every Redis node (per worker process)
+    REDIS_POOL_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: seconds = 5  # max wait for a free connection
+    REDIS_SOCKET_TIMEOUT: seconds = 5
+    REDIS_SOCKET_CONNECT_TIMEOUT: seconds = 2
+    REDIS_SOCKET_KEEPALIVE: bool = True
+    REDIS_HEALTH_CHECK_INTERVAL: seconds = 30
 
     class Config(EnvConfig):
         env_prefix = "NAA_"
@@ -91,6 +172,27 @@ class Settings(BaseSettings):
             return [item.strip() for item in server_hosts.split(",")]
         return server_hosts
 
+    @validator("REDIS_REPLICAS", pre=True)
+    def _assemble_redis_replicas(cls, redis_replicas):
+        if isinstance(redis_replicas, str):
+            return [item.strip() for item in redis_replicas.split(",") if item.strip()]
+        return redis_replicas
+
+    @validator("REDIS_SHARDS", pre=True)
+    def _assemble_redis_shards(cls, redis_shards):
+        if isinstance(redis_shards, str):
+            return [
+                [address.strip() for address in shard.split(",") if address.strip()]
+                for shard in redis_shards.split(";") if shard.strip()
+            ]
+        return redis_shards
+
+    @validator("JWT_PRIVATE_KEYS", pre=True)
+    def _assemble_jwt_private_keys(cls, jwt_private_keys):
+        if isinstance(jwt_private_keys, str):
+            return [item.strip() for item in jwt_private_keys.split(",") if item.strip()]
+        return jwt_private_keys
+
     @validator("THROTTLE_DEFAULT_LIMITS", pre=True)
     def _assemble_throttle_default_limits(cls, throttle_default_limits):
         if isinstance(throttle_default_limits, str):
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class VerifiedTokenCache:
+    """Bounded LRU cache of verified token payloads.
+
+    Entries are keyed by the token digest and expire together with the token (`exp` claim).
+
+    Attributes:
+        maxsize: max number of cached payloads.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+
+        self._payloads: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> dict | None:
+        """Get verified payload of the given token."""
+        key = self._make_key(token)
+        with self._lock:
+            entry = self._payloads.get(key)
+            if entry is None:
+                return None
+            payload, expires_at = entry
+            if time.time() >= expires_at:
+                del self._payloads[key]
+                return None
+            self._payloads.move_to_end(key)
+        return payload
+
+    def set(self, token: str, payload: dict) -> None:
+        """Save verified payload of the given token."""
+        if self.maxsize <= 0 or "exp" not in payload:
+            return
+        key = self._make_key(token)
+        with self._lock:
+            self._payloads[key] = (payload, float(payload["exp"]))
+            self._payloads.move_to_end(key)
+            while len(self._payloads) > self.maxsize:
+                self._payloads.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all cached payloads."""
+        with self._lock:
+            self._payloads.clear()
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    @staticmethod
+    def _make_key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
@@ -0,0 +1,24 @@
+from dependency_injector import containers, providers
+
+from . import cache, jwks
+
+
+class OAuthContainer(containers.DeclarativeContainer):
+    """App DI container."""
+
+    config = providers.Configuration()
+
+    jwks_store = providers.Resource(
+        jwks.init_jwks_store,
+        domain=config.AUTH0_DOMAIN,
+        default_ttl=config.AUTH0_JWKS_CACHE_TTL,
+        min_ttl=config.AUTH0_JWKS_MIN_CACHE_TTL,
+        max_ttl=config.AUTH0_JWKS_MAX_CACHE_TTL,
+        refresh_cooldown=config.AUTH0_JWKS_REFRESH_COOLDOWN,
+        request_timeout=config.AUTH0_JWKS_REQUEST_TIMEOUT,
+    )
+
+    token_cache = providers.Singleton(
+        cache.VerifiedTokenCache,
+        maxsize=config.AUTH0_TOKEN_CACHE_SIZE,
+    )
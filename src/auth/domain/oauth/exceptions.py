@@ -17,3 +17,11 @@ class OAuthPermissionError(NetflixAuthError):
     message = "Client does not have access to the resource"
     code = "oauth_unauthorized"
     status_code = HTTPStatus.FORBIDDEN
+
+
+class JWKSUnavailableError(NetflixAuthError):
+    """Provider's public keys are not available."""
+
+    message = "Unable to fetch keys for validating authentication token"
+    code = "jwks_unavailable"
+    status_code = HTTPStatus.SERVICE_UNAVAILABLE
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from typing import Iterator
+
+import requests
+
+from auth.common.types import seconds
+
+from .exceptions import JWKSUnavailableError, OAuthError
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+# refresh keys in the background when this part of the ttl has passed
+REFRESH_AHEAD_RATIO = 0.8
+
+
+def init_jwks_store(
+    domain: str, *,
+    default_ttl: seconds, min_ttl: seconds, max_ttl: seconds, refresh_cooldown: seconds, request_timeout: seconds,
+) -> Iterator[JWKSKeyStore]:
+    """Init JWKS key store."""
+    jwks_store = JWKSKeyStore(
+        jwks_url=f"https://{domain}/.well-known/jwks.json",
+        default_ttl=default_ttl,
+        min_ttl=min_ttl,
+        max_ttl=max_ttl,
+        refresh_cooldown=refresh_cooldown,
+        request_timeout=request_timeout,
+    )
+    yield jwks_store
+    jwks_store.close()
+
+
+class JWKSKeyStore:
+    """In-memory JWKS key store.
+
+    Keys are indexed by `kid` and refreshed in the background according to the provider's `Cache-Control` header.
+    Concurrent refreshes share a single request to the provider.
+
+    Attributes:
+        jwks_url: JWKS endpoint of the provider.
+        default_ttl: keys ttl if the provider doesn't send `max-age`.
+        min_ttl: lower bound for the keys ttl.
+        max_ttl: upper bound for the keys ttl.
+        refresh_cooldown: min interval between refreshes triggered by requests (unknown `kid`, expired keys).
+        request_timeout: JWKS request timeout.
+    """
+
+    def __init__(
+        self,
+        jwks_url: str, *,
+        default_ttl: seconds, min_ttl: seconds, max_ttl: seconds, refresh_cooldown: seconds, request_timeout: seconds,
+    ) -> None:
+        self.jwks_url = jwks_url
+        self.default_ttl = default_ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.refresh_cooldown = refresh_cooldown
+        self.request_timeout = request_timeout
+
+        self._keys: dict[str, dict] = {}
+        self._expires_at: float = 0.0
+        self._last_refresh: float | None = None
+        self._lock = threading.Lock()
+        self._inflight: threading.Event | None = None
+        self._timer: threading.Timer | None = None
+        self._closed = False
+
+    def get_key(self, kid: str) -> dict:
+        """Get public key by the `kid`.
+
+        Unknown `kid` triggers a single rate-limited refresh, so rotated keys are picked up without a restart.
+        """
+        if (not self._keys or self._is_expired()) and self._can_refresh():
+            self.refresh()
+        key = self._ensure_keys().get(kid)
+        if key is not None:
+            return key
+        if self._can_refresh():
+            self.refresh()
+            key = self._keys.get(kid)
+        if key is None:
+            raise OAuthError("Unable to find appropriate key", "invalid_header")
+        return key
+
+    def refresh(self) -> dict[str, dict]:
+        """Fetch keys from the provider.
+
+        If a refresh is already in progress, wait for it instead of sending another request.
+        """
+        with self._lock:
+            inflight = self._inflight
+            is_leader = inflight is None
+            if is_leader:
+                inflight = self._inflight = threading.Event()
+        if not is_leader:
+            inflight.wait(self.request_timeout)
+            return self._ensure_keys()
+        try:
+            self._fetch()
+        finally:
+            with self._lock:
+                self._inflight = None
+            inflight.set()
+        return self._ensure_keys()
+
+    def close(self) -> None:
+        """Stop background refreshes."""
+        self._closed = True
+        if self._timer is not None:
+            self._timer.cancel()
+
+    def _fetch(self) -> None:
+        self._last_refresh = time.monotonic()
+        try:
+            response = requests.get(self.jwks_url, timeout=self.request_timeout)
+            response.raise_for_status()
+            jwks = response.json()
+        except (requests.RequestException, ValueError):
+            logger.exception("Unable to fetch JWKS from %s", self.jwks_url)
+            # serve stale keys (if any) and retry later
+            self._schedule_refresh(self.min_ttl)
+            return
+        self._keys = {key["kid"]: self._prepare_key(key) for key in jwks.get("keys", []) if "kid" in key}
+        ttl = self._get_ttl(response.headers.get("Cache-Control"))
+        self._expires_at = time.monotonic() + ttl
+        self._schedule_refresh(ttl * REFRESH_AHEAD_RATIO)
+
+    def _background_refresh(self) -> None:
+        if self._closed:
+            return
+        try:
+            self.refresh()
+        except JWKSUnavailableError:
+            pass
+
+    def _schedule_refresh(self, delay: float) -> None:
+        if self._closed:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _ensure_keys(self) -> dict[str, dict]:
+        if not self._keys:
+            raise JWKSUnavailableError
+        return self._keys
+
+    def _is_expired(self) -> bool:
+        return time.monotonic() >= self._expires_at
+
+    def _can_refresh(self) -> bool:
+        if self._last_refresh is None:
+            return True
+        return time.monotonic() - self._last_refresh >= self.refresh_cooldown
+
+    def _get_ttl(self, cache_control: str | None) -> seconds:
+        ttl = self.default_ttl
+        if cache_control:
+            if "no-cache" in cache_control or "no-store" in cache_control:
+                ttl = self.min_ttl
+            elif match := MAX_AGE_RE.search(cache_control):
+                ttl = int(match.group(1))
+        return max(self.min_ttl, min(ttl, self.max_ttl))
+
+    @staticmethod
+    def _prepare_key(key: dict) -> dict:
+        fields = ("kty", "kid", "use", "n", "e")
+        return {field: key[field] for field in fields if field in key}
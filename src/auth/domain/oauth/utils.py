@@ -1,8 +1,6 @@
 from functools import wraps
 from typing import Any, Callable, Final
 
-from jose import jwt
-
 from flask import _request_ctx_stack, request
 
 from .exceptions import OAuthError, OAuthPermissionError
@@ -29,12 +27,11 @@ def get_token_from_header() -> str:
     return token
 
 
-def has_scope(token: str, required_scope: str) -> bool:
-    """Determines whether the token has the required 'scope'."""
-    unverified_claims = jwt.get_unverified_claims(token)
-    if not unverified_claims.get("scope"):
+def has_scope(claims: dict, required_scope: str) -> bool:
+    """Determines whether the verified token claims have the required 'scope'."""
+    if not claims.get("scope"):
         return False
-    token_scopes = unverified_claims["scope"].split()
+    token_scopes = claims["scope"].split()
     return required_scope in token_scopes
 
 
@@ -54,13 +51,13 @@ class requires_auth:  # noqa
             token = get_token_from_header()
             payload = validate_token(token)
             if self.required_scope is not None:
-                self._check_permissions(token, self.required_scope)
+                self._check_permissions(payload, self.required_scope)
             _request_ctx_stack.top.current_user = payload
             return func(*args, **kwargs)
         return wrapper
 
     @staticmethod
-    def _check_permissions(token: str, scope: str) -> None:
-        access_denied = not has_scope(token, scope)
+    def _check_permissions(claims: dict, scope: str) -> None:
+        access_denied = not has_scope(claims, scope)
         if access_denied:
             raise OAuthPermissionError
@@ -1,32 +1,46 @@
-import requests
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from dependency_injector.wiring import Provide, inject
 from jose import jwt
 
+from auth.containers import Container
 from auth.core.config import get_settings
 
 from .exceptions import OAuthError
 
+if TYPE_CHECKING:
+    from .cache import VerifiedTokenCache
+    from .jwks import JWKSKeyStore
+
 settings = get_settings()
 
 
-def validate_token(token: str) -> dict:
+@inject
+def validate_token(
+    token: str,
+    jwks_store: JWKSKeyStore = Provide[Container.oauth_package.jwks_store],
+    token_cache: VerifiedTokenCache = Provide[Container.oauth_package.token_cache],
+) -> dict:
     """Validate access token using auth0 service.
 
+    Verified payloads are cached until the token expires, so repeated tokens skip the signature verification.
+
     Example from docs: https://auth0.com/docs/quickstart/backend/python#create-the-jwt-validation-decorator
     """
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         unverified_header = jwt.get_unverified_header(token)
     except jwt.JWTError:
         raise OAuthError("Unable to parse authentication token", "invalid_header")
     if unverified_header["alg"] == "HS256":
         raise OAuthError("Invalid header. Use an RS256 signed JWT Access Token", "invalid_header")
-    jwks = requests.get(f"https://{settings.AUTH0_DOMAIN}/.well-known/jwks.json").json()
-    rsa_key = {}
-    for key in jwks["keys"]:
-        if key["kid"] != unverified_header["kid"]:
-            continue
-        rsa_key = {"kty": key["kty"], "kid": key["kid"], "use": key["use"], "n": key["n"], "e": key["e"]}
-    if not rsa_key:
+    if "kid" not in unverified_header:
         raise OAuthError("Unable to find appropriate key", "invalid_header")
+    rsa_key = jwks_store.get_key(unverified_header["kid"])
     try:
         payload = jwt.decode(
             token=token,
@@ -41,4 +55,5 @@ def validate_token(token: str) -> dict:
         raise OAuthError("Incorrect claims, please check the audience and issuer", "invalid_claims")
     except Exception:
         raise OAuthError("Unable to parse authentication token", "invalid_header")
+    token_cache.set(token, payload)
     return payload
@@ -1,7 +1,7 @@
 from typing import Any
 from uuid import UUID
 
-from sqlalchemy import any_
+from sqlalchemy import any_, bindparam, select
 from sqlalchemy.exc import IntegrityError, NoResultFound
 
 from auth.common.exceptions import ConflictError, NotFoundError
@@ -10,6 +10,10 @@ from auth.infrastructure.db.postgres import db, db_session
 from . import types
 from .models import Role
 
+_ROLES_BY_NAMES = select(Role.id, Role.name, Role.description).where(
+    Role.name == any_(bindparam("names")),
+)
+
 
 class RoleRepository:
     """Roles repository."""
@@ -17,8 +21,8 @@ class RoleRepository:
     @staticmethod
     def find_by_names(roles_names: list[str]) -> list[types.Role]:
         """Find roles by names."""
-        roles = Role.query.filter_by(name=any_([roles_names])).all()
-        return [role.to_dto() for role in roles]
+        roles = db.session.execute(_ROLES_BY_NAMES, {"names": roles_names}).all()
+        return [types.Role.from_dict(role._mapping) for role in roles]
 
     @staticmethod
     def get_all() -> list[types.Role]:
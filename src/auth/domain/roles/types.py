@@ -14,3 +14,7 @@ class Role:
     def from_dict(cls, data: dict) -> "Role":
         dct = {"id": data["id"], "name": data["name"], "description": data["description"]}
         return cls(**dct)
+
+    def to_dict(self) -> dict:
+        dct = {"id": str(self.id), "name": self.name, "description": self.description}
+        return dct
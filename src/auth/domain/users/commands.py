@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, Callable
+
+import click
+from dependency_injector.wiring import Provide, inject
+from sqlalchemy import any_, func
+from sqlalchemy.dialects import postgresql
+
+from flask.cli import AppGroup
+
+from auth.containers import Container
+from auth.domain.roles import repositories as role_repositories
+from auth.domain.roles.models import Role
+from auth.infrastructure.db.postgres import db
+
+from .keyring import ASYMMETRIC_ALGORITHMS
+from .models import User, UsersRoles
+from .repositories import user_repository
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Query
+    from sqlalchemy.sql import Select
+
+    from .hashers import BasePasswordHasher, HasherRegistry
+    from .keyring import KeyRotation
+    from .partitions import LoginLogPartitionManager
+
+users_cli = AppGroup("users", help="Users management.")
+
+
+@users_cli.command("benchmark-hashers")
+@click.option("--duration", default=3.0, show_default=True, help="Seconds to spend on each hasher.")
+@inject
+def benchmark_hashers(
+    duration: float,
+    password_hashers: HasherRegistry = Provide[Container.user_package.password_hashers],
+) -> None:
+    """Measure hashes per second per core for each configured password hasher."""
+    click.echo(f"{'algorithm':<10} {'hashes/s/core':>14} {'ms/hash':>9}  parameters")
+    for algorithm, hasher in password_hashers.hashers.items():
+        rate = _measure_hash_rate(hasher, duration)
+        default_mark = " (default)" if hasher is password_hashers.default else ""
+        params = ", ".join(f"{name}={value}" for name, value in hasher.params.items())
+        click.echo(f"{algorithm:<10} {rate:>14.2f} {1000 / rate:>9.1f}  {params}{default_mark}")
+
+
+@users_cli.command("benchmark-queries")
+@click.option("--iterations", default=1000, show_default=True, help="Calls of each query.")
+def benchmark_queries(iterations: int) -> None:
+    """Compare per-call Python overhead of the hot path queries built as ORM queries and precompiled.
+
+    Database isn't queried: both variants render the same SQL, so round trips are equal. An ORM query is built
+    and its cache key is generated on every call, a precompiled statement only reuses the memoized cache key.
+    Compilation is paid once per statement by both variants, when the compiled SQL is not cached yet.
+    """
+    dialect = postgresql.dialect()
+    click.echo(f"{'query':<15} {'orm, us':>9} {'precompiled, us':>16} {'saved, us':>10} {'compile, us':>12}")
+    for name, (build_orm_query, statement, _) in _hot_path_queries().items():
+        orm_time = _measure_call_time(lambda: build_orm_query()._generate_cache_key(), iterations) * 1_000_000
+        # the key is memoized on the statement, so the method is looked up on every call, as on execution
+        precompiled_time = _measure_call_time(lambda: statement._generate_cache_key(), iterations) * 1_000_000
+        compile_time = _measure_call_time(lambda: statement.compile(dialect=dialect), iterations) * 1_000_000
+        click.echo(
+            f"{name:<15} {orm_time:>9.1f} {precompiled_time:>16.1f} {orm_time - precompiled_time:>10.1f}"
+            f" {compile_time:>12.1f}",
+        )
+
+
+@users_cli.command("manage-loginlog-partitions")
+@click.option("--drop", is_flag=True, help="Drop expired partitions permanently instead of detaching them.")
+@inject
+def manage_loginlog_partitions(
+    drop: bool,
+    partition_manager: LoginLogPartitionManager = Provide[Container.user_package.login_log_partition_manager],
+) -> None:
+    """Create future monthly login history partitions and detach (or drop) the expired ones."""
+    for name in partition_manager.ensure_partitions():
+        click.echo(f"Created partition {name}")
+    for name in partition_manager.remove_expired(drop=drop):
+        click.echo(f"{'Dropped' if drop else 'Detached'} partition {name}")
+
+
+def _measure_hash_rate(hasher: BasePasswordHasher, duration: float) -> float:
+    hasher.encode("warm-up")
+    hashes = 0
+    started_at = time.perf_counter()
+    while (elapsed := time.perf_counter() - started_at) < duration:
+        hasher.encode("benchmark-password")
+        hashes += 1
+    return hashes / elapsed
+
+
+@users_cli.command("rotate-signing-keys")
+@click.option("--force", is_flag=True, help="Schedule the next key regardless of the rotation interval.")
+@inject
+def rotate_signing_keys(
+    force: bool,
+    key_rotation: KeyRotation = Provide[Container.user_package.key_rotation],
+    algorithm: str = Provide[Container.config.JWT_ALGORITHM],
+    private_keys: list[str] = Provide[Container.config.JWT_PRIVATE_KEYS],
+) -> None:
+    """Schedule the next token signing key if the active one is due for rotation and remove the expired keys."""
+    if algorithm not in ASYMMETRIC_ALGORITHMS or private_keys:
+        click.echo("Signing keys aren't stored in the database")
+        return
+    signing_key = key_rotation.rotate(force=force)
+    if signing_key is not None:
+        click.echo(f"Scheduled key {signing_key.kid} activation at {signing_key.activates_at:%Y-%m-%d %H:%M:%S}")
+    removed = key_rotation.remove_expired()
+    if removed:
+        click.echo(f"Removed {removed} expired keys")
+
+
+def _measure_call_time(query: Callable[[], Any], iterations: int) -> float:
+    query()
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        query()
+    return (time.perf_counter() - started_at) / iterations
+
+
+def _hot_path_queries() -> dict[str, tuple[Callable[[], Select], Select, dict[str, Any]]]:
+    """Get hot path queries as they were built with ORM, and the precompiled statements with their parameters."""
+    user_id, role_id, email, roles_names = uuid.uuid4(), uuid.uuid4(), "benchmark@example.com", ["admin", "user"]
+    return {
+        "active user": (
+            lambda: _orm_active_with_roles(id=user_id).statement,
+            user_repository._ACTIVE_USER_BY_ID,
+            {"user_id": user_id},
+        ),
+        "user exists": (
+            lambda: _orm_exists(db.session.query(User.id).filter_by(email=email, active=True)),
+            user_repository._USER_EXISTS,
+            {"email": email},
+        ),
+        "has role": (
+            lambda: _orm_exists(db.session.query(UsersRoles.user_id).filter_by(user_id=user_id, role_id=role_id)),
+            user_repository._HAS_ROLE,
+            {"user_id": user_id, "role_id": role_id},
+        ),
+        # roles were loaded as models, the precompiled statement selects the DTO fields only
+        "roles by names": (
+            lambda: _orm_roles_by_names(roles_names),
+            role_repositories._ROLES_BY_NAMES,
+            {"names": roles_names},
+        ),
+    }
+
+
+def _orm_active_with_roles(**filters) -> Query:
+    # query of `UserRepository` before the statements were precompiled
+    roles = func.json_agg(
+        func.jsonb_build_object("id", Role.id, "name", Role.name, "description", Role.description).distinct(),
+    ).label("roles")
+    return (
+        db.session
+        .query(User.id, User.email, User.password, User.active, roles)
+        .filter_by(**filters, active=True)
+        .join(User.roles.local_attr, isouter=True)
+        .join(User.roles.remote_attr, isouter=True)
+        .group_by(User.id)
+    )
+
+
+def _orm_exists(query: Query) -> Select:
+    return db.session.query(query.exists()).statement
+
+
+def _orm_roles_by_names(roles_names: list[str]) -> Select:
+    return db.session.query(Role.id, Role.name, Role.description).filter_by(name=any_([roles_names])).statement
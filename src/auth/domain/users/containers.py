@@ -1,27 +1,146 @@
+import operator
+
 from dependency_injector import containers, providers
 
-from . import jwt, repositories, services
+from auth.infrastructure.db.cache import LocalMemoryCache
+
+from . import (
+    device_types, export, hashers, hashing, introspection, jwt, keyring, login_history, partitions, repositories,
+    services,
+)
 
 
 class UserContainer(containers.DeclarativeContainer):
     """App DI container."""
 
+    config = providers.Configuration()
+
     jwt_storage = providers.Dependency()
+    token_families = providers.Dependency()
     role_repository = providers.Dependency()
+    cache = providers.Dependency()
+    revocation_feed = providers.Dependency()
+    local_revocation_cache = providers.Dependency()
+
+    signing_key_repository = providers.Singleton(
+        repositories.SigningKeyRepository,
+        encryption_key=config.SECRET_KEY,
+    )
+    key_ring = providers.Resource(
+        keyring.init_key_ring,
+        algorithm=config.JWT_ALGORITHM,
+        private_keys=config.JWT_PRIVATE_KEYS,
+        signing_key_repository=signing_key_repository,
+        refresh_interval=config.JWT_KEYS_REFRESH_INTERVAL,
+    )
+    key_rotation = providers.Singleton(
+        keyring.KeyRotation,
+        signing_key_repository=signing_key_repository,
+        algorithm=config.JWT_ALGORITHM,
+        rotation_interval=config.JWT_KEY_ROTATION_INTERVAL,
+        # new key has to reach JWKS caches of consumers and key rings of all processes before it signs tokens
+        publish_lead=providers.Callable(operator.add, config.JWT_JWKS_MAX_AGE, config.JWT_KEYS_REFRESH_INTERVAL),
+        verify_period=config.JWT_REFRESH_TOKEN_EXPIRES,
+    )
 
+    password_hashers = providers.Singleton(
+        hashers.HasherRegistry,
+        default=config.PASSWORD_HASHER,
+        hashers=providers.List(
+            providers.Singleton(
+                hashers.PBKDF2PasswordHasher,
+                iterations=config.PASSWORD_HASHER_PBKDF2_ITERATIONS,
+            ),
+            providers.Singleton(
+                hashers.ScryptPasswordHasher,
+                cost=config.PASSWORD_HASHER_SCRYPT_COST,
+                block_size=config.PASSWORD_HASHER_SCRYPT_BLOCK_SIZE,
+                parallelism=config.PASSWORD_HASHER_SCRYPT_PARALLELISM,
+            ),
+            providers.Singleton(
+                hashers.Argon2PasswordHasher,
+                time_cost=config.PASSWORD_HASHER_ARGON2_TIME_COST,
+                memory_cost=config.PASSWORD_HASHER_ARGON2_MEMORY_COST,
+                parallelism=config.PASSWORD_HASHER_ARGON2_PARALLELISM,
+            ),
+        ),
+    )
+    password_hasher = providers.Resource(
+        hashing.init_password_hasher,
+        hashers=password_hashers,
+        workers=config.PASSWORD_HASHING_WORKERS,
+        queue_size=config.PASSWORD_HASHING_QUEUE_SIZE,
+        timeout=config.PASSWORD_HASHING_TIMEOUT,
+    )
+
+    user_agent_cache = providers.Singleton(
+        LocalMemoryCache,
+        maxsize=config.USER_AGENT_CACHE_MAXSIZE,
+    )
+    device_type_classifier = providers.Singleton(
+        device_types.DeviceTypeClassifier,
+        cache=user_agent_cache,
+        warm_up_size=config.USER_AGENT_CACHE_WARM_UP_SIZE,
+    )
     jwt_auth = providers.Singleton(
         jwt.JWTAuth,
         jwt_storage=jwt_storage,
+        token_families=token_families,
+        device_type_classifier=device_type_classifier,
+    )
+    login_log_repository = providers.Singleton(
+        repositories.LoginLogRepository,
+        device_type_classifier=device_type_classifier,
+    )
+    login_log_writer = providers.Resource(
+        login_history.init_login_log_writer,
+        login_log_repository=login_log_repository,
+        enabled=config.LOGIN_LOG_ASYNC_WRITES,
+        buffer_size=config.LOGIN_LOG_BUFFER_SIZE,
+        batch_size=config.LOGIN_LOG_BATCH_SIZE,
+        flush_interval=config.LOGIN_LOG_FLUSH_INTERVAL,
+    )
+    login_history_exporter = providers.Singleton(
+        export.LoginHistoryExporter,
+        login_log_repository=login_log_repository,
+        batch_size=config.LOGIN_LOG_EXPORT_BATCH_SIZE,
+    )
+    login_log_partition_manager = providers.Singleton(
+        partitions.LoginLogPartitionManager,
+        months_ahead=config.LOGIN_LOG_PARTITIONS_AHEAD,
+        retention_months=config.LOGIN_LOG_RETENTION_MONTHS,
+    )
+    user_local_cache = providers.Singleton(
+        LocalMemoryCache,
+        maxsize=config.USER_CACHE_LOCAL_MAXSIZE,
+        default_ttl=config.USER_CACHE_LOCAL_TTL,
     )
-
-    login_log_repository = providers.Singleton(repositories.LoginLogRepository)
     user_repository = providers.Singleton(
-        repositories.UserRepository,
+        repositories.CachedUserRepository,
         role_repository=role_repository,
+        password_hasher=password_hasher,
+        cache=cache,
+        local_cache=user_local_cache,
+        revocation_feed=revocation_feed,
+        local_revocation_cache=local_revocation_cache,
+        ttl=config.USER_CACHE_TTL,
+        local_ttl=config.USER_CACHE_LOCAL_TTL,
     )
+    introspection_cache = providers.Singleton(
+        LocalMemoryCache,
+        maxsize=config.INTROSPECTION_CACHE_MAXSIZE,
+    )
+    token_introspector = providers.Singleton(
+        introspection.TokenIntrospector,
+        jwt_storage=jwt_storage,
+        user_repository=user_repository,
+        local_revocation_cache=local_revocation_cache,
+        cache=introspection_cache,
+    )
+
     user_service = providers.Factory(
         services.UserService,
         jwt_auth=jwt_auth,
         user_repository=user_repository,
-        login_log_repository=login_log_repository,
+        login_log_writer=login_log_writer,
     )
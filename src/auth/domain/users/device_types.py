@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from user_agents import parse
+
+from auth.metrics import metrics
+
+from . import types
+
+if TYPE_CHECKING:
+    from auth.infrastructure.db.cache import Cache
+
+
+class DeviceTypeClassifier:
+    """Memoized classification of devices by the 'User Agent'.
+
+    Clients send a small set of distinct 'User Agent' strings, so parsing results are kept in a bounded LRU cache
+    shared by all threads of the process.
+
+    Attributes:
+        warm_up_size: number of the most frequent 'User Agent' strings loaded from the login history on start.
+    """
+
+    def __init__(self, cache: Cache, warm_up_size: int = 0) -> None:
+        self.cache = cache
+        self.warm_up_size = warm_up_size
+
+        self._hits = metrics.counter("user_agent_cache.hits")
+        self._misses = metrics.counter("user_agent_cache.misses")
+
+    def classify(self, user_agent: str) -> types.LoginLog.DeviceType:
+        """Identify device by a 'User Agent'."""
+        device_type = self.cache.get(user_agent)
+        if device_type is not None:
+            self._hits.inc()
+            return device_type
+        self._misses.inc()
+        device_type = self._parse(user_agent)
+        self.cache.set(user_agent, device_type)
+        return device_type
+
+    def warm_up(self, device_types: dict[str, types.LoginLog.DeviceType]) -> None:
+        """Fill the cache with already known classifications."""
+        for user_agent, device_type in device_types.items():
+            self.cache.set(user_agent, device_type)
+
+    @staticmethod
+    def _parse(user_agent: str) -> types.LoginLog.DeviceType:
+        user_agent = parse(user_agent)
+        if user_agent.is_mobile:
+            return types.LoginLog.DeviceType.MOBILE
+        elif user_agent.is_tablet:
+            return types.LoginLog.DeviceType.TABLET
+        return types.LoginLog.DeviceType.PC
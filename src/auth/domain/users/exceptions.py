@@ -19,9 +19,49 @@ class UserInvalidCredentialsError(NetflixAuthError):
     status_code = HTTPStatus.UNAUTHORIZED
 
 
+class RefreshTokenRevokedError(NetflixAuthError):
+    """Refresh token family has expired or has been revoked."""
+
+    message = "Refresh token has been revoked"
+    code = "refresh_token_revoked"
+    status_code = HTTPStatus.UNAUTHORIZED
+
+
+class RefreshTokenReuseError(NetflixAuthError):
+    """Already rotated refresh token is used again."""
+
+    message = "Refresh token has already been used, all tokens of the session are revoked"
+    code = "refresh_token_reused"
+    status_code = HTTPStatus.UNAUTHORIZED
+
+
+class SessionNotFoundError(NetflixAuthError):
+    """User doesn't have an active session with the given ID."""
+
+    message = "Session not found"
+    code = "session_not_found"
+    status_code = HTTPStatus.NOT_FOUND
+
+
 class UserPasswordChangeError(NetflixAuthError):
     """Password change error."""
 
     message = "Error during password change"
     code = "password_change_error"
     status_code = HTTPStatus.BAD_REQUEST
+
+
+class UserRolesBatchError(NetflixAuthError):
+    """Invalid bulk users roles request."""
+
+    message = "Either `pairs` or `user_ids` with `role_ids` must be given"
+    code = "invalid_roles_batch"
+    status_code = HTTPStatus.BAD_REQUEST
+
+
+class PasswordHashingUnavailableError(NetflixAuthError):
+    """Password hashing queue is full or hashing takes too long."""
+
+    message = "Service is overloaded, please try again later"
+    code = "password_hashing_unavailable"
+    status_code = HTTPStatus.SERVICE_UNAVAILABLE
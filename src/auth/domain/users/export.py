@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import csv
+import datetime
+import io
+import json
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+
+from . import types
+
+if TYPE_CHECKING:
+    from uuid import UUID
+
+    from sqlalchemy.engine import Row
+
+    from .repositories import LoginLogRepository
+
+EXPORT_FIELDS = ("id", "user_id", "created_at", "user_agent", "ip_addr", "device_type")
+
+
+class LoginHistoryExporter:
+    """Streaming export of the login history.
+
+    Records are read from a server-side cursor by `batch_size` rows and formatted without building DTOs,
+    so memory usage doesn't depend on the size of the exported history.
+    """
+
+    mimetypes = {
+        types.LoginLog.ExportFormat.NDJSON: "application/x-ndjson",
+        types.LoginLog.ExportFormat.CSV: "text/csv",
+    }
+
+    def __init__(self, login_log_repository: LoginLogRepository, batch_size: int) -> None:
+        self.login_log_repository = login_log_repository
+        self.batch_size = batch_size
+
+    def export_user_history(self, user_id: UUID, export_format: types.LoginLog.ExportFormat) -> Iterator[str]:
+        """Export the whole login history of the user."""
+        records = self.login_log_repository.iter_login_history(user_id=user_id, yield_per=self.batch_size)
+        return self._format(records, export_format)
+
+    def export_history(
+        self, since: datetime.datetime, until: datetime.datetime, export_format: types.LoginLog.ExportFormat,
+    ) -> Iterator[str]:
+        """Export login history of all users for the given period."""
+        records = self.login_log_repository.iter_login_history(since=since, until=until, yield_per=self.batch_size)
+        return self._format(records, export_format)
+
+    def _format(self, records: Iterable[Row], export_format: types.LoginLog.ExportFormat) -> Iterator[str]:
+        if export_format == types.LoginLog.ExportFormat.CSV:
+            return self._format_csv(records)
+        return self._format_ndjson(records)
+
+    def _format_ndjson(self, records: Iterable[Row]) -> Iterator[str]:
+        chunk = []
+        for record in records:
+            chunk.append(json.dumps(dict(zip(EXPORT_FIELDS, map(_to_primitive, record)))))
+            if len(chunk) >= self.batch_size:
+                yield "\n".join(chunk) + "\n"
+                chunk.clear()
+        if chunk:
+            yield "\n".join(chunk) + "\n"
+
+    def _format_csv(self, records: Iterable[Row]) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        for rows, record in enumerate(records, start=1):
+            writer.writerow(map(_to_primitive, record))
+            if rows % self.batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+
+def _to_primitive(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, types.LoginLog.DeviceType):
+        return value.value
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return str(value)
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import secrets
+from abc import ABC, abstractmethod
+from typing import ClassVar
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from auth.common.exceptions import ImproperlyConfiguredError
+
+
+class BasePasswordHasher(ABC):
+    """Base password hashing algorithm.
+
+    Hashers are picklable, so they can be used in the hashing process pool.
+    """
+
+    algorithm: ClassVar[str]
+
+    @abstractmethod
+    def encode(self, password: str) -> str:
+        """Hash password with the current parameters."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def verify(self, encoded: str, password: str) -> bool:
+        """Check password against the hash."""
+        raise NotImplementedError
+
+    def identify(self, encoded: str) -> bool:
+        """Check whether the hash was created by this algorithm."""
+        return encoded.startswith(f"{self.algorithm}:")
+
+    @abstractmethod
+    def needs_update(self, encoded: str) -> bool:
+        """Check whether the hash uses outdated parameters."""
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def params(self) -> dict:
+        """Cost parameters of the algorithm."""
+        raise NotImplementedError
+
+
+class PBKDF2PasswordHasher(BasePasswordHasher):
+    """PBKDF2-SHA256 hasher, compatible with werkzeug hashes (`pbkdf2:sha256:<iterations>$<salt>$<hash>`)."""
+
+    algorithm = "pbkdf2"
+
+    def __init__(self, iterations: int) -> None:
+        self.iterations = iterations
+
+    def encode(self, password: str) -> str:
+        return generate_password_hash(password, method=f"pbkdf2:sha256:{self.iterations}")
+
+    def verify(self, encoded: str, password: str) -> bool:
+        return check_password_hash(encoded, password)
+
+    def needs_update(self, encoded: str) -> bool:
+        method = encoded.split("$", 1)[0]
+        return method != f"pbkdf2:sha256:{self.iterations}"
+
+    @property
+    def params(self) -> dict:
+        return {"iterations": self.iterations}
+
+
+class ScryptPasswordHasher(BasePasswordHasher):
+    """Scrypt hasher, uses werkzeug hashes format (`scrypt:<cost>:<block_size>:<parallelism>$<salt>$<hash>`)."""
+
+    algorithm = "scrypt"
+    salt_length = 16
+
+    def __init__(self, cost: int, block_size: int, parallelism: int) -> None:
+        self.cost = cost
+        self.block_size = block_size
+        self.parallelism = parallelism
+
+    def encode(self, password: str) -> str:
+        salt = secrets.token_urlsafe(self.salt_length)[:self.salt_length]
+        hashval = self._hash(password, salt, self.cost, self.block_size, self.parallelism)
+        return f"{self._method}${salt}${hashval}"
+
+    def verify(self, encoded: str, password: str) -> bool:
+        try:
+            method, salt, hashval = encoded.split("$", 2)
+            _, cost, block_size, parallelism = method.split(":")
+            given_hashval = self._hash(password, salt, int(cost), int(block_size), int(parallelism))
+        except ValueError:
+            return False
+        return hmac.compare_digest(given_hashval, hashval)
+
+    def needs_update(self, encoded: str) -> bool:
+        return encoded.split("$", 1)[0] != self._method
+
+    @property
+    def params(self) -> dict:
+        return {"cost": self.cost, "block_size": self.block_size, "parallelism": self.parallelism}
+
+    @property
+    def _method(self) -> str:
+        return f"scrypt:{self.cost}:{self.block_size}:{self.parallelism}"
+
+    @staticmethod
+    def _hash(password: str, salt: str, cost: int, block_size: int, parallelism: int) -> str:
+        hashval = hashlib.scrypt(
+            password.encode(),
+            salt=salt.encode(),
+            n=cost,
+            r=block_size,
+            p=parallelism,
+            maxmem=132 * cost * block_size * parallelism,
+        )
+        return hashval.hex()
+
+
+class Argon2PasswordHasher(BasePasswordHasher):
+    """Argon2id hasher, uses PHC string format (`$argon2id$v=19$m=<memory>,t=<time>,p=<parallelism>$...`).
+
+    Requires `argon2-cffi` package.
+    """
+
+    algorithm = "argon2"
+
+    def __init__(self, time_cost: int, memory_cost: int, parallelism: int) -> None:
+        self.time_cost = time_cost
+        self.memory_cost = memory_cost
+        self.parallelism = parallelism
+
+        self._hasher = None
+
+    def __getstate__(self) -> dict:
+        return {"time_cost": self.time_cost, "memory_cost": self.memory_cost, "parallelism": self.parallelism}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    def encode(self, password: str) -> str:
+        return self.hasher.hash(password)
+
+    def verify(self, encoded: str, password: str) -> bool:
+        from argon2.exceptions import InvalidHash, VerificationError
+
+        try:
+            return self.hasher.verify(encoded, password)
+        except (VerificationError, InvalidHash):
+            return False
+
+    def identify(self, encoded: str) -> bool:
+        return encoded.startswith("$argon2")
+
+    def needs_update(self, encoded: str) -> bool:
+        return not encoded.startswith("$argon2id$") or self.hasher.check_needs_rehash(encoded)
+
+    @property
+    def params(self) -> dict:
+        return {"time_cost": self.time_cost, "memory_cost": self.memory_cost, "parallelism": self.parallelism}
+
+    @property
+    def hasher(self):
+        if self._hasher is None:
+            try:
+                import argon2
+            except ImportError:
+                raise ImproperlyConfiguredError("Install `argon2-cffi` to use argon2 password hasher")
+            self._hasher = argon2.PasswordHasher(
+                time_cost=self.time_cost,
+                memory_cost=self.memory_cost,
+                parallelism=self.parallelism,
+                type=argon2.Type.ID,
+            )
+        return self._hasher
+
+
+class HasherRegistry:
+    """Registry of password hashers.
+
+    New passwords are hashed with the default hasher, existing hashes are verified by the hasher that created them.
+    Hashes created by other hashers or with outdated parameters have to be updated.
+    """
+
+    def __init__(self, default: str, hashers: list[BasePasswordHasher]) -> None:
+        self.hashers = {hasher.algorithm: hasher for hasher in hashers}
+        if default not in self.hashers:
+            raise ImproperlyConfiguredError(f"Unknown password hasher <{default}>")
+        self.default = self.hashers[default]
+
+    def identify(self, encoded: str) -> BasePasswordHasher | None:
+        """Get hasher that created the given hash."""
+        for hasher in self.hashers.values():
+            if hasher.identify(encoded):
+                return hasher
+        return None
+
+    def needs_update(self, encoded: str) -> bool:
+        """Check whether the hash has to be recreated with the default hasher."""
+        hasher = self.identify(encoded)
+        return hasher is not self.default or hasher.needs_update(encoded)
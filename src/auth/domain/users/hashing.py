@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import TYPE_CHECKING, Callable, Iterator
+
+from auth.common.types import seconds
+from auth.metrics import metrics
+
+from .exceptions import PasswordHashingUnavailableError
+
+if TYPE_CHECKING:
+    from .hashers import HasherRegistry
+
+
+def init_password_hasher(
+    hashers: HasherRegistry, workers: int, queue_size: int, timeout: seconds,
+) -> Iterator[PasswordHasher]:
+    """Init password hashing executor."""
+    hasher = PasswordHasher(hashers=hashers, workers=workers, queue_size=queue_size, timeout=timeout)
+    yield hasher
+    hasher.shutdown()
+
+
+class PasswordHasher:
+    """Password hashing executor.
+
+    CPU-bound hashing runs in a dedicated process pool, so gevent workers keep serving other requests
+    while waiting for the result (waiting on a future is cooperative under monkey patching).
+    The number of pending hashing jobs is bounded, new jobs are rejected when the queue is full.
+    A job that has timed out can't be stopped in the pool process, so it keeps its slot until it completes.
+    With `workers=0` passwords are hashed in the calling process.
+
+    Attributes:
+        hashers: registry of password hashing algorithms.
+        workers: number of hashing processes.
+        queue_size: max number of jobs waiting for a free process.
+        timeout: max time to wait for the result.
+    """
+
+    def __init__(self, hashers: HasherRegistry, workers: int, queue_size: int, timeout: seconds) -> None:
+        self.hashers = hashers
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue_size)
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+        self._in_flight = metrics.gauge("password_hashing.in_flight")
+        self._latency = metrics.histogram("password_hashing.latency")
+        self._rejected = metrics.counter("password_hashing.rejected")
+        self._timeouts = metrics.counter("password_hashing.timeouts")
+
+    def hash_password(self, password: str) -> str:
+        """Hash password with the default hasher."""
+        return self._run(self.hashers.default.encode, password)
+
+    def verify_password(self, hashed_password: str, password: str) -> bool:
+        """Check password against the hash."""
+        hasher = self.hashers.identify(hashed_password)
+        if hasher is None:
+            return False
+        return self._run(hasher.verify, hashed_password, password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Check whether the password has to be rehashed with the default hasher and parameters."""
+        return self.hashers.needs_update(hashed_password)
+
+    def shutdown(self) -> None:
+        """Stop hashing processes."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+    def _run(self, func: Callable, *args):
+        started_at = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            self._rejected.inc()
+            raise PasswordHashingUnavailableError
+        self._in_flight.inc()
+        try:
+            if self.workers <= 0:
+                try:
+                    return func(*args)
+                finally:
+                    self._release_slot()
+            try:
+                future = self._get_pool().submit(func, *args)
+            except Exception:
+                self._release_slot()
+                raise
+            future.add_done_callback(self._release_slot)
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                self._timeouts.inc()
+                raise PasswordHashingUnavailableError
+        finally:
+            self._latency.observe(time.monotonic() - started_at)
+
+    def _release_slot(self, _future: Future | None = None) -> None:
+        self._in_flight.dec()
+        self._slots.release()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # pool is started lazily, so processes are not spawned by CLI commands and in the master process
+        if self._pool is not None:
+            return self._pool
+        with self._lock:
+            if self._pool is None:
+                # hashing processes don't need the gevent hub and app state of the parent worker
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
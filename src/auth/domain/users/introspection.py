@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, NamedTuple
+
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import PyJWTError
+
+from auth.metrics import metrics
+
+if TYPE_CHECKING:
+    from auth.infrastructure.db.cache import Cache
+    from auth.infrastructure.db.jwt_storage import JWTStorage
+    from auth.infrastructure.db.revocation import LocalRevocationCache
+
+    from .repositories import UserRepository
+
+INACTIVE = {"active": False}
+
+
+class IntrospectionResult(NamedTuple):
+    """Cached introspection of an active token."""
+
+    response: dict
+    # JTI and refresh token family ID
+    revocation_ids: list[str]
+    user_id: str
+    generation: int
+    user_version: int
+
+
+class TokenIntrospector:
+    """Introspection of user tokens (RFC 7662).
+
+    Token is active if its signature is valid, it hasn't expired, it's not revoked (by JTI, by its refresh token family
+    or by the user tokens generation) and the user is active.
+
+    Active results are cached in-process by the token hash until the token expires.
+    Cached results are checked against the local revocation cache on every hit and are dropped on `user` events
+    from the revocation feed, so revocations, deactivations and roles changes take effect immediately.
+    The cache is used only while the feed subscription is synced.
+    """
+
+    user_event_type = "user"
+
+    def __init__(
+        self,
+        jwt_storage: JWTStorage,
+        user_repository: UserRepository,
+        local_revocation_cache: LocalRevocationCache,
+        cache: Cache,
+    ) -> None:
+        self.jwt_storage = jwt_storage
+        self.user_repository = user_repository
+        self.local_revocation_cache = local_revocation_cache
+        self.cache = cache
+
+        # incremented on every user change, results cached with an older version are stale
+        self._user_versions: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+        self._hits = metrics.counter("introspection.cache_hits")
+        self._misses = metrics.counter("introspection.cache_misses")
+
+        self.local_revocation_cache.add_event_handler(self.user_event_type, self._handle_user_event)
+        self.local_revocation_cache.add_resync_handler(self._clear)
+
+    def introspect(self, token: str) -> dict:
+        """Get token state: `{"active": false}` or token claims with the current user roles."""
+        use_cache = self.local_revocation_cache.is_available()
+        key = hashlib.sha256(token.encode()).hexdigest()
+        if use_cache:
+            result = self.cache.get(key)
+            if result is not None and self._is_current(result):
+                self._hits.inc()
+                return result.response
+            self._misses.inc()
+        result = self._introspect(token)
+        if result is None:
+            return INACTIVE
+        if use_cache:
+            self.cache.set(key, result, timeout=result.response["exp"] - time.time())
+        return result.response
+
+    def introspect_many(self, tokens: list[str]) -> list[dict]:
+        """Get states of the given tokens, repeated tokens are introspected once."""
+        responses = {token: self.introspect(token) for token in dict.fromkeys(tokens)}
+        return [responses[token] for token in tokens]
+
+    def _introspect(self, token: str) -> IntrospectionResult | None:
+        try:
+            claims = decode_token(token)
+        except (PyJWTError, JWTExtendedException):
+            return None
+        user_id, jti, generation = claims["sub"], claims["jti"], claims.get("gen", 0)
+        revocation_ids = [jti, claims["fid"]] if "fid" in claims else [jti]
+        # version is taken before the user is loaded, so a concurrent change makes the result stale
+        user_version = self._user_versions.get(user_id, 0)
+        if self._is_revoked(revocation_ids, user_id, generation):
+            return None
+        user = self.user_repository.get_active_or_none(user_id)
+        if user is None:
+            return None
+        response = {
+            "active": True,
+            "sub": user_id,
+            "jti": jti,
+            "token_type": claims["type"],
+            "iat": claims["iat"],
+            "exp": claims["exp"],
+            "roles": [role.name for role in user.roles],
+        }
+        return IntrospectionResult(response, revocation_ids, user_id, generation, user_version)
+
+    def _is_current(self, result: IntrospectionResult) -> bool:
+        return (
+            self._user_versions.get(result.user_id, 0) == result.user_version and
+            not self._is_revoked(result.revocation_ids, result.user_id, result.generation)
+        )
+
+    def _is_revoked(self, revocation_ids: list[str], user_id: str, generation: int) -> bool:
+        return (
+            self.jwt_storage.is_any_revoked(revocation_ids) or
+            self.jwt_storage.is_generation_revoked(user_id, generation)
+        )
+
+    def _handle_user_event(self, event: dict) -> None:
+        with self._lock:
+            for user_id in event["user_ids"]:
+                self._user_versions[user_id] += 1
+
+    def _clear(self) -> None:
+        with self._lock:
+            self.cache.clear()
+            self._user_versions.clear()
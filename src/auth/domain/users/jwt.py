@@ -1,47 +1,157 @@
 from __future__ import annotations
 
+import datetime
+import logging
 import uuid
 from typing import TYPE_CHECKING
+from uuid import UUID
 
 from flask_jwt_extended import create_access_token, create_refresh_token
 
 from auth.core.config import get_settings
+from auth.infrastructure.db.token_families import RotationResult
+from auth.metrics import metrics
 
 from . import types
+from .exceptions import RefreshTokenReuseError, RefreshTokenRevokedError, SessionNotFoundError
 
 if TYPE_CHECKING:
     from auth.infrastructure.db.jwt_storage import JWTStorage
+    from auth.infrastructure.db.token_families import FamilyState, RefreshTokenFamilies
+
+    from .device_types import DeviceTypeClassifier
 
 settings = get_settings()
 
+logger = logging.getLogger(__name__)
+
 
 class JWTAuth:
-    """JWT authorization."""
+    """JWT authorization.
+
+    Tokens carry the user tokens generation (`gen` claim), so all user tokens can be revoked with a single write.
+
+    Every login starts a refresh token family (`fid` claim): refresh tokens are rotated, and reuse of a rotated token
+    revokes all tokens of the family - both the thief and the user have to log in again.
+    Active families are the user sessions, which can be listed and revoked one by one.
+    """
 
-    def __init__(self, jwt_storage: JWTStorage):
+    def __init__(
+        self,
+        jwt_storage: JWTStorage,
+        token_families: RefreshTokenFamilies,
+        device_type_classifier: DeviceTypeClassifier,
+    ):
         self.jwt_storage = jwt_storage
+        self.token_families = token_families
+        self.device_type_classifier = device_type_classifier
+
+        self._reuse_detected = metrics.counter("jwt.refresh_token_reuse")
+
+    def generate_tokens(
+        self, user: types.User, fresh: bool = True, login_event: types.LoginEvent | None = None,
+    ) -> types.JWTCredentials:
+        """Generate JWT - access and refresh tokens of a new family (session).
+
+        Device of the login is saved to the session.
+        """
+        family_id = str(uuid.uuid4())
+        refresh_token_jti = str(uuid.uuid4())
+        metadata = self._get_device_metadata(login_event) if login_event is not None else None
+        self.token_families.start(
+            str(user.id), family_id, refresh_token_jti, settings.JWT_REFRESH_TOKEN_EXPIRES, metadata=metadata,
+        )
+        generation = self.jwt_storage.get_user_generation(str(user.id))
+        return self._create_tokens(user, family_id, refresh_token_jti, generation, fresh=fresh)
+
+    def refresh_tokens(self, refresh_jwt: dict, user: types.User) -> types.JWTCredentials:
+        """Rotate the refresh token: renew credentials and make the presented refresh token invalid.
+
+        The previous access token stays valid until it expires.
+        """
+        family_id = refresh_jwt.get("fid")
+        if family_id is None:
+            # tokens issued before families were introduced
+            self.jwt_storage.invalidate_token(refresh_jwt["jti"], settings.JWT_REFRESH_TOKEN_EXPIRES)
+            return self.generate_tokens(user, fresh=False)
+        refresh_token_jti = str(uuid.uuid4())
+        result = self.token_families.rotate(
+            refresh_jwt["sub"], family_id, refresh_jwt["jti"], refresh_token_jti, settings.JWT_REFRESH_TOKEN_EXPIRES,
+        )
+        if result == RotationResult.REUSED:
+            # family is already dead in Redis, its access tokens are revoked through the revocation feed
+            self.jwt_storage.invalidate_token(family_id, settings.JWT_REFRESH_TOKEN_EXPIRES)
+            self._reuse_detected.inc()
+            logger.warning("Refresh token reuse detected, tokens family <%s> of the user <%s> is revoked",
+                           family_id, user.id)
+            raise RefreshTokenReuseError
+        if result != RotationResult.ROTATED:
+            raise RefreshTokenRevokedError
+        # refresh token has passed the generation check, new tokens are revoked together with it
+        return self._create_tokens(user, family_id, refresh_token_jti, refresh_jwt.get("gen", 0), fresh=False)
+
+    def revoke_tokens(self, access_jwt: dict) -> None:
+        """Revoke access and refresh tokens by the given jwt."""
+        self.jwt_storage.invalidate_tokens(access_jwt)
+        if "fid" in access_jwt:
+            self.token_families.revoke(access_jwt["sub"], access_jwt["fid"])
+
+    def revoke_user_tokens(self, user_id: UUID | str) -> None:
+        """Revoke all previously issued user tokens and end all user sessions."""
+        self.jwt_storage.invalidate_user_tokens(str(user_id))
+        self.token_families.revoke_all(str(user_id))
+
+    def get_sessions(self, user_id: UUID | str, current_session_id: str | None = None) -> list[types.Session]:
+        """Get active user sessions, the most recently used first."""
+        return [
+            self._to_session(family, current=family.family_id == current_session_id)
+            for family in self.token_families.get_active(str(user_id))
+        ]
+
+    def revoke_session(self, user_id: UUID | str, session_id: str) -> None:
+        """Revoke all tokens of the user session."""
+        if not self.token_families.revoke(str(user_id), session_id):
+            raise SessionNotFoundError
+        # family can't be refreshed anymore, its access tokens are revoked through the revocation feed
+        self.jwt_storage.invalidate_token(session_id, settings.JWT_REFRESH_TOKEN_EXPIRES)
 
     @staticmethod
-    def generate_tokens(user: types.User, fresh: bool = True) -> types.JWTCredentials:
-        """Generate JWT - access and refresh tokens."""
+    def _create_tokens(
+        user: types.User, family_id: str, refresh_token_jti: str, generation: int, fresh: bool,
+    ) -> types.JWTCredentials:
         user_identity = str(user.id)
-        refresh_token_jti = str(uuid.uuid4())
         roles_names = [role.name for role in user.roles]
         access_token = create_access_token(
             identity=user_identity,
             fresh=fresh,
-            additional_claims={"refresh_jti": refresh_token_jti, "roles": roles_names},
+            additional_claims={
+                "refresh_jti": refresh_token_jti, "fid": family_id, "roles": roles_names, "gen": generation,
+            },
+        )
+        refresh_token = create_refresh_token(
+            identity=user_identity,
+            additional_claims={"jti": refresh_token_jti, "fid": family_id, "gen": generation},
         )
-        refresh_token = create_refresh_token(identity=user_identity, additional_claims={"jti": refresh_token_jti})
         return types.JWTCredentials(access_token=access_token, refresh_token=refresh_token)
 
-    def refresh_tokens(self, refresh_token_jti: str, user: types.User) -> types.JWTCredentials:
-        """Renew credentials using a refresh token."""
-        # XXX: invalidate only the refresh token
-        # when requesting new credentials, we leave the previous access token valid
-        self.jwt_storage.invalidate_token(refresh_token_jti, settings.JWT_REFRESH_TOKEN_EXPIRES)
-        return self.generate_tokens(user, fresh=False)
+    def _get_device_metadata(self, login_event: types.LoginEvent) -> dict[str, str]:
+        metadata = {
+            "ip_addr": login_event.ip_addr,
+            "user_agent": login_event.user_agent,
+            "device_type": self.device_type_classifier.classify(login_event.user_agent).value,
+        }
+        return {name: value for name, value in metadata.items() if value is not None}
 
-    def revoke_tokens(self, access_jwt: dict) -> None:
-        """Revoke access and refresh tokens by the given jwt."""
-        self.jwt_storage.invalidate_tokens(access_jwt)
+    @staticmethod
+    def _to_session(family: FamilyState, current: bool) -> types.Session:
+        metadata = family.metadata
+        device_type = metadata.get("device_type")
+        return types.Session(
+            id=family.family_id,
+            created_at=datetime.datetime.utcfromtimestamp(int(metadata["created_at"])),
+            expires_at=datetime.datetime.utcfromtimestamp(family.expires_at),
+            ip_addr=metadata.get("ip_addr"),
+            user_agent=metadata.get("user_agent"),
+            device_type=types.LoginLog.DeviceType(device_type) if device_type is not None else None,
+            current=current,
+        )
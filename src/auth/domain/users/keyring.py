@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import base64
+import dataclasses
+import datetime
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, Union
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+
+from auth.common.types import seconds
+
+if TYPE_CHECKING:
+    from .repositories import SigningKeyRepository
+
+logger = logging.getLogger(__name__)
+
+PrivateKey = Union[rsa.RSAPrivateKey, ed25519.Ed25519PrivateKey]
+PublicKey = Union[rsa.RSAPublicKey, ed25519.Ed25519PublicKey]
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "EdDSA")
+
+RSA_KEY_SIZE = 2048
+
+# members of the public JWK used in the thumbprint, RFC 7638
+_THUMBPRINT_MEMBERS = {"RSA": ("e", "kty", "n"), "OKP": ("crv", "kty", "x")}
+
+
+def init_key_ring(
+    algorithm: str,
+    private_keys: list[str],
+    signing_key_repository: SigningKeyRepository,
+    refresh_interval: seconds,
+) -> Iterator[KeyRing]:
+    """Init key ring.
+
+    Keys are loaded from the given PEM files, otherwise from the database, where they are rotated by `KeyRotation`.
+    Key ring is empty for HS256: tokens are signed with `JWT_SECRET_KEY`.
+    """
+    if algorithm not in ASYMMETRIC_ALGORITHMS:
+        yield KeyRing([])
+    elif private_keys:
+        keys = [SigningKey.from_pem(Path(path).read_bytes(), algorithm) for path in private_keys]
+        yield KeyRing(keys, algorithm=algorithm)
+    else:
+        yield KeyRing(
+            [], algorithm=algorithm, loader=signing_key_repository.get_unexpired, refresh_interval=refresh_interval,
+        )
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    """Asymmetric key pair used to sign tokens.
+
+    `kid` is the RFC 7638 thumbprint of the public key.
+    Key signs tokens from `activates_at` until the next key is activated and verifies them until `expires_at`.
+    """
+
+    kid: str
+    algorithm: str
+    private_key: PrivateKey
+    activates_at: datetime.datetime | None = None
+    expires_at: datetime.datetime | None = None
+
+    @property
+    def public_key(self) -> PublicKey:
+        return self.private_key.public_key()
+
+    def is_activated(self, now: datetime.datetime) -> bool:
+        return self.activates_at is None or self.activates_at <= now
+
+    def is_expired(self, now: datetime.datetime) -> bool:
+        return self.expires_at is not None and self.expires_at <= now
+
+    @classmethod
+    def from_private_key(cls, private_key: PrivateKey, algorithm: str) -> SigningKey:
+        expected_type = {"RS256": rsa.RSAPrivateKey, "EdDSA": ed25519.Ed25519PrivateKey}.get(algorithm)
+        if expected_type is None:
+            raise ValueError(f"Unsupported signing algorithm <{algorithm}>")
+        if not isinstance(private_key, expected_type):
+            raise ValueError(f"Key type doesn't match the {algorithm} algorithm")
+        return cls(kid=_thumbprint(_to_jwk(private_key.public_key())), algorithm=algorithm, private_key=private_key)
+
+    @classmethod
+    def from_pem(cls, pem: bytes, algorithm: str, password: bytes | None = None) -> SigningKey:
+        """Load PEM private key."""
+        return cls.from_private_key(serialization.load_pem_private_key(pem, password=password), algorithm)
+
+    @classmethod
+    def generate(cls, algorithm: str) -> SigningKey:
+        """Generate a new key pair."""
+        if algorithm == "RS256":
+            private_key = rsa.generate_private_key(public_exponent=65537, key_size=RSA_KEY_SIZE)
+        else:
+            private_key = ed25519.Ed25519PrivateKey.generate()
+        return cls.from_private_key(private_key, algorithm)
+
+    def to_pem(self, password: bytes | None = None) -> bytes:
+        if password:
+            encryption_algorithm = serialization.BestAvailableEncryption(password)
+        else:
+            encryption_algorithm = serialization.NoEncryption()
+        return self.private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=encryption_algorithm,
+        )
+
+    def to_jwk(self) -> dict:
+        """Get public JWK."""
+        return {**_to_jwk(self.public_key), "kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+
+class KeyRing:
+    """Keys that sign and verify user tokens.
+
+    The latest activated key signs new tokens (the first one if keys have no activation time), all unexpired keys
+    verify tokens and are published in JWKS, so a new key is published before it's used and an old key keeps
+    verifying tokens issued before the rotation. Without keys tokens are signed with `JWT_SECRET_KEY`.
+
+    Keys of the configured `algorithm` are preferred for signing. After the algorithm is changed, the key of the
+    previous algorithm keeps signing until the first key of the new one is activated, tokens are signed with the
+    algorithm of the key.
+
+    With a `loader` keys are reloaded every `refresh_interval` seconds, so rotated keys are picked up without a restart.
+    """
+
+    def __init__(
+        self,
+        keys: list[SigningKey], *,
+        algorithm: str | None = None,
+        loader: Callable[[], list[SigningKey]] | None = None,
+        refresh_interval: seconds = 60,
+    ) -> None:
+        self.algorithm = algorithm
+        self.loader = loader
+        self.refresh_interval = refresh_interval
+
+        self._keys: dict[str, SigningKey] = {key.kid: key for key in keys}
+        self._refreshed_at: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def active_key(self) -> SigningKey | None:
+        now = datetime.datetime.utcnow()
+        activated_keys = [key for key in self._get_keys() if key.is_activated(now) and not key.is_expired(now)]
+        preferred_keys = [key for key in activated_keys if key.algorithm == self.algorithm]
+        return max(
+            preferred_keys or activated_keys, key=lambda key: key.activates_at or datetime.datetime.min, default=None,
+        )
+
+    def get_key(self, kid: str) -> SigningKey | None:
+        """Get verification key by the `kid`."""
+        self._refresh_if_stale()
+        key = self._keys.get(kid)
+        if key is None or key.is_expired(datetime.datetime.utcnow()):
+            return None
+        return key
+
+    def jwks(self) -> dict:
+        """Get public keys as JWK Set."""
+        now = datetime.datetime.utcnow()
+        return {"keys": [key.to_jwk() for key in self._get_keys() if not key.is_expired(now)]}
+
+    def refresh(self) -> None:
+        """Reload keys."""
+        keys = self.loader()
+        self._keys = {key.kid: key for key in keys}
+        self._refreshed_at = time.monotonic()
+
+    def _get_keys(self) -> list[SigningKey]:
+        self._refresh_if_stale()
+        return list(self._keys.values())
+
+    def _refresh_if_stale(self) -> None:
+        if self.loader is None or not self._is_stale():
+            return
+        # keys are refreshed by a single thread, the others keep using the current keys
+        if not self._lock.acquire(blocking=self._refreshed_at is None):
+            return
+        try:
+            if self._is_stale():
+                self.refresh()
+        except Exception:
+            if self._refreshed_at is None:
+                raise
+            logger.exception("Failed to refresh signing keys")
+        finally:
+            self._lock.release()
+
+    def _is_stale(self) -> bool:
+        return self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.refresh_interval
+
+
+class KeyRotation:
+    """Scheduled rotation of the signing keys stored in the database.
+
+    A new key is created `publish_lead` before its activation, so it reaches JWKS caches of consumers and key rings
+    of all processes before tokens are signed with it. The replaced key verifies tokens for `verify_period` after that.
+
+    Attributes:
+        algorithm: algorithm of the new keys.
+        rotation_interval: period of signing with a key.
+        publish_lead: seconds between creation and activation of a key.
+        verify_period: time a replaced key still verifies tokens.
+    """
+
+    def __init__(
+        self,
+        signing_key_repository: SigningKeyRepository,
+        *,
+        algorithm: str,
+        rotation_interval: datetime.timedelta,
+        publish_lead: seconds,
+        verify_period: datetime.timedelta,
+    ) -> None:
+        self.signing_key_repository = signing_key_repository
+        self.algorithm = algorithm
+        self.rotation_interval = rotation_interval
+        self.publish_lead = datetime.timedelta(seconds=publish_lead)
+        self.verify_period = verify_period
+
+    def rotate(self, now: datetime.datetime | None = None, force: bool = False) -> SigningKey | None:
+        """Schedule the next key if the active key is due for rotation.
+
+        Without keys the first key is activated immediately.
+        With `force` the next key is scheduled regardless of the rotation interval.
+        """
+        now = now or datetime.datetime.utcnow()
+        with self.signing_key_repository.rotation_lock():
+            keys = self.signing_key_repository.get_unexpired(now)
+            if any(not key.is_activated(now) for key in keys):
+                return None
+            active_key = max(keys, key=lambda key: key.activates_at, default=None)
+            if active_key is None:
+                activates_at = now
+            elif force or active_key.algorithm != self.algorithm:
+                activates_at = now + self.publish_lead
+            elif active_key.activates_at + self.rotation_interval - self.publish_lead <= now:
+                activates_at = max(now + self.publish_lead, active_key.activates_at + self.rotation_interval)
+            else:
+                return None
+            new_key = dataclasses.replace(SigningKey.generate(self.algorithm), activates_at=activates_at)
+            self.signing_key_repository.add(new_key)
+            if active_key is not None:
+                self.signing_key_repository.set_expiration(active_key.kid, activates_at + self.verify_period)
+        logger.info("Scheduled signing key <%s> activation at %s", new_key.kid, activates_at)
+        return new_key
+
+    def remove_expired(self, now: datetime.datetime | None = None) -> int:
+        """Delete expired keys."""
+        return self.signing_key_repository.delete_expired(now or datetime.datetime.utcnow())
+
+
+def _to_jwk(public_key: PublicKey) -> dict:
+    algorithm = RSAAlgorithm if isinstance(public_key, rsa.RSAPublicKey) else OKPAlgorithm
+    jwk = json.loads(algorithm.to_jwk(public_key))
+    # `use` is published instead
+    jwk.pop("key_ops", None)
+    return jwk
+
+
+def _thumbprint(jwk: dict) -> str:
+    members = {name: jwk[name] for name in _THUMBPRINT_MEMBERS[jwk["kty"]]}
+    digest = hashlib.sha256(json.dumps(members, separators=(",", ":"), sort_keys=True).encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
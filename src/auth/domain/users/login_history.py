@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Iterator
+
+from flask import current_app
+
+from auth.common.types import seconds
+from auth.metrics import metrics
+
+if TYPE_CHECKING:
+    from flask import Flask
+
+    from . import types
+    from .repositories import LoginLogRepository
+
+logger = logging.getLogger(__name__)
+
+
+def init_login_log_writer(
+    login_log_repository: LoginLogRepository,
+    enabled: bool,
+    buffer_size: int,
+    batch_size: int,
+    flush_interval: seconds,
+) -> Iterator[LoginLogWriter]:
+    """Init login log writer."""
+    writer = LoginLogWriter(
+        login_log_repository,
+        enabled=enabled,
+        buffer_size=buffer_size,
+        batch_size=batch_size,
+        flush_interval=flush_interval,
+    )
+    yield writer
+    writer.close()
+
+
+class LoginLogWriter:
+    """Asynchronous batched writer of login log records.
+
+    Login events are put to a bounded in-process buffer and inserted by a background thread with multi-row INSERTs,
+    when `batch_size` events are collected or `flush_interval` elapses.
+    If the writer is disabled or the buffer is full, the event is written synchronously.
+
+    Attributes:
+        enabled: whether events are written in background.
+        buffer_size: max number of events waiting to be written.
+        batch_size: max number of events written with a single INSERT.
+        flush_interval: max time an event waits in the buffer.
+    """
+
+    def __init__(
+        self,
+        login_log_repository: LoginLogRepository,
+        *,
+        enabled: bool,
+        buffer_size: int,
+        batch_size: int,
+        flush_interval: seconds,
+    ) -> None:
+        self.login_log_repository = login_log_repository
+        self.enabled = enabled
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._buffer: queue.Queue[types.LoginEvent] = queue.Queue(maxsize=buffer_size)
+        self._app: Flask | None = None
+        self._writer: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+        metrics.gauge("login_log.buffered", self._buffer.qsize)
+        self._written = metrics.counter("login_log.written")
+        self._sync_writes = metrics.counter("login_log.sync_writes")
+        self._failed = metrics.counter("login_log.failed")
+        self._flush_latency = metrics.histogram("login_log.flush_latency")
+
+    def add(self, login_event: types.LoginEvent) -> None:
+        """Save login event."""
+        if not self.enabled or self._stopped.is_set():
+            self._write_sync(login_event)
+            return
+        self._start()
+        try:
+            self._buffer.put_nowait(login_event)
+        except queue.Full:
+            self._write_sync(login_event)
+
+    def close(self) -> None:
+        """Write buffered events and stop the writer."""
+        self._stopped.set()
+        if self._writer is not None:
+            self._writer.join(timeout=max(self.flush_interval, 1) * 5)
+
+    def _start(self) -> None:
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._app = current_app._get_current_object()
+            self._writer = threading.Thread(target=self._run, name="login-log-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
+    def _run(self) -> None:
+        with self._app.app_context():
+            try:
+                self.login_log_repository.warm_up_device_types()
+            except Exception:
+                logger.exception("Failed to warm up devices classification")
+        while not (self._stopped.is_set() and self._buffer.empty()):
+            batch = self._collect_batch()
+            if batch:
+                with self._app.app_context():
+                    self._write(batch)
+
+    def _collect_batch(self) -> list[types.LoginEvent]:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._buffer.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_sync(self, login_event: types.LoginEvent) -> None:
+        self._sync_writes.inc()
+        self._write([login_event])
+
+    def _write(self, batch: list[types.LoginEvent]) -> None:
+        started_at = time.monotonic()
+        try:
+            self.login_log_repository.create_log_records(batch)
+        except Exception:
+            self._failed.inc(len(batch))
+            logger.exception("Failed to write %d login log records", len(batch))
+            return
+        self._written.inc(len(batch))
+        self._flush_latency.observe(time.monotonic() - started_at)
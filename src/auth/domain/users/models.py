@@ -58,10 +58,17 @@ class User(TimeStampedMixin, UUIDMixin, db.Model, UserMixin):
 
 
 def create_loginlog_partitions(ddl, target, connection: Connection, **kwargs) -> None:
-    """Create `LoginLog` partitions."""
-    connection.execute("""CREATE TABLE IF NOT EXISTS loginlog_mobile PARTITION OF loginlog FOR VALUES IN ('MOBILE')""")
-    connection.execute("""CREATE TABLE IF NOT EXISTS loginlog_tablet PARTITION OF loginlog FOR VALUES IN ('TABLET')""")
-    connection.execute("""CREATE TABLE IF NOT EXISTS loginlog_pc PARTITION OF loginlog FOR VALUES IN ('PC')""")
+    """Create `LoginLog` partitions.
+
+    Device partitions are sub-partitioned by month, monthly partitions are managed by `LoginLogPartitionManager`.
+    """
+    for device_type in types.LoginLog.DeviceType:
+        partition = f"loginlog_{device_type.name.lower()}"
+        connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {partition} PARTITION OF loginlog FOR VALUES IN ('{device_type.name}')
+            PARTITION BY RANGE (created_at)
+        """)
+        connection.execute(f"""CREATE TABLE IF NOT EXISTS {partition}_default PARTITION OF {partition} DEFAULT""")
 
 
 class LoginLog(TimeStampedMixin, db.Model):
@@ -80,10 +87,14 @@ class LoginLog(TimeStampedMixin, db.Model):
     ip_addr = db.Column(db.String(255))
     device_type = db.Column(
         ENUM(types.LoginLog.DeviceType, name="device_type", create_constraint=True), primary_key=True)
+    # partition keys have to be a part of the primary key
+    created_at = db.Column(
+        db.TIMESTAMP(timezone=False), primary_key=True, nullable=False, default=TimeStampedMixin.__datetime_func__)
 
     __table_args__ = (
-        db.PrimaryKeyConstraint("id", "device_type"),
-        db.UniqueConstraint("id", "device_type"),
+        db.PrimaryKeyConstraint("id", "device_type", "created_at"),
+        # keyset pagination of the user login history
+        db.Index("loginlog_user_id_created_at_id_idx", "user_id", "created_at", "id"),
         {
             "postgresql_partition_by": "LIST (device_type)",
             "listeners": [("after_create", create_loginlog_partitions)],
@@ -112,3 +123,15 @@ class LoginLog(TimeStampedMixin, db.Model):
         if user is None:
             data["user"] = self.user.to_dto()
         return data
+
+
+class JWTSigningKey(TimeStampedMixin, db.Model):
+    """Key pair for signing user tokens."""
+
+    __tablename__ = "jwt_signing_key"
+
+    kid = db.Column(db.String(64), primary_key=True)
+    algorithm = db.Column(db.String(16), nullable=False)
+    private_key = db.Column(db.Text, nullable=False)  # PEM encrypted with `SECRET_KEY`
+    activates_at = db.Column(db.TIMESTAMP, nullable=False)
+    expires_at = db.Column(db.TIMESTAMP, nullable=True)
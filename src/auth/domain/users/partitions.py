@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import datetime
+import logging
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from sqlalchemy import text
+
+from auth.infrastructure.db.postgres import db, disable_statement_timeout
+
+from . import types
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+_UPPER_BOUND_RE = re.compile(r"TO \('(?P<upper>[^']+)'\)")
+
+
+@dataclass(frozen=True)
+class MonthPartition:
+    """Monthly partition of the device login history."""
+
+    device_partition: str
+    month: datetime.date
+
+    @property
+    def name(self) -> str:
+        return f"{self.device_partition}_{self.month:%Y_%m}"
+
+    @property
+    def start(self) -> datetime.date:
+        return self.month
+
+    @property
+    def end(self) -> datetime.date:
+        return add_months(self.month, 1)
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    """Get the first day of the month shifted by the given number of months."""
+    month_index = month.year * 12 + month.month - 1 + months
+    return datetime.date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def device_partition_name(device_type: types.LoginLog.DeviceType) -> str:
+    """Get name of the login history partition for the device type."""
+    return f"loginlog_{device_type.name.lower()}"
+
+
+class LoginLogPartitionManager:
+    """Management of the monthly login history partitions.
+
+    `loginlog` is partitioned by the device type, every device partition is sub-partitioned by month on `created_at`:
+    `loginlog_<device>_<YYYY>_<MM>`. Records outside of the created ranges go to the `loginlog_<device>_default`
+    partition.
+
+    Attributes:
+        months_ahead: number of future months to create partitions for.
+        retention_months: number of past months to keep, older partitions are detached (0 - keep forever).
+    """
+
+    def __init__(self, months_ahead: int, retention_months: int) -> None:
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+
+    def ensure_partitions(self, today: datetime.date | None = None) -> list[str]:
+        """Create partitions for the current month and `months_ahead` next months."""
+        current_month = (today or datetime.date.today()).replace(day=1)
+        created = []
+        for device_type in types.LoginLog.DeviceType:
+            for months in range(self.months_ahead + 1):
+                partition = MonthPartition(device_partition_name(device_type), add_months(current_month, months))
+                with db.engine.begin() as connection:
+                    if self._exists(connection, partition.name):
+                        continue
+                    # records of the month are moved from the default partition without the request timeout
+                    disable_statement_timeout(connection)
+                    self._create_partition(connection, partition)
+                created.append(partition.name)
+                logger.info("Created login history partition <%s>", partition.name)
+        return created
+
+    def remove_expired(self, today: datetime.date | None = None, drop: bool = False) -> list[str]:
+        """Detach partitions that contain only records older than the retention period.
+
+        Detached partitions are left as standalone tables to be archived, they are dropped only if `drop` is set.
+        """
+        if self.retention_months <= 0:
+            return []
+        cutoff_month = add_months((today or datetime.date.today()).replace(day=1), -self.retention_months)
+        cutoff = datetime.datetime.combine(cutoff_month, datetime.time())
+        removed = []
+        for device_type in types.LoginLog.DeviceType:
+            device_partition = device_partition_name(device_type)
+            with db.engine.begin() as connection:
+                expired = [
+                    name
+                    for name, upper_bound in self._get_range_partitions(connection, device_partition)
+                    if upper_bound <= cutoff
+                ]
+                if expired:
+                    disable_statement_timeout(connection)
+                for name in expired:
+                    connection.execute(text(f"ALTER TABLE {device_partition} DETACH PARTITION {name}"))
+                    if drop:
+                        connection.execute(text(f"DROP TABLE {name}"))
+                    logger.info("%s login history partition <%s>", "Dropped" if drop else "Detached", name)
+            removed.extend(expired)
+        return removed
+
+    @staticmethod
+    def _exists(connection: Connection, name: str) -> bool:
+        return connection.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+
+    @staticmethod
+    def _create_partition(connection: Connection, partition: MonthPartition) -> None:
+        # records of the month could have been written to the default partition already: they have to be moved,
+        # otherwise the new partition can't be attached
+        device_partition = partition.device_partition
+        default_partition = f"{device_partition}_default"
+        bounds = f"FOR VALUES FROM ('{partition.start}') TO ('{partition.end}')"
+        in_range = f"created_at >= '{partition.start}' AND created_at < '{partition.end}'"
+        has_default_records = connection.execute(
+            text(f"SELECT EXISTS (SELECT 1 FROM {default_partition} WHERE {in_range})")).scalar()
+        if not has_default_records:
+            connection.execute(text(f"CREATE TABLE {partition.name} PARTITION OF {device_partition} {bounds}"))
+            return
+        connection.execute(text(f"ALTER TABLE {device_partition} DETACH PARTITION {default_partition}"))
+        connection.execute(text(f"CREATE TABLE {partition.name} PARTITION OF {device_partition} {bounds}"))
+        connection.execute(text(f"""
+            WITH moved AS (DELETE FROM {default_partition} WHERE {in_range} RETURNING *)
+            INSERT INTO {partition.name} SELECT * FROM moved
+        """))
+        connection.execute(text(f"ALTER TABLE {device_partition} ATTACH PARTITION {default_partition} DEFAULT"))
+
+    @staticmethod
+    def _get_range_partitions(connection: Connection, device_partition: str) -> list[tuple[str, datetime.datetime]]:
+        partitions = connection.execute(text("""
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = CAST(:device_partition AS regclass)
+        """), {"device_partition": device_partition})
+        range_partitions = []
+        for name, bounds in partitions:
+            match = _UPPER_BOUND_RE.search(bounds)
+            if match is None:
+                # default partition or an unbounded range
+                continue
+            upper_bound = datetime.datetime.fromisoformat(match.group("upper"))
+            range_partitions.append((name, upper_bound))
+        return range_partitions
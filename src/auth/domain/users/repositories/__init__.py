@@ -1,7 +1,11 @@
+from .cached_user_repository import CachedUserRepository
 from .login_log_repository import LoginLogRepository
+from .signing_key_repository import SigningKeyRepository
 from .user_repository import UserRepository
 
 __all__ = [
     "UserRepository",
+    "CachedUserRepository",
     "LoginLogRepository",
+    "SigningKeyRepository",
 ]
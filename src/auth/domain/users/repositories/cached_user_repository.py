@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import defaultdict
+from typing import TYPE_CHECKING
+from uuid import UUID
+
+from auth.common.exceptions import NotFoundError
+from auth.common.types import seconds
+
+from .. import types
+from .user_repository import UserRepository
+
+if TYPE_CHECKING:
+    from auth.domain.roles.repositories import RoleRepository
+    from auth.infrastructure.db.cache import Cache
+    from auth.infrastructure.db.revocation import LocalRevocationCache, RevocationFeed
+
+    from ..hashing import PasswordHasher
+
+
+class CachedUserRepository(UserRepository):
+    """Users repository with a read-through cache.
+
+    Active users are cached in Redis and in a small process-local LRU.
+    Entries are invalidated on every user change made through the repository, other processes drop their
+    local entries on the `user` event from the revocation feed.
+    The local LRU is used only while the feed subscription is synced, otherwise users are read from Redis.
+    Roles renamed or deleted via `RoleRepository` are refreshed after the cache ttl.
+
+    Password hashes aren't cached, they are read from the database only to verify passwords.
+
+    Every invalidation increments the user version, and a user loaded on a cache miss is written back only if
+    the version is still the one read before loading, so a concurrent change is never overwritten with the old row.
+    """
+
+    event_type = "user"
+
+    # user and version keys share the hash tag, so they are stored on the same Redis shard
+    user_key_prefix = "users:id:"
+    version_key_prefix = "users:version:"
+    email_key_prefix = "users:email:"
+
+    def __init__(
+        self,
+        role_repository: RoleRepository,
+        password_hasher: PasswordHasher,
+        cache: Cache,
+        local_cache: Cache,
+        revocation_feed: RevocationFeed,
+        local_revocation_cache: LocalRevocationCache,
+        ttl: seconds,
+        local_ttl: seconds,
+    ):
+        super().__init__(role_repository, password_hasher)
+        self.cache = cache
+        self.local_cache = local_cache
+        self.revocation_feed = revocation_feed
+        self.local_revocation_cache = local_revocation_cache
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+
+        # local counterpart of the Redis versions, incremented on the `user` events,
+        # the epoch is incremented on resyncs, when the versions are dropped
+        self._local_versions: dict[str, int] = defaultdict(int)
+        self._local_epoch = 0
+        self._lock = threading.Lock()
+
+        self.local_revocation_cache.add_event_handler(self.event_type, self._handle_event)
+        self.local_revocation_cache.add_resync_handler(self._clear_local_cache)
+
+    def get_active_or_none(self, user_id: UUID | str) -> types.User | None:
+        user, version = self._get_cached(user_id)
+        if user is not None:
+            return user
+        user = super().get_active_or_none(user_id)
+        if user is not None:
+            self._set_cached(user, version)
+        return user
+
+    def get_active_by_email(self, email: str) -> types.User:
+        user_id = self.cache.get(self._get_email_key(email))
+        if user_id is not None:
+            user = self.get_active_or_none(user_id)
+            if user is None:
+                raise NotFoundError
+            return user
+        user = super().get_active_by_email(email)
+        # the user version can't be read before the user is found, so only the email is cached,
+        # and the user is cached by the next read by ID
+        self.cache.set(self._get_email_key(email), str(user.id), timeout=self.ttl)
+        return user
+
+    def add_roles(self, user: types.User, roles_names: list[str]) -> types.User:
+        user = super().add_roles(user, roles_names)
+        self.invalidate(user.id)
+        return user
+
+    def grant_roles(self, user_ids: list[UUID], role_ids: list[UUID]) -> int:
+        granted = super().grant_roles(user_ids, role_ids)
+        if granted:
+            self.invalidate_many(user_ids)
+        return granted
+
+    def assign_role(self, user_id: UUID, role_id: UUID) -> None:
+        super().assign_role(user_id, role_id)
+        self.invalidate(user_id)
+
+    def revoke_role(self, user_id: UUID, role_id: UUID) -> None:
+        super().revoke_role(user_id, role_id)
+        self.invalidate(user_id)
+
+    def create(self, email: str, password: str) -> types.User:
+        user = super().create(email, password)
+        self.invalidate(user.id, email=email)
+        return user
+
+    def change_password(self, user: types.User, password: str) -> types.User:
+        user = super().change_password(user, password)
+        self.invalidate(user.id)
+        return user
+
+    def rehash_password(self, user_id: UUID, hashed_password: str, password: str) -> bool:
+        updated = super().rehash_password(user_id, hashed_password, password)
+        if updated:
+            self.invalidate(user_id)
+        return updated
+
+    def deactivate(self, user_id: UUID) -> None:
+        super().deactivate(user_id)
+        self.invalidate(user_id)
+
+    def invalidate(self, user_id: UUID | str, *, email: str | None = None) -> None:
+        """Remove user from cache."""
+        emails = [email] if email is not None else []
+        self.invalidate_many([user_id], emails=emails)
+
+    def invalidate_many(self, user_ids: list[UUID | str], *, emails: list[str] | None = None) -> None:
+        """Remove users from cache.
+
+        Versions are incremented before the keys are deleted, so readers that loaded users before the change
+        can't write them back.
+        """
+        keys = [self._get_user_key(user_id) for user_id in user_ids]
+        self._bump_local_versions(user_ids)
+        self.local_cache.delete_many(keys)
+        # versions outlive cached users, so a reader can't miss an increment
+        self.cache.incr_many([self._get_version_key(user_id) for user_id in user_ids], timeout=2 * self.ttl)
+        self.cache.delete_many(keys + [self._get_email_key(email) for email in emails or []])
+        self.revocation_feed.publish_event(self.event_type, user_ids=[str(user_id) for user_id in user_ids])
+
+    def _get_cached(self, user_id: UUID | str) -> tuple[types.User | None, str | None]:
+        """Get cached user, or the user version for writing the user back after a cache miss."""
+        key = self._get_user_key(user_id)
+        use_local_cache = self.local_revocation_cache.is_available()
+        data = self.local_cache.get(key) if use_local_cache else None
+        if data is not None:
+            return self._deserialize(data), None
+        local_version = self._get_local_version(str(user_id))
+        data, version = self.cache.get_many([key, self._get_version_key(user_id)])
+        if data is None:
+            return None, version
+        if use_local_cache:
+            self._set_local(str(user_id), data, local_version)
+        return self._deserialize(data), version
+
+    def _set_cached(self, user: types.User, version: str | None) -> None:
+        local_version = self._get_local_version(str(user.id))
+        data = self._serialize(user)
+        is_saved = self.cache.set_if_unchanged(
+            self._get_user_key(user.id),
+            data,
+            guard_key=self._get_version_key(user.id),
+            guard_value=version,
+            timeout=self.ttl,
+        )
+        if not is_saved:
+            return
+        self.cache.set(self._get_email_key(user.email), str(user.id), timeout=self.ttl)
+        if self.local_revocation_cache.is_available():
+            self._set_local(str(user.id), data, local_version)
+
+    def _get_local_version(self, user_id: str) -> tuple[int, int]:
+        return self._local_epoch, self._local_versions.get(user_id, 0)
+
+    def _set_local(self, user_id: str, data: str, local_version: tuple[int, int]) -> None:
+        # the user event could have arrived after the data was read
+        with self._lock:
+            if self._get_local_version(user_id) == local_version:
+                self.local_cache.set(self._get_user_key(user_id), data, timeout=self.local_ttl)
+
+    def _handle_event(self, event: dict) -> None:
+        self._bump_local_versions(event["user_ids"])
+        self.local_cache.delete_many([self._get_user_key(user_id) for user_id in event["user_ids"]])
+
+    def _bump_local_versions(self, user_ids: list[UUID | str]) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                self._local_versions[str(user_id)] += 1
+
+    def _clear_local_cache(self) -> None:
+        with self._lock:
+            self.local_cache.clear()
+            self._local_versions.clear()
+            self._local_epoch += 1
+
+    @staticmethod
+    def _serialize(user: types.User) -> str:
+        dct = user.to_dict()
+        del dct["password"]
+        return json.dumps(dct, separators=(",", ":"))
+
+    @staticmethod
+    def _deserialize(data: str) -> types.User:
+        dct = json.loads(data)
+        dct["id"] = UUID(dct["id"])
+        # entries cached before hashes were excluded
+        dct.pop("password", None)
+        return types.User.from_dict(dct)
+
+    def _get_user_key(self, user_id: UUID | str) -> str:
+        return f"{self.user_key_prefix}{{{user_id}}}"
+
+    def _get_version_key(self, user_id: UUID | str) -> str:
+        return f"{self.version_key_prefix}{{{user_id}}}"
+
+    def _get_email_key(self, email: str) -> str:
+        return f"{self.email_key_prefix}{email}"
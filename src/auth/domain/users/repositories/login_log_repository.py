@@ -1,40 +1,116 @@
-from user_agents import parse
+from __future__ import annotations
 
-from auth.common.types import PageNumberPagination
-from auth.infrastructure.db.postgres import db_session
+import datetime
+import uuid
+from typing import TYPE_CHECKING, Iterator
+
+from sqlalchemy import func, insert, select, tuple_
+
+from auth.common.pagination import decode_cursor, encode_cursor
+from auth.common.types import CursorPagination, Page
+from auth.infrastructure.db.postgres import db, db_session
 
 from .. import types
 from ..models import LoginLog
 
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Row
+
+    from ..device_types import DeviceTypeClassifier
+
 
 class LoginLogRepository:
     """Login log records repository."""
 
+    # period of the login history used for warming up devices classification
+    warm_up_period = datetime.timedelta(days=30)
+
+    def __init__(self, device_type_classifier: DeviceTypeClassifier):
+        self.device_type_classifier = device_type_classifier
+
     @staticmethod
-    def get_user_login_history(
-        user: types.User, pagination: PageNumberPagination | None = None,
-    ) -> list[types.LoginLog]:
-        """Get paginated user login log records."""
+    def get_user_login_history(user: types.User, pagination: CursorPagination) -> Page[types.LoginLog]:
+        """Get a page of user login log records, the most recent first.
+
+        Records are paginated by the (created_at, id) key, so every page is read with the index range scan.
+        """
         login_logs = LoginLog.query.filter_by(user_id=user.id)
-        if pagination is None:
-            return [login_log.to_dto(user=user) for login_log in login_logs]
-        login_logs = login_logs.paginate(pagination.page, pagination.per_page, error_out=False)
-        return [login_log.to_dto(user=user) for login_log in login_logs.items]
-
-    def create_log_record(self, user: types.User, ip_addr: str, user_agent: str) -> types.LoginLog:
-        """Create new login log record."""
-        device_type = self._get_device_type_from_user_agent(user_agent)
-        login_log = LoginLog(user_id=user.id, user_agent=user_agent, ip_addr=ip_addr, device_type=device_type)
-        with db_session() as session:
-            session.add(login_log)
-        return login_log.to_dto(user=user)
+        count = login_logs.order_by(None).count() if pagination.with_count else None
+        if pagination.cursor is not None:
+            created_at, login_log_id = decode_cursor(pagination.cursor, datetime.datetime, uuid.UUID)
+            login_logs = login_logs.filter(tuple_(LoginLog.created_at, LoginLog.id) < tuple_(created_at, login_log_id))
+        login_logs = (
+            login_logs
+            .order_by(LoginLog.created_at.desc(), LoginLog.id.desc())
+            .limit(pagination.per_page + 1)
+            .all()
+        )
+        next_cursor = None
+        if len(login_logs) > pagination.per_page:
+            login_logs = login_logs[:pagination.per_page]
+            next_cursor = encode_cursor(login_logs[-1].created_at, login_logs[-1].id)
+        return Page(
+            items=[login_log.to_dto(user=user) for login_log in login_logs], next_cursor=next_cursor, count=count)
 
     @staticmethod
-    def _get_device_type_from_user_agent(user_agent: str) -> types.LoginLog.DeviceType:
-        """Identify device by a 'User Agent'."""
-        user_agent = parse(user_agent)
-        if user_agent.is_mobile:
-            return types.LoginLog.DeviceType.MOBILE
-        elif user_agent.is_tablet:
-            return types.LoginLog.DeviceType.TABLET
-        return types.LoginLog.DeviceType.PC
+    def iter_login_history(
+        *,
+        user_id: uuid.UUID | None = None,
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
+        yield_per: int = 1000,
+    ) -> Iterator[Row]:
+        """Stream login log records from a server-side cursor, ordered by the login date.
+
+        Rows contain `id`, `user_id`, `created_at`, `user_agent`, `ip_addr` and `device_type` columns.
+        """
+        query = (
+            select(
+                LoginLog.id, LoginLog.user_id, LoginLog.created_at,
+                LoginLog.user_agent, LoginLog.ip_addr, LoginLog.device_type,
+            )
+            .order_by(LoginLog.created_at, LoginLog.id)
+            .execution_options(yield_per=yield_per)
+        )
+        if user_id is not None:
+            query = query.where(LoginLog.user_id == user_id)
+        if since is not None:
+            query = query.where(LoginLog.created_at >= since)
+        if until is not None:
+            query = query.where(LoginLog.created_at < until)
+        yield from db.session.execute(query)
+
+    def create_log_records(self, login_events: list[types.LoginEvent]) -> int:
+        """Create login log records for the given login events with a single multi-row INSERT."""
+        if not login_events:
+            return 0
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "user_id": login_event.user_id,
+                "user_agent": login_event.user_agent,
+                "ip_addr": login_event.ip_addr,
+                "device_type": self.device_type_classifier.classify(login_event.user_agent),
+                "created_at": login_event.created_at,
+                "updated_at": login_event.created_at,
+            }
+            for login_event in login_events
+        ]
+        with db_session() as session:
+            session.execute(insert(LoginLog).values(rows))
+        return len(rows)
+
+    def warm_up_device_types(self) -> None:
+        """Load classifications of the most frequent recent 'User Agent' strings from the login history."""
+        limit = self.device_type_classifier.warm_up_size
+        if limit <= 0:
+            return
+        device_types = (
+            db.session
+            .query(LoginLog.user_agent, LoginLog.device_type)
+            .filter(LoginLog.created_at >= datetime.datetime.utcnow() - self.warm_up_period)
+            .group_by(LoginLog.user_agent, LoginLog.device_type)
+            .order_by(func.count().desc())
+            .limit(limit)
+        )
+        self.device_type_classifier.warm_up(dict(device_types.all()))
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator
+
+from sqlalchemy import delete, func, insert, or_, select, update
+
+from auth.infrastructure.db.postgres import db, db_session, disable_statement_timeout
+
+from ..keyring import PrivateKey, SigningKey
+from ..models import JWTSigningKey
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Row
+
+# id of the advisory lock held during the keys rotation
+ROTATION_LOCK_ID = 0x6A776B
+
+
+class SigningKeyRepository:
+    """Token signing keys repository.
+
+    Private keys are stored encrypted with `encryption_key`.
+    Decrypted keys are cached by `kid`, so periodic reloads don't decrypt them again.
+    """
+
+    def __init__(self, encryption_key: str):
+        self.encryption_key = encryption_key.encode()
+        self._private_keys: dict[str, PrivateKey] = {}
+
+    def get_unexpired(self, now: datetime.datetime | None = None) -> list[SigningKey]:
+        """Get keys that haven't expired yet, ordered by activation time."""
+        now = now or datetime.datetime.utcnow()
+        stmt = (
+            select(JWTSigningKey.kid, JWTSigningKey.algorithm, JWTSigningKey.private_key,
+                   JWTSigningKey.activates_at, JWTSigningKey.expires_at)
+            .where(or_(JWTSigningKey.expires_at.is_(None), JWTSigningKey.expires_at > now))
+            .order_by(JWTSigningKey.activates_at)
+        )
+        with db.engine.connect() as connection:
+            rows = connection.execute(stmt).all()
+        signing_keys = [self._to_signing_key(row) for row in rows]
+        self._private_keys = {signing_key.kid: signing_key.private_key for signing_key in signing_keys}
+        return signing_keys
+
+    @staticmethod
+    @contextmanager
+    def rotation_lock() -> Iterator[None]:
+        """Run keys rotation in a transaction, concurrent rotations wait for each other."""
+        with db_session() as session:
+            # concurrent rotation can hold the lock longer than the request timeout
+            disable_statement_timeout(session)
+            session.execute(select(func.pg_advisory_xact_lock(ROTATION_LOCK_ID)))
+            yield
+
+    def add(self, signing_key: SigningKey) -> None:
+        """Add a new key, should be called within `rotation_lock`."""
+        stmt = insert(JWTSigningKey).values(
+            kid=signing_key.kid,
+            algorithm=signing_key.algorithm,
+            private_key=signing_key.to_pem(self.encryption_key).decode(),
+            activates_at=signing_key.activates_at,
+            expires_at=signing_key.expires_at,
+        )
+        db.session.execute(stmt)
+
+    @staticmethod
+    def set_expiration(kid: str, expires_at: datetime.datetime) -> None:
+        """Set key expiration time, should be called within `rotation_lock`."""
+        db.session.execute(update(JWTSigningKey).where(JWTSigningKey.kid == kid).values(expires_at=expires_at))
+
+    @staticmethod
+    def delete_expired(now: datetime.datetime) -> int:
+        """Delete expired keys."""
+        with db_session() as session:
+            result = session.execute(delete(JWTSigningKey).where(JWTSigningKey.expires_at <= now))
+        return result.rowcount
+
+    def _to_signing_key(self, row: Row) -> SigningKey:
+        private_key = self._private_keys.get(row.kid)
+        if private_key is None:
+            signing_key = SigningKey.from_pem(row.private_key.encode(), row.algorithm, password=self.encryption_key)
+        else:
+            signing_key = SigningKey(kid=row.kid, algorithm=row.algorithm, private_key=private_key)
+        return dataclasses.replace(signing_key, activates_at=row.activates_at, expires_at=row.expires_at)
@@ -3,10 +3,10 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 from uuid import UUID
 
-from sqlalchemy import func
+from sqlalchemy import bindparam, exists, func, literal, literal_column, or_, select, true, tuple_
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError, NoResultFound
-from werkzeug.security import check_password_hash, generate_password_hash
 
 from auth.common.exceptions import NotFoundError
 from auth.domain.roles.models import Role
@@ -17,34 +17,115 @@ from .. import types
 from ..models import User, UsersRoles
 
 if TYPE_CHECKING:
-    from sqlalchemy.orm import Query, Session
+    from sqlalchemy.orm import Session
+    from sqlalchemy.sql import Select
 
     from auth.domain.roles.repositories import RoleRepository
 
+    from ..hashing import PasswordHasher
+
+
+def _active_with_roles(*criteria) -> Select:
+    """Get active user with roles with optional filtering."""
+    roles = func.json_agg(
+        func.jsonb_build_object("id", Role.id, "name", Role.name, "description", Role.description).distinct(),
+    ).label("roles")
+    user = (
+        select(User.id, User.email, User.password, User.active, roles)
+        .where(*criteria, User.active == true())
+        .join(User.roles.local_attr, isouter=True)
+        .join(User.roles.remote_attr, isouter=True)
+        .group_by(User.id)
+    )
+    return user
+
+
+def _exists(*criteria) -> Select:
+    """Check whether rows matching the criteria exist, rendered as the ORM `Query.exists()`."""
+    return select(exists(select(literal_column("1")).where(*criteria)))
+
+
+# statements of the hot paths are built once: executions skip the statement construction
+# and reuse the memoized cache key of the compiled SQL, values are passed as bound parameters
+_ACTIVE_USER_BY_ID = _active_with_roles(User.id == bindparam("user_id"))
+_ACTIVE_USER_BY_EMAIL = _active_with_roles(User.email == bindparam("email"))
+_PASSWORD_BY_ID = select(User.password).where(User.id == bindparam("user_id"), User.active == true())
+_USER_EXISTS = _exists(User.email == bindparam("email"), User.active == true())
+_HAS_ROLE = _exists(UsersRoles.user_id == bindparam("user_id"), UsersRoles.role_id == bindparam("role_id"))
+
 
 class UserRepository:
     """Users repository."""
 
-    def __init__(self, role_repository: RoleRepository):
+    def __init__(self, role_repository: RoleRepository, password_hasher: PasswordHasher):
         self.role_repository = role_repository
+        self.password_hasher = password_hasher
 
-    def add_roles(self, user: types.User, roles_names: list[str]) -> types.User:
-        """Assign roles with the given names to user."""
-        roles = self.role_repository.find_by_names(roles_names)
+    @staticmethod
+    def add_roles(user: types.User, roles_names: list[str]) -> types.User:
+        """Assign roles with the given names to user.
+
+        Roles are assigned and the resulting user roles are fetched with a single query.
+        """
+        inserted = (
+            insert(UsersRoles, postgresql_ignore_duplicates=True)
+            .from_select(
+                ["user_id", "role_id"],
+                select(literal(user.id, PG_UUID(as_uuid=True)), Role.id).where(Role.name.in_(roles_names)),
+            )
+            .returning(UsersRoles.role_id)
+            .cte("inserted")
+        )
+        # CTE doesn't see rows inserted by another CTE, so new roles are taken from `RETURNING`
+        assigned = select(UsersRoles.role_id).where(UsersRoles.user_id == user.id)
+        stmt = (
+            select(Role.id, Role.name, Role.description)
+            .where(or_(Role.id.in_(assigned), Role.id.in_(select(inserted.c.role_id))))
+        )
         with db_session() as session:
-            for role in roles:
-                # XXX: to ignore duplicates, we have to manually check whether user has a specific role
-                if self._has_role(session, user.id, role.id):
-                    continue
-                session.add(UsersRoles(user_id=user.id, role_id=role.id))
-        user.roles = roles
+            roles = session.execute(stmt).all()
+        user.roles = [types.Role.from_dict(role._mapping) for role in roles]
         return user
 
+    @staticmethod
+    def grant_roles(user_ids: list[UUID], role_ids: list[UUID]) -> int:
+        """Assign all given roles to all given users, return number of new assignments.
+
+        Unknown users and roles are ignored.
+        """
+        if not user_ids or not role_ids:
+            return 0
+        assignments = (
+            select(User.id, Role.id)
+            .join_from(User, Role, true())
+            .where(User.id.in_(user_ids), Role.id.in_(role_ids))
+        )
+        stmt = (
+            insert(UsersRoles, postgresql_ignore_duplicates=True)
+            .from_select(["user_id", "role_id"], assignments)
+        )
+        with db_session() as session:
+            result = session.execute(stmt)
+        return result.rowcount
+
     def has_role(self, user_id: UUID, role_id: UUID) -> bool:
         """Check whether user has a specific role."""
         with db_session() as session:
             return self._has_role(session, user_id, role_id)
 
+    @staticmethod
+    def has_roles(pairs: list[tuple[UUID, UUID]]) -> list[bool]:
+        """Check (user, role) pairs with a single query."""
+        if not pairs:
+            return []
+        assigned = (
+            db.session
+            .query(UsersRoles.user_id, UsersRoles.role_id)
+            .filter(tuple_(UsersRoles.user_id, UsersRoles.role_id).in_(set(pairs)))
+        )
+        assigned_pairs = {tuple(pair) for pair in assigned}
+        return [pair in assigned_pairs for pair in pairs]
+
     @staticmethod
     def assign_role(user_id: UUID, role_id: UUID) -> None:
         """Assign role to user."""
@@ -66,73 +147,72 @@ class UserRepository:
     @staticmethod
     def get_active_or_none(user_id: UUID) -> types.User | None:
         """Get active user by ID."""
-        user = UserRepository._active_with_roles(id=user_id).one_or_none()
+        user = db.session.execute(_ACTIVE_USER_BY_ID, {"user_id": user_id}).one_or_none()
         if user is None:
             return None
-        return types.User.from_dict(user)
+        return types.User.from_dict(user._mapping)
 
     @staticmethod
     def get_active_by_email(email: str) -> types.User:
         """Get active user by email."""
         try:
-            user = UserRepository._active_with_roles(email=email).one()
+            user = db.session.execute(_ACTIVE_USER_BY_EMAIL, {"email": email}).one()
         except NoResultFound:
             raise NotFoundError
-        return types.User.from_dict(user)
+        return types.User.from_dict(user._mapping)
+
+    @staticmethod
+    def get_password(user_id: UUID) -> str | None:
+        """Get password hash of active user from the database."""
+        return db.session.execute(_PASSWORD_BY_ID, {"user_id": user_id}).scalar()
 
     @staticmethod
     def user_exists(email: str) -> bool:
         """Check whether user with the given email already exists."""
-        exists = db.session.query(
-            db.session.query(User.id).filter_by(email=email, active=True).exists(),
-        ).scalar()
-        return exists
+        return db.session.execute(_USER_EXISTS, {"email": email}).scalar()
 
-    @staticmethod
-    def is_valid_password(hashed_password: str, given_password: str) -> bool:
+    def is_valid_password(self, hashed_password: str, given_password: str) -> bool:
         """Validate user password."""
-        return check_password_hash(hashed_password, given_password)
+        return self.password_hasher.verify_password(hashed_password, given_password)
 
-    @staticmethod
-    def create(email: str, password: str) -> types.User:
+    def password_needs_rehash(self, hashed_password: str) -> bool:
+        """Check whether password hash uses outdated algorithm or parameters."""
+        return self.password_hasher.needs_rehash(hashed_password)
+
+    def rehash_password(self, user_id: UUID, hashed_password: str, password: str) -> bool:
+        """Replace password hash with a new one, unless the password has been changed in the meantime."""
+        new_hashed_password = self.password_hasher.hash_password(password)
+        with db_session():
+            updated = (
+                User.query
+                .filter_by(id=user_id, password=hashed_password)
+                .update({"password": new_hashed_password})
+            )
+        return bool(updated)
+
+    def create(self, email: str, password: str) -> types.User:
         """Create new user with hashed password."""
-        hashed_password = UserRepository._hash_password(password)
+        hashed_password = self.password_hasher.hash_password(password)
         with db_session():
             user: User = user_datastore.create_user(email=email, password=hashed_password)
         return user.to_dto()
 
-    @staticmethod
-    def change_password(user: types.User, password: str) -> types.User:
+    def change_password(self, user: types.User, password: str) -> types.User:
         """Change user password."""
-        hashed_password = UserRepository._hash_password(password)
+        hashed_password = self.password_hasher.hash_password(password)
         with db_session():
             User.query.filter_by(email=user.email).update({"password": hashed_password})
         user.password = hashed_password
         return user
 
     @staticmethod
-    def _hash_password(password: str) -> str:
-        return generate_password_hash(password)
-
-    @staticmethod
-    def _active_with_roles(**filters) -> Query:
-        """Get active user with roles with optional filtering."""
-        roles = func.json_agg(
-            func.jsonb_build_object("id", Role.id, "name", Role.name, "description", Role.description).distinct(),
-        ).label("roles")
-        user = (
-            db.session
-            .query(User.id, User.email, User.password, User.active, roles)
-            .filter_by(**filters, active=True)
-            .join(User.roles.local_attr, isouter=True)
-            .join(User.roles.remote_attr, isouter=True)
-            .group_by(User.id)
-        )
-        return user
+    def deactivate(user_id: UUID) -> None:
+        """Deactivate user."""
+        with db_session():
+            updated = User.query.filter_by(id=user_id).update({"active": False})
+        if not updated:
+            raise NotFoundError
 
     @staticmethod
     def _has_role(session: Session, user_id: UUID, role_id: UUID) -> bool:
-        exists = session.query(
-            db.session.query(UsersRoles.user_id).filter_by(user_id=user_id, role_id=role_id).exists(),
-        ).scalar()
-        return exists
+        return session.execute(_HAS_ROLE, {"user_id": user_id, "role_id": role_id}).scalar()
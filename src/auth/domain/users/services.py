@@ -1,25 +1,40 @@
 from __future__ import annotations
 
+import datetime
+import itertools
+import logging
+import threading
 from typing import TYPE_CHECKING
+from uuid import UUID
 
+from flask import current_app
+
+from auth.core.config import get_settings
 from auth.domain.roles.enums import DefaultRoles
 from auth.signals import event_emitter
 
 from . import types
 from .enums import UserSignal
-from .exceptions import UserAlreadyExistsError, UserInvalidCredentialsError, UserPasswordChangeError
+from .exceptions import (
+    UserAlreadyExistsError, UserInvalidCredentialsError, UserPasswordChangeError, UserRolesBatchError,
+)
 
 if TYPE_CHECKING:
     from .jwt import JWTAuth
-    from .repositories import LoginLogRepository, UserRepository
+    from .login_history import LoginLogWriter
+    from .repositories import UserRepository
+
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
 
 
 class UserService:
     """User service."""
 
-    def __init__(self, user_repository: UserRepository, login_log_repository: LoginLogRepository, jwt_auth: JWTAuth):
+    def __init__(self, user_repository: UserRepository, login_log_writer: LoginLogWriter, jwt_auth: JWTAuth):
         self.user_repository = user_repository
-        self.login_log_repository = login_log_repository
+        self.login_log_writer = login_log_writer
         self.jwt_auth = jwt_auth
 
     def register_new_user(self, email: str, password: str) -> types.User:
@@ -35,35 +50,119 @@ class UserService:
         """Assign default roles."""
         return self.user_repository.add_roles(user, roles_names=[DefaultRoles.VIEWERS.value])
 
-    def login(self, email: str, password: str) -> tuple[types.JWTCredentials, types.User]:
-        """User authentication."""
+    def login(
+        self, email: str, password: str, ip_addr: str | None, user_agent: str,
+    ) -> tuple[types.JWTCredentials, types.User]:
+        """User authentication.
+
+        Login starts a new session of the device and is saved to the login history.
+        """
         user = self.user_repository.get_active_by_email(email)
-        if not self.user_repository.is_valid_password(user.password, password):
+        hashed_password = self._get_password(user)
+        if not self.user_repository.is_valid_password(hashed_password, password):
             raise UserInvalidCredentialsError
-        credentials = self.jwt_auth.generate_tokens(user)
+        if self.user_repository.password_needs_rehash(hashed_password):
+            self._rehash_password_in_background(user.id, hashed_password, password)
+        login_event = types.LoginEvent(
+            user_id=user.id, ip_addr=ip_addr, user_agent=user_agent, created_at=datetime.datetime.utcnow(),
+        )
+        credentials = self.jwt_auth.generate_tokens(user, login_event=login_event)
+        self.update_login_history(login_event)
         return credentials, user
 
-    def update_login_history(self, user: types.User, ip_addr: str, user_agent: str) -> types.LoginLog:
-        """Update user login history with new record."""
-        login_log = self.login_log_repository.create_log_record(user, ip_addr, user_agent)
-        return login_log
+    def update_login_history(self, login_event: types.LoginEvent) -> None:
+        """Update user login history with new record.
+
+        Records are written in background, so they appear in the history with a small delay.
+        """
+        self.login_log_writer.add(login_event)
 
-    def refresh_credentials(self, jti: str, user: types.User) -> types.JWTCredentials:
+    def refresh_credentials(self, refresh_jwt: dict, user: types.User) -> types.JWTCredentials:
         """Renew credentials using the given refresh token."""
-        return self.jwt_auth.refresh_tokens(jti, user)
+        return self.jwt_auth.refresh_tokens(refresh_jwt, user)
 
     def logout(self, jwt: dict) -> None:
         """Logout user."""
         self.jwt_auth.revoke_tokens(jwt)
 
+    def logout_everywhere(self, user: types.User) -> None:
+        """Logout user from all devices."""
+        self.jwt_auth.revoke_user_tokens(user.id)
+
+    def get_sessions(self, user: types.User, current_session_id: str | None = None) -> list[types.Session]:
+        """Get active user sessions (devices)."""
+        return self.jwt_auth.get_sessions(user.id, current_session_id)
+
+    def revoke_session(self, user: types.User, session_id: str) -> None:
+        """Logout user from the device of the session."""
+        self.jwt_auth.revoke_session(user.id, session_id)
+
+    def deactivate_user(self, user_id: UUID) -> None:
+        """Deactivate user and revoke all user tokens."""
+        self.user_repository.deactivate(user_id)
+        self.jwt_auth.revoke_user_tokens(user_id)
+
+    def check_roles(
+        self,
+        pairs: list[tuple[UUID, UUID]] | None = None,
+        user_ids: list[UUID] | None = None,
+        role_ids: list[UUID] | None = None,
+    ) -> types.RolesCheck:
+        """Check whether users have roles.
+
+        Either (user, role) pairs or all combinations of the given users and roles are checked;
+        for combinations bits go user by user, in the order of `role_ids` for each user.
+        """
+        if pairs is not None and user_ids is None and role_ids is None:
+            return types.RolesCheck.from_results(self.user_repository.has_roles(pairs))
+        if pairs is None and user_ids is not None and role_ids is not None:
+            self._check_batch_size(user_ids, role_ids)
+            pairs = list(itertools.product(user_ids, role_ids))
+            return types.RolesCheck.from_results(self.user_repository.has_roles(pairs))
+        raise UserRolesBatchError
+
+    def grant_roles(self, user_ids: list[UUID], role_ids: list[UUID]) -> types.RolesGrant:
+        """Assign all given roles to all given users."""
+        self._check_batch_size(user_ids, role_ids)
+        granted = self.user_repository.grant_roles(user_ids, role_ids)
+        return types.RolesGrant(granted=granted)
+
     def change_password(
-        self, jwt: dict, user: types.User, old_password: str, new_password1: str, new_password2: str,
+        self, user: types.User, old_password: str, new_password1: str, new_password2: str,
     ) -> types.User:
-        """Change user password."""
-        if not self.user_repository.is_valid_password(user.password, old_password):
+        """Change user password and revoke all user tokens."""
+        if not self.user_repository.is_valid_password(self._get_password(user), old_password):
             raise UserInvalidCredentialsError
         if new_password1 != new_password2:
             raise UserPasswordChangeError(message="Passwords don't match", code="passwords_mismatch")
         user = self.user_repository.change_password(user, new_password1)
-        self.jwt_auth.revoke_tokens(jwt)
+        self.jwt_auth.revoke_user_tokens(user.id)
         return user
+
+    def _get_password(self, user: types.User) -> str:
+        """Get password hash, users loaded from cache don't have it."""
+        hashed_password = user.password or self.user_repository.get_password(user.id)
+        if hashed_password is None:
+            raise UserInvalidCredentialsError
+        return hashed_password
+
+    def _rehash_password_in_background(self, user_id: UUID, hashed_password: str, password: str) -> None:
+        """Update outdated password hash without delaying the login response."""
+        app = current_app._get_current_object()
+
+        def rehash_password() -> None:
+            with app.app_context():
+                try:
+                    self.user_repository.rehash_password(user_id, hashed_password, password)
+                except Exception:
+                    logger.exception("Failed to rehash password of the user <%s>", user_id)
+
+        threading.Thread(target=rehash_password, name="password-rehash", daemon=True).start()
+
+    @staticmethod
+    def _check_batch_size(user_ids: list[UUID], role_ids: list[UUID]) -> None:
+        if len(user_ids) * len(role_ids) > settings.USER_ROLES_BATCH_MAX_SIZE:
+            raise UserRolesBatchError(
+                message=f"Too many (user, role) combinations, max is {settings.USER_ROLES_BATCH_MAX_SIZE}",
+                code="roles_batch_too_large",
+            )
@@ -1,10 +1,13 @@
 import datetime
 import uuid
 from dataclasses import dataclass
+from typing import Any, Callable
 
 from auth.common.enums import ExtendedEnum
 from auth.domain.roles.types import Role
 
+from .exceptions import UserInvalidCredentialsError
+
 
 @dataclass(slots=True)
 class User:
@@ -12,7 +15,8 @@ class User:
 
     id: uuid.UUID  # noqa: VNE003
     email: str
-    password: str
+    # password hash isn't cached, it is `None` for users loaded from cache
+    password: str | None
     active: bool
     roles: list[Role]
 
@@ -22,7 +26,7 @@ class User:
         dct = {
             "id": data["id"],
             "email": data["email"],
-            "password": data["password"],
+            "password": data.get("password"),
             "active": data["active"],
             "roles": roles,
         }
@@ -33,6 +37,54 @@ class User:
         dct = cls._prepare_fields(data)
         return cls(**dct)
 
+    def to_dict(self) -> dict:
+        dct = {
+            "id": str(self.id),
+            "email": self.email,
+            "password": self.password,
+            "active": self.active,
+            "roles": [role.to_dict() for role in self.roles],
+        }
+        return dct
+
+
+class LazyUser:
+    """User resolved from the access token claims.
+
+    Only `id` and roles names are taken from the claims,
+    the rest of the user fields are loaded from the database on first access.
+    """
+
+    __slots__ = ("id", "roles_names", "_loader", "_user")
+
+    def __init__(
+        self, id: uuid.UUID, roles_names: list[str], loader: Callable[[uuid.UUID], User | None],  # noqa: VNE003
+    ):
+        self.id = id
+        self.roles_names = roles_names
+        self._loader = loader
+        self._user: User | None = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in LazyUser.__slots__:
+            object.__setattr__(self, name, value)
+            return
+        setattr(self._load(), name, value)
+
+    def __repr__(self) -> str:
+        return f"<LazyUser {self.id}>"
+
+    def _load(self) -> User:
+        if self._user is None:
+            user = self._loader(self.id)
+            if user is None:
+                raise UserInvalidCredentialsError(message="User is not found or inactive", code="user_not_found")
+            self._user = user
+        return self._user
+
 
 @dataclass(frozen=True, slots=True)
 class JWTCredentials:
@@ -42,6 +94,37 @@ class JWTCredentials:
     refresh_token: str
 
 
+@dataclass(frozen=True, slots=True)
+class RolesCheck:
+    """Result of the bulk roles check.
+
+    `bitmap` contains '1' if the user has the role and '0' otherwise, in the order of checked (user, role) pairs.
+    """
+
+    bitmap: str
+
+    @classmethod
+    def from_results(cls, results: list[bool]) -> "RolesCheck":
+        return cls(bitmap="".join("1" if has_role else "0" for has_role in results))
+
+
+@dataclass(frozen=True, slots=True)
+class RolesGrant:
+    """Result of the bulk roles assignment."""
+
+    granted: int
+
+
+@dataclass(frozen=True, slots=True)
+class LoginEvent:
+    """Successful login that has to be saved to the login history."""
+
+    user_id: uuid.UUID
+    ip_addr: str
+    user_agent: str
+    created_at: datetime.datetime
+
+
 @dataclass(frozen=True, slots=True)
 class LoginLog:
     """Login log record."""
@@ -59,3 +142,23 @@ class LoginLog:
     user_agent: str
     ip_addr: str
     device_type: DeviceType
+
+    class ExportFormat(ExtendedEnum):
+        """Login history export format."""
+
+        NDJSON = "ndjson"
+        CSV = "csv"
+
+
+@dataclass(frozen=True, slots=True)
+class Session:
+    """Active session: refresh token family started by a login."""
+
+    id: str  # noqa: VNE003
+    created_at: datetime.datetime
+    # expiration time of the current refresh token, it's extended on every refresh
+    expires_at: datetime.datetime
+    ip_addr: str | None
+    user_agent: str | None
+    device_type: LoginLog.DeviceType | None
+    current: bool = False
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from datetime import timedelta
-from typing import Any
+from typing import Any, Mapping
 
 from auth.common.types import seconds
 from auth.infrastructure.db.redis import RedisClient
@@ -38,6 +41,56 @@ class Cache(ABC):
         """Delete given keys from cache."""
         raise NotImplementedError
 
+    @abstractmethod
+    def get_many(self, keys: list[str]) -> list[Any]:
+        """Get data of multiple keys at once, `None` for missing keys."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_many(
+        self,
+        data: Mapping[str, Any],
+        *,
+        timeout: seconds | timedelta | Mapping[str, seconds | timedelta] | None = None,
+    ) -> bool:
+        """Save multiple keys at once.
+
+        Args:
+            data: mapping of cache keys to data.
+            timeout: ttl of all keys, or a mapping with ttl of every key.
+
+        Returns: Have all keys been saved successfully.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_many(self, keys: list[str]) -> int:
+        """Delete multiple keys at once."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_if_unchanged(
+        self,
+        key: str,
+        data: Any,
+        *,
+        guard_key: str,
+        guard_value: str | None,
+        timeout: seconds | timedelta | None = None,
+    ) -> bool:
+        """Save data only if the guard key still has the given value (`None` - the guard key is missing).
+
+        Used with `incr_many` for version guards: a value read before a concurrent invalidation isn't written back.
+
+        Returns: Has the data been saved.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def incr_many(self, keys: list[str], *, timeout: seconds | timedelta | None = None) -> None:
+        """Increment multiple counters at once."""
+        raise NotImplementedError
+
     @abstractmethod
     def get_timeout(self, timeout: seconds | timedelta | None = None) -> int | timedelta | None:
         """Get ttl (timeout) for cache."""
@@ -68,9 +121,152 @@ class RedisCache(Cache):
     def delete(self, *keys) -> int:
         return self._cache.delete(*keys)
 
+    def get_many(self, keys: list[str]) -> list[Any]:
+        return self._cache.get_many(keys)
+
+    def set_many(
+        self,
+        data: Mapping[str, Any],
+        *,
+        timeout: seconds | timedelta | Mapping[str, seconds | timedelta] | None = None,
+    ) -> bool:
+        if isinstance(timeout, Mapping):
+            timeout = {key: self.get_timeout(timeout.get(key)) for key in data}
+        else:
+            timeout = self.get_timeout(timeout)
+        return self._cache.set_many(data, timeout=timeout)
+
+    def delete_many(self, keys: list[str]) -> int:
+        return self._cache.delete_many(keys)
+
+    def set_if_unchanged(
+        self,
+        key: str,
+        data: Any,
+        *,
+        guard_key: str,
+        guard_value: str | None,
+        timeout: seconds | timedelta | None = None,
+    ) -> bool:
+        return self._cache.set_if_unchanged(
+            key, data, guard_key=guard_key, guard_value=guard_value, timeout=self.get_timeout(timeout),
+        )
+
+    def incr_many(self, keys: list[str], *, timeout: seconds | timedelta | None = None) -> None:
+        self._cache.incr_many(keys, timeout=self.get_timeout(timeout))
+
     def get_timeout(self, timeout: seconds | timedelta | None = None) -> int | timedelta | None:
         if timeout is None and self.default_ttl is not None:
             return self.default_ttl
         if isinstance(timeout, timedelta):
             return timeout
         return None if timeout is None else max(0, int(timeout))
+
+
+class LocalMemoryCache(Cache):
+    """Process-local LRU cache.
+
+    Attributes:
+        maxsize: max number of cached keys.
+        default_ttl: default key ttl.
+    """
+
+    def __init__(self, maxsize: int, default_ttl: int | None = None):
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+
+        self._cache: OrderedDict[str, tuple[Any, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def exists(self, *keys) -> int:
+        return sum(self.get(key) is not None for key in keys)
+
+    def get(self, key: str, default: Any | None = None) -> Any:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return default
+            data, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._cache[key]
+                return default
+            self._cache.move_to_end(key)
+        return data
+
+    def set(self, key: str, data: Any, *, timeout: seconds | timedelta | None = None) -> bool:
+        if self.maxsize <= 0:
+            return False
+        with self._lock:
+            self._set(key, data, timeout)
+        return True
+
+    def delete(self, *keys) -> int:
+        with self._lock:
+            return sum(self._cache.pop(key, None) is not None for key in keys)
+
+    def get_many(self, keys: list[str]) -> list[Any]:
+        return [self.get(key) for key in keys]
+
+    def set_many(
+        self,
+        data: Mapping[str, Any],
+        *,
+        timeout: seconds | timedelta | Mapping[str, seconds | timedelta] | None = None,
+    ) -> bool:
+        return all(
+            self.set(key, value, timeout=timeout.get(key) if isinstance(timeout, Mapping) else timeout)
+            for key, value in data.items()
+        )
+
+    def delete_many(self, keys: list[str]) -> int:
+        return self.delete(*keys)
+
+    def set_if_unchanged(
+        self,
+        key: str,
+        data: Any,
+        *,
+        guard_key: str,
+        guard_value: str | None,
+        timeout: seconds | timedelta | None = None,
+    ) -> bool:
+        with self._lock:
+            entry = self._cache.get(guard_key)
+            current_value = None if entry is None or self._is_expired(entry) else str(entry[0])
+            if current_value != guard_value:
+                return False
+            self._set(key, data, timeout)
+        return True
+
+    def incr_many(self, keys: list[str], *, timeout: seconds | timedelta | None = None) -> None:
+        with self._lock:
+            for key in keys:
+                entry = self._cache.get(key)
+                value = 0 if entry is None or self._is_expired(entry) else int(entry[0])
+                # counters are stored as strings, like in Redis
+                self._set(key, str(value + 1), timeout)
+
+    def clear(self) -> None:
+        """Remove all keys."""
+        with self._lock:
+            self._cache.clear()
+
+    def _set(self, key: str, data: Any, timeout: seconds | timedelta | None) -> None:
+        timeout = self.get_timeout(timeout)
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        self._cache[key] = (data, expires_at)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _is_expired(entry: tuple[Any, float | None]) -> bool:
+        expires_at = entry[1]
+        return expires_at is not None and time.monotonic() >= expires_at
+
+    def get_timeout(self, timeout: seconds | timedelta | None = None) -> int | None:
+        if timeout is None:
+            timeout = self.default_ttl
+        if isinstance(timeout, timedelta):
+            timeout = timeout.total_seconds()
+        return None if timeout is None else max(0, int(timeout))
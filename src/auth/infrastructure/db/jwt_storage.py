@@ -1,29 +1,100 @@
+from __future__ import annotations
+
 from datetime import timedelta
+from typing import TYPE_CHECKING
 
 from auth.common.types import seconds
 from auth.core.config import get_settings
 from auth.infrastructure.db.cache import Cache
 
+from .revocation import expires_at_from_timeout
+
+if TYPE_CHECKING:
+    from .revocation import LocalRevocationCache, RevocationFeed
+
 settings = get_settings()
 
 
 class JWTStorage:
-    """JWT storage."""
+    """JWT storage.
 
-    def __init__(self, cache: Cache):
+    Revoked tokens are checked in the process-local cache first, Redis is used only if the local cache is not synced.
+    All user tokens can be revoked at once by incrementing the user tokens generation (`gen` claim).
+    """
+
+    def __init__(
+        self,
+        cache: Cache,
+        revocation_feed: RevocationFeed,
+        local_cache: LocalRevocationCache | None = None,
+    ):
         self.cache = cache
+        self.revocation_feed = revocation_feed
+        self.local_cache = local_cache
 
     def is_token_revoked(self, jti: str) -> bool:
         """Check if token is revoked."""
+        if self.local_cache is not None:
+            is_revoked = self.local_cache.is_revoked(jti)
+            if is_revoked is not None:
+                return is_revoked
         return bool(self.cache.exists(jti))
 
+    def is_any_revoked(self, jtis: list[str]) -> bool:
+        """Check if any of the tokens (e.g. the token and its family) is revoked, Redis is queried at most once."""
+        if self.local_cache is not None:
+            answers = [self.local_cache.is_revoked(jti) for jti in jtis]
+            if None not in answers:
+                return any(answers)
+        return bool(self.cache.exists(*jtis))
+
+    def is_generation_revoked(self, user_id: str, generation: int) -> bool:
+        """Check if tokens of the given generation are revoked."""
+        current_generation = self._get_known_generation(user_id)
+        return generation < current_generation and not self.revocation_feed.is_generation_expired(current_generation)
+
+    def get_user_generation(self, user_id: str) -> int:
+        """Get current user tokens generation for issuing new tokens.
+
+        It's read from the primary Redis node: the local cache can miss a bump made by another process,
+        and new tokens would be revoked as soon as the bump reaches it.
+        """
+        return self.revocation_feed.get_user_generation(user_id)
+
+    def _get_known_generation(self, user_id: str) -> int:
+        if self.local_cache is not None:
+            generation = self.local_cache.get_user_generation(user_id)
+            if generation is not None:
+                return generation
+        return self.revocation_feed.get_user_generation(user_id)
+
+    def invalidate_user_tokens(self, user_id: str) -> int:
+        """Invalidate all previously issued user tokens."""
+        generation = self.revocation_feed.bump_user_generation(user_id)
+        if self.local_cache is not None:
+            self.local_cache.set_user_generation(user_id, generation)
+        return generation
+
     def invalidate_tokens(self, access_jwt: dict) -> None:
-        """Save invalid tokens to the storage of blacklisted tokens."""
-        jti = access_jwt["jti"]
-        refresh_jti = access_jwt["refresh_jti"]
-        self.invalidate_token(jti, settings.JWT_ACCESS_TOKEN_EXPIRES)
-        self.invalidate_token(refresh_jti, settings.JWT_REFRESH_TOKEN_EXPIRES)
+        """Save invalid tokens (and their refresh token family) to the storage of blacklisted tokens."""
+        tokens = {
+            access_jwt["jti"]: settings.JWT_ACCESS_TOKEN_EXPIRES,
+            access_jwt["refresh_jti"]: settings.JWT_REFRESH_TOKEN_EXPIRES,
+        }
+        if "fid" in access_jwt:
+            tokens[access_jwt["fid"]] = settings.JWT_REFRESH_TOKEN_EXPIRES
+        self.invalidate_many(tokens)
 
     def invalidate_token(self, jti: str, timeout: seconds | timedelta) -> bool:
         """Invalidate token by the jti."""
-        return self.cache.set(jti, "", timeout=timeout)
+        return self.invalidate_many({jti: timeout})
+
+    def invalidate_many(self, tokens: dict[str, seconds | timedelta]) -> bool:
+        """Invalidate tokens (JTI -> remaining lifetime) with a single write to the cache and to the feed."""
+        is_saved = self.cache.set_many(dict.fromkeys(tokens, ""), timeout=tokens)
+        revoked_tokens = {jti: expires_at_from_timeout(timeout) for jti, timeout in tokens.items()}
+        if self.local_cache is not None:
+            for jti, expires_at in revoked_tokens.items():
+                self.local_cache.add(jti, expires_at)
+        self.revocation_feed.publish_revoked_tokens(revoked_tokens)
+        return is_saved
@@ -1,17 +1,23 @@
 from __future__ import annotations
 
+import time
 from contextlib import contextmanager
-from typing import TYPE_CHECKING, ContextManager
+from typing import TYPE_CHECKING, Any, ContextManager
 
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
 from sqlalchemy.dialects.postgresql import Insert
+from sqlalchemy.exc import TimeoutError
 from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import NullPool, QueuePool
 
 from auth.common.models import BaseModel
 from auth.core.config import get_settings
+from auth.metrics import metrics
 
 if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection
     from sqlalchemy.orm import Session
 
     from flask import Flask
@@ -24,10 +30,14 @@ migrate = Migrate(directory="auth/migrations")
 
 @compiles(Insert, "postgresql")
 def ignore_duplicates(insert, compiler, **kw) -> str:
-    """Ignore duplicates on inserts."""
-    stmt = compiler.visit_insert(insert, **kw)
+    """Ignore duplicates on inserts.
+
+    `ON CONFLICT DO NOTHING` is rendered by the dialect, so it goes before `RETURNING` and works in CTEs.
+    """
     ignore = insert.kwargs.get("postgresql_ignore_duplicates", False)
-    return stmt if not ignore else f"{stmt} ON CONFLICT DO NOTHING"
+    if ignore and insert._post_values_clause is None:
+        insert = insert.on_conflict_do_nothing()
+    return compiler.visit_insert(insert, **kw)
 
 
 def init_postgres(app: Flask) -> None:
@@ -35,6 +45,7 @@ def init_postgres(app: Flask) -> None:
     app.config["SQLALCHEMY_DATABASE_URI"] = settings.DB_URL
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["SQLALCHEMY_ECHO"] = settings.SQLALCHEMY_ECHO
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = get_engine_options()
 
     db.init_app(app)
     migrate.init_app(app, db)
@@ -44,6 +55,80 @@ def init_postgres(app: Flask) -> None:
     Insert.argument_for("postgresql", "ignore_duplicates", None)
 
 
+def get_engine_options() -> dict[str, Any]:
+    """Get SQLAlchemy engine options.
+
+    With an external pooler in transaction mode server connections are shared between clients,
+    so the app doesn't keep its own pool and doesn't set session parameters on connect:
+    statement timeout has to be configured on the database role instead.
+    Migrations and maintenance commands disable the timeout with `disable_statement_timeout`.
+    """
+    if settings.DB_EXTERNAL_POOLER:
+        return {"poolclass": NullPool}
+    engine_options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_POOL_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_STATEMENT_TIMEOUT:
+        statement_timeout_ms = int(settings.DB_STATEMENT_TIMEOUT * 1000)
+        engine_options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout_ms}"}
+    return engine_options
+
+
+def disable_statement_timeout(connection: Connection | Session) -> None:
+    """Disable statement timeout till the end of the current transaction.
+
+    DDL and data moves on large tables in migrations and maintenance commands run longer than requests are allowed to.
+    """
+    connection.execute(text("SET LOCAL statement_timeout = 0"))
+
+
+class InstrumentedQueuePool(QueuePool):
+    """Queue pool with metrics.
+
+    Metrics (`db.pool.*`):
+        checked_out: connections in use.
+        overflow: connections opened over the pool size.
+        wait_time: time of getting a connection from the pool.
+        overflow_hits: checkouts that opened an overflow connection.
+        timeouts: checkouts that haven't got a connection within the timeout.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._checked_out = metrics.gauge("db.pool.checked_out")
+        self._overflow_connections = metrics.gauge("db.pool.overflow")
+        self._wait_time = metrics.histogram("db.pool.wait_time")
+        self._overflow_hits = metrics.counter("db.pool.overflow_hits")
+        self._timeouts = metrics.counter("db.pool.timeouts")
+
+    def _do_get(self):
+        overflow = self._overflow
+        started_at = time.monotonic()
+        try:
+            connection = super()._do_get()
+        except TimeoutError:
+            self._timeouts.inc()
+            raise
+        self._wait_time.observe(time.monotonic() - started_at)
+        if self._overflow > max(overflow, 0):
+            self._overflow_hits.inc()
+        self._update_gauges()
+        return connection
+
+    def _do_return_conn(self, conn) -> None:
+        super()._do_return_conn(conn)
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        self._checked_out.set(self.checkedout())
+        self._overflow_connections.set(max(self._overflow, 0))
+
+
 @contextmanager
 def db_session() -> ContextManager[Session]:
     """SQLAlchemy ORM session context manager."""  # noqa: D403
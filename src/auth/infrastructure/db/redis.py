@@ -1,59 +1,379 @@
 from __future__ import annotations
 
+import bisect
+import hashlib
+import itertools
+import time
+from collections import defaultdict
 from datetime import timedelta
-from typing import TYPE_CHECKING, Any, Iterator, Literal
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Literal, Mapping
 
-from redis import Redis
+from redis import BlockingConnectionPool, Redis
+from redis.exceptions import ConnectionError, TimeoutError
+
+from auth.metrics import metrics
 
 if TYPE_CHECKING:
     from auth.common.types import seconds
 
 
 def init_redis(
-    host: str, port: int, encoding: str, decode_responses: Literal[True] = True, retry_on_timeout: bool = True,
+    host: str,
+    port: int,
+    encoding: str,
+    decode_responses: Literal[True] = True,
+    retry_on_timeout: bool = True,
+    pool_options: dict | None = None,
 ) -> Iterator[Redis]:
     """Init Redis client."""
-    redis_client = Redis(
-        host=host,
-        port=port,
+    redis_client = create_redis(
+        host,
+        port,
+        name="default",
+        pool_options=pool_options,
         encoding=encoding,
         decode_responses=decode_responses,
         retry_on_timeout=retry_on_timeout,
     )
     yield redis_client
+    close_redis(redis_client)
+
+
+def init_redis_shards(
+    redis_client: Redis,
+    replicas: list[str],
+    shards: list[list[str]],
+    encoding: str,
+    decode_responses: Literal[True] = True,
+    retry_on_timeout: bool = True,
+    failover_cooldown: seconds = 5,
+    pool_options: dict | None = None,
+) -> Iterator[list[RedisShard]]:
+    """Init Redis shards.
+
+    Every shard is a list of `host:port` addresses: the primary node followed by its replicas.
+    Without `shards` the only shard is the default Redis instance with the given `replicas`.
+    """
+    clients = []
+
+    def create_node(address: str) -> RedisNode:
+        host, port = address.rsplit(":", 1)
+        client = create_redis(
+            host,
+            int(port),
+            name=address,
+            pool_options=pool_options,
+            encoding=encoding,
+            decode_responses=decode_responses,
+            retry_on_timeout=retry_on_timeout,
+        )
+        clients.append(client)
+        return RedisNode(client, address, failover_cooldown=failover_cooldown)
+
+    if shards:
+        redis_shards = [
+            RedisShard(create_node(primary), [create_node(replica) for replica in shard_replicas])
+            for primary, *shard_replicas in shards
+        ]
+    else:
+        primary = RedisNode(redis_client, "default", failover_cooldown=failover_cooldown)
+        redis_shards = [RedisShard(primary, [create_node(replica) for replica in replicas])]
+    yield redis_shards
+    for client in clients:
+        close_redis(client)
+
+
+def create_redis(host: str, port: int, *, name: str, pool_options: dict | None = None, **connection_options) -> Redis:
+    """Create Redis client with an instrumented blocking connection pool.
+
+    Args:
+        host: Redis host.
+        port: Redis port.
+        name: pool name used in metrics.
+        pool_options: `max_connections`, `timeout` (max wait for a free connection), socket timeouts,
+            keepalive and health check interval.
+        connection_options: other connection options.
+    """
+    connection_pool = InstrumentedConnectionPool(
+        name=name, host=host, port=port, **connection_options, **(pool_options or {}))
+    return Redis(connection_pool=connection_pool)
+
+
+def close_redis(redis_client: Redis) -> None:
+    """Close Redis client and all connections of its pool."""
     redis_client.close()
+    redis_client.connection_pool.disconnect()
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """Blocking connection pool with metrics.
+
+    Greenlets wait up to `timeout` seconds for a free connection instead of opening new ones,
+    so the number of connections per worker never exceeds `max_connections`.
+
+    Metrics (`redis.pool.<name>.*`):
+        connections: open connections.
+        checked_out: connections in use.
+        wait_time: time of getting a connection from the pool.
+        connects: established connections (new and reconnected), growth means connection churn.
+        exhausted: requests that haven't got a connection within the timeout.
+    """
+
+    def __init__(self, name: str, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.name = name
+
+        prefix = f"redis.pool.{name}"
+        metrics.gauge(f"{prefix}.connections", lambda: len(self._connections))
+        metrics.gauge(f"{prefix}.checked_out", self._count_checked_out)
+        self._wait_time = metrics.histogram(f"{prefix}.wait_time")
+        self._connects = metrics.counter(f"{prefix}.connects")
+        self._exhausted = metrics.counter(f"{prefix}.exhausted")
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.name}>"
+
+    def get_connection(self, command_name, *keys, **options):
+        started_at = time.monotonic()
+        try:
+            connection = super().get_connection(command_name, *keys, **options)
+        except ConnectionError as exc:
+            if str(exc) == "No connection available.":
+                self._exhausted.inc()
+            raise
+        self._wait_time.observe(time.monotonic() - started_at)
+        return connection
+
+    def make_connection(self):
+        connection = super().make_connection()
+        connection.register_connect_callback(self._on_connect)
+        return connection
+
+    def _on_connect(self, connection) -> None:
+        self._connects.inc()
+
+    def _count_checked_out(self) -> int:
+        available = sum(connection is not None for connection in list(self.pool.queue))
+        return len(self._connections) - available
+
+
+class RedisNode:
+    """Redis instance with passive health tracking.
+
+    After a connection error the node is used only as the last resort for `failover_cooldown` seconds.
+    """
+
+    def __init__(self, client: Redis, name: str, *, failover_cooldown: seconds = 5) -> None:
+        self.client = client
+        self.name = name
+        self.failover_cooldown = failover_cooldown
+
+        self._unhealthy_until = 0.0
+
+    def __repr__(self) -> str:
+        return f"<RedisNode {self.name}>"
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self._unhealthy_until
+
+    def mark_unhealthy(self) -> None:
+        self._unhealthy_until = time.monotonic() + self.failover_cooldown
+
+
+class RedisShard:
+    """Primary Redis node with read replicas."""
+
+    def __init__(self, primary: RedisNode, replicas: list[RedisNode] | None = None) -> None:
+        self.primary = primary
+        self.replicas = replicas or []
+
+        self._replica_counter = itertools.count()
+
+    @property
+    def name(self) -> str:
+        return self.primary.name
+
+    def get_nodes(self, *, write: bool = False) -> list[RedisNode]:
+        """Get nodes in the order of preference.
+
+        Writes go to the primary only. Reads go to healthy replicas (round robin), then to the primary,
+        unhealthy nodes are tried last.
+        """
+        if write or not self.replicas:
+            return [self.primary]
+        offset = next(self._replica_counter) % len(self.replicas)
+        nodes = self.replicas[offset:] + self.replicas[:offset] + [self.primary]
+        return sorted(nodes, key=lambda node: not node.healthy)
+
+
+class HashRing:
+    """Consistent hashing ring of Redis shards.
+
+    Keys with a hash tag (`{...}` part of the key) are placed by the tag, like in Redis Cluster.
+    """
+
+    replicas_per_shard = 160
+
+    def __init__(self, shards: list[RedisShard]) -> None:
+        self.shards = shards
+
+        ring = sorted(
+            (self._hash(f"{shard.name}#{index}"), shard_index)
+            for shard_index, shard in enumerate(shards)
+            for index in range(self.replicas_per_shard)
+        )
+        self._hashes = [point for point, _ in ring]
+        self._shard_indexes = [shard_index for _, shard_index in ring]
+
+    def get_shard(self, key: str) -> RedisShard:
+        """Get shard that stores the given key."""
+        if len(self.shards) == 1:
+            return self.shards[0]
+        index = bisect.bisect(self._hashes, self._hash(self._get_hash_tag(key))) % len(self._hashes)
+        return self.shards[self._shard_indexes[index]]
+
+    @staticmethod
+    def _get_hash_tag(key: str) -> str:
+        start = key.find("{")
+        if start != -1:
+            end = key.find("}", start + 1)
+            if end > start + 1:
+                return key[start + 1:end]
+        return key
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+# write the value only if the guard key hasn't changed since it was read
+SET_IF_UNCHANGED_SCRIPT = """
+if (redis.call("GET", KEYS[2]) or "") ~= ARGV[2] then
+    return 0
+end
+if ARGV[3] == "" then
+    redis.call("SET", KEYS[1], ARGV[1])
+else
+    redis.call("SET", KEYS[1], ARGV[1], "EX", ARGV[3])
+end
+return 1
+"""
 
 
 class RedisClient:
-    """Sync Redis client."""
+    """Sync Redis client.
+
+    Keys are spread over shards by consistent hashing. Writes go to the primary node of the key shard,
+    reads go to its replicas and fail over to other nodes of the shard on connection errors.
+    Multi-key commands are split by shards, every shard is called once.
+    """
 
-    def __init__(self, redis_client: Redis) -> None:
+    def __init__(self, redis_client: Redis, shards: list[RedisShard] | None = None) -> None:
         self._redis_client = redis_client
+        self._ring = HashRing(shards or [RedisShard(RedisNode(redis_client, "default"))])
+        self._set_if_unchanged = redis_client.register_script(SET_IF_UNCHANGED_SCRIPT)
 
     def get_client(self, key: str | None = None, *, write: bool = False) -> Redis:
         self.pre_init_client()
-        client = self._get_client(write=write)
+        client = self._get_client(key, write=write)
         self.post_init_client(client)
         return client
 
     def exists(self, *keys) -> int:
-        client = self.get_client()
-        return client.exists(*keys)
+        return sum(
+            self._execute(shard, lambda client, shard_keys=shard_keys: client.exists(*shard_keys))
+            for shard, shard_keys in self._group_by_shard(keys).items()
+        )
 
     def get(self, key: str, default: Any | None = None) -> Any:
-        client = self.get_client(key)
-        value = client.get(key)
+        value = self._execute(self._ring.get_shard(key), lambda client: client.get(key))
         return default if value is None else value
 
     def set(self, key: str, data: Any, *, timeout: seconds | timedelta | None = None) -> bool:
-        client = self.get_client(key, write=True)
-        if timeout is not None:
-            return client.setex(key, timeout, data)
-        return client.set(key, data) or False
+        def set_key(client: Redis) -> bool:
+            if timeout is not None:
+                return client.setex(key, timeout, data)
+            return client.set(key, data) or False
+        return self._execute(self._ring.get_shard(key), set_key, write=True)
 
     def delete(self, *keys: list[str]) -> int:
-        client = self.get_client()
-        return client.delete(*keys)
+        return self.delete_many(list(keys))
+
+    def get_many(self, keys: list[str]) -> list[Any]:
+        """Get values of the given keys with a single `MGET` per shard, missing keys are returned as `None`."""
+        values = {}
+        for shard, shard_keys in self._group_by_shard(keys).items():
+            shard_values = self._execute(shard, lambda client, shard_keys=shard_keys: client.mget(shard_keys))
+            values.update(zip(shard_keys, shard_values))
+        return [values[key] for key in keys]
+
+    def set_many(
+        self,
+        data: Mapping[str, Any],
+        *,
+        timeout: seconds | timedelta | Mapping[str, seconds | timedelta] | None = None,
+    ) -> bool:
+        """Save multiple keys in a single round trip per shard.
+
+        Keys without timeout are saved with `MSET`, otherwise `SET ... EX` commands are sent in a pipeline.
+        `timeout` can be given per key as a mapping.
+        """
+        def set_keys(client: Redis, shard_keys: list[str]) -> bool:
+            if timeout is None:
+                return client.mset({key: data[key] for key in shard_keys})
+            pipeline = client.pipeline(transaction=False)
+            for key in shard_keys:
+                key_timeout = timeout.get(key) if isinstance(timeout, Mapping) else timeout
+                pipeline.set(key, data[key], ex=key_timeout)
+            return all(pipeline.execute())
+
+        return all([
+            self._execute(shard, lambda client, shard_keys=shard_keys: set_keys(client, shard_keys), write=True)
+            for shard, shard_keys in self._group_by_shard(data).items()
+        ])
+
+    def set_if_unchanged(
+        self,
+        key: str,
+        data: Any,
+        *,
+        guard_key: str,
+        guard_value: str | None,
+        timeout: seconds | timedelta | None = None,
+    ) -> bool:
+        """Save the key only if the guard key still has the given value (`None` - missing), in a single round trip.
+
+        Both keys must have the same hash tag, so they are stored on the same shard.
+        """
+        if isinstance(timeout, timedelta):
+            timeout = int(timeout.total_seconds())
+
+        def set_key(client: Redis) -> bool:
+            args = [data, guard_value or "", "" if timeout is None else timeout]
+            return bool(self._set_if_unchanged(keys=[key, guard_key], args=args, client=client))
+
+        return self._execute(self._ring.get_shard(key), set_key, write=True)
+
+    def incr_many(self, keys: list[str], *, timeout: seconds | timedelta | None = None) -> None:
+        """Increment the given counters in a single round trip per shard, `timeout` is reset on every increment."""
+        def incr_keys(client: Redis, shard_keys: list[str]) -> None:
+            pipeline = client.pipeline(transaction=False)
+            for key in shard_keys:
+                pipeline.incr(key)
+                if timeout is not None:
+                    pipeline.expire(key, timeout)
+            pipeline.execute()
+
+        for shard, shard_keys in self._group_by_shard(keys).items():
+            self._execute(shard, lambda client, shard_keys=shard_keys: incr_keys(client, shard_keys), write=True)
+
+    def delete_many(self, keys: list[str]) -> int:
+        """Delete the given keys with a single `DEL` per shard."""
+        return sum(
+            self._execute(shard, lambda client, shard_keys=shard_keys: client.delete(*shard_keys), write=True)
+            for shard, shard_keys in self._group_by_shard(keys).items()
+        )
 
     def pre_init_client(self, *args, **kwargs) -> None:
         """Pre-init signal. Called before initializing Redis client."""
@@ -61,5 +381,24 @@ class RedisClient:
     def post_init_client(self, client: Redis, *args, **kwargs) -> None:
         """Post-init signal. called after initializing Redis client."""
 
-    def _get_client(self, *, write: bool = False) -> Redis:
-        return self._redis_client
+    def _get_client(self, key: str | None = None, *, write: bool = False) -> Redis:
+        shard = self._ring.shards[0] if key is None else self._ring.get_shard(key)
+        return shard.get_nodes(write=write)[0].client
+
+    def _group_by_shard(self, keys: Iterable[str]) -> dict[RedisShard, list[str]]:
+        shards_keys = defaultdict(list)
+        for key in keys:
+            shards_keys[self._ring.get_shard(key)].append(key)
+        return shards_keys
+
+    def _execute(self, shard: RedisShard, command: Callable[[Redis], Any], *, write: bool = False) -> Any:
+        error = None
+        for node in shard.get_nodes(write=write):
+            self.pre_init_client()
+            self.post_init_client(node.client)
+            try:
+                return command(node.client)
+            except (ConnectionError, TimeoutError) as exc:
+                node.mark_unhealthy()
+                error = exc
+        raise error
@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import TYPE_CHECKING, Callable
+
+from auth.common.types import seconds
+
+if TYPE_CHECKING:
+    from redis.client import PubSub
+
+    from .redis import RedisClient
+
+logger = logging.getLogger(__name__)
+
+
+def expires_at_from_timeout(timeout: seconds | timedelta) -> float:
+    """Convert timeout to the unix timestamp."""
+    return time.time() + _to_seconds(timeout)
+
+
+def _to_seconds(timeout: seconds | timedelta) -> float:
+    if isinstance(timeout, timedelta):
+        return timeout.total_seconds()
+    return timeout
+
+
+# set user tokens generation to the bump time and notify subscribers in a single round trip;
+# generations that don't revoke any unexpired tokens are dropped, a bounded number per call
+BUMP_GENERATION_SCRIPT = """
+local current = tonumber(redis.call("HGET", KEYS[1], ARGV[1]) or "0")
+local generation = string.format("%d", math.max(current + 1, tonumber(ARGV[3])))
+redis.call("HSET", KEYS[1], ARGV[1], generation)
+redis.call("ZADD", KEYS[2], ARGV[3], ARGV[1])
+local expired = redis.call("ZRANGEBYSCORE", KEYS[2], "-inf", ARGV[4], "LIMIT", 0, 100)
+if #expired > 0 then
+    redis.call("HDEL", KEYS[1], unpack(expired))
+    redis.call("ZREM", KEYS[2], unpack(expired))
+end
+local event = cjson.encode({type = "generation", user_id = ARGV[1], generation = tonumber(generation)})
+redis.call("PUBLISH", ARGV[2], event)
+return generation
+"""
+
+GENERATION_DROP_MARGIN = 60
+
+# generations below are counters set before generations became bump timestamps (ms), they never expire
+MIN_TIMESTAMP_GENERATION = 10 ** 12
+
+
+class RevocationFeed:
+    """Redis feed of revoked tokens.
+
+    Revoked JTIs are saved to a sorted set (score - token expiration time) that is used as a snapshot
+    for resyncing local caches, and published to a channel for updating local caches in real time.
+    User-wide revocations are stored as per-user tokens generations in a hash. Generation is the time of the last
+    bump (ms), it revokes tokens issued before the bump, so it expires together with them after `generation_ttl`
+    and is then dropped from the hash.
+    All feed keys are routed by the channel name, so they are kept on the same Redis shard as the channel.
+    Snapshots are read and the channel is subscribed on the shard primary: a lagging replica could miss revocations
+    published before the subscription.
+
+    Attributes:
+        channel: pub/sub channel with revocation events.
+        index_key: key of the sorted set with revoked JTIs.
+        generations_key: key of the hash with users tokens generations.
+        generation_ttl: lifetime of the longest-living tokens.
+    """
+
+    def __init__(
+        self,
+        redis_client: RedisClient,
+        channel: str,
+        index_key: str,
+        generations_key: str,
+        generation_ttl: seconds | timedelta,
+    ) -> None:
+        self.channel = channel
+        self.index_key = index_key
+        self.generations_key = generations_key
+        self.generation_ttl = generation_ttl
+
+        self._redis_client = redis_client
+        self._bump_generation = None
+
+    def publish_revoked_tokens(self, revoked_tokens: dict[str, float]) -> None:
+        """Save revoked tokens (JTI -> expiration time) to the snapshot and notify subscribers in one round trip."""
+        client = self._redis_client.get_client(self.channel, write=True)
+        pipeline = client.pipeline(transaction=False)
+        pipeline.zadd(self.index_key, revoked_tokens)
+        pipeline.zremrangebyscore(self.index_key, "-inf", time.time())
+        for jti, expires_at in revoked_tokens.items():
+            pipeline.publish(self.channel, json.dumps({"type": "jti", "jti": jti, "exp": expires_at}))
+        pipeline.execute()
+
+    def get_revoked_tokens(self) -> dict[str, float]:
+        """Get all revoked tokens that have not expired yet."""
+        client = self._redis_client.get_client(self.channel, write=True)
+        revoked_tokens = client.zrangebyscore(self.index_key, time.time(), "+inf", withscores=True)
+        return dict(revoked_tokens)
+
+    def bump_user_generation(self, user_id: str) -> int:
+        """Increment user tokens generation, so all previously issued tokens become invalid."""
+        client = self._redis_client.get_client(self.channel, write=True)
+        if self._bump_generation is None:
+            self._bump_generation = client.register_script(BUMP_GENERATION_SCRIPT)
+        now = int(time.time() * 1000)
+        # dropped with a margin for clock skew, so all workers already treat the generation as expired
+        expired_before = now - int((_to_seconds(self.generation_ttl) + GENERATION_DROP_MARGIN) * 1000)
+        generation = self._bump_generation(
+            keys=[self.generations_key, f"{self.generations_key}:bumps"],
+            args=[user_id, self.channel, now, expired_before],
+            client=client,
+        )
+        return int(generation)
+
+    def is_generation_expired(self, generation: int) -> bool:
+        """Check whether all tokens revoked by the generation have expired, so it doesn't revoke anything."""
+        if generation < MIN_TIMESTAMP_GENERATION:
+            return False
+        return generation < (time.time() - _to_seconds(self.generation_ttl)) * 1000
+
+    def get_user_generation(self, user_id: str) -> int:
+        """Get current user tokens generation."""
+        # read from the primary: new tokens must not be issued with a generation that is already revoked
+        client = self._redis_client.get_client(self.channel, write=True)
+        return int(client.hget(self.generations_key, user_id) or 0)
+
+    def get_user_generations(self) -> dict[str, int]:
+        """Get tokens generations of all users who have revoked their tokens."""
+        client = self._redis_client.get_client(self.channel, write=True)
+        generations = client.hgetall(self.generations_key)
+        return {user_id: int(generation) for user_id, generation in generations.items()}
+
+    def publish_event(self, event_type: str, **data) -> None:
+        """Notify subscribers about changes of other locally cached data."""
+        client = self._redis_client.get_client(self.channel, write=True)
+        client.publish(self.channel, json.dumps({"type": event_type, **data}))
+
+    def subscribe(self) -> PubSub:
+        """Subscribe to revocation events."""
+        client = self._redis_client.get_client(self.channel, write=True)
+        pubsub = client.pubsub()
+        pubsub.subscribe(self.channel)
+        return pubsub
+
+
+class LocalRevocationCache:
+    """Process-local tier of the revoked tokens storage.
+
+    TTL set of revoked JTIs and users tokens generations, kept current by the `RevocationFeed` subscription.
+    Answers are given only while the subscription is alive and the cache is synced with the snapshot,
+    otherwise callers have to fall back to Redis.
+
+    Other process-local caches can subscribe to their invalidation events published to the same feed.
+
+    Attributes:
+        enabled: whether the local cache is used.
+        ping_interval: interval for checking subscription health when there are no events.
+        reconnect_delay: delay before resubscribing after the subscription drops.
+    """
+
+    def __init__(
+        self, feed: RevocationFeed, *, enabled: bool = True, ping_interval: seconds = 5, reconnect_delay: seconds = 1,
+    ) -> None:
+        self.enabled = enabled
+        self.ping_interval = ping_interval
+        self.reconnect_delay = reconnect_delay
+
+        self._feed = feed
+        self._revoked: dict[str, float] = {}
+        self._generations: dict[str, int] = {}
+        self._expirations: list[tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._listener: threading.Thread | None = None
+        self._event_handlers: dict[str, list[Callable[[dict], None]]] = defaultdict(list)
+        self._resync_handlers: list[Callable[[], None]] = []
+
+    @property
+    def synced(self) -> bool:
+        return self._synced.is_set()
+
+    def is_available(self) -> bool:
+        """Check whether local caches are kept current by the feed subscription."""
+        if not self.enabled:
+            return False
+        self.start()
+        return self.synced
+
+    def add_event_handler(self, event_type: str, handler: Callable[[dict], None]) -> None:
+        """Register handler for the feed events of the given type."""
+        self._event_handlers[event_type].append(handler)
+
+    def add_resync_handler(self, handler: Callable[[], None]) -> None:
+        """Register handler that is called when events might have been missed, and local data must be dropped."""
+        self._resync_handlers.append(handler)
+
+    def is_revoked(self, jti: str) -> bool | None:
+        """Check if token is revoked.
+
+        Returns `None` if the local cache cannot answer, and Redis has to be checked.
+        """
+        if not self.is_available():
+            return None
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def get_user_generation(self, user_id: str) -> int | None:
+        """Get current user tokens generation.
+
+        Returns `None` if the local cache cannot answer, and Redis has to be checked.
+        """
+        if not self.is_available():
+            return None
+        return self._generations.get(user_id, 0)
+
+    def set_user_generation(self, user_id: str, generation: int) -> None:
+        """Update user tokens generation in the local cache."""
+        with self._lock:
+            self._generations[user_id] = max(generation, self._generations.get(user_id, 0))
+
+    def add(self, jti: str, expires_at: float) -> None:
+        """Add revoked token to the local cache."""
+        with self._lock:
+            self._add(jti, expires_at)
+            self._prune()
+
+    def start(self) -> None:
+        """Start listening to revocation events (if not started yet)."""
+        if self._listener is not None or self._stopped.is_set():
+            return
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = threading.Thread(target=self._listen, name="revocation-listener", daemon=True)
+            self._listener.start()
+
+    def stop(self) -> None:
+        """Stop listening to revocation events."""
+        self._stopped.set()
+        self._synced.clear()
+
+    def _listen(self) -> None:
+        while not self._stopped.is_set():
+            pubsub = None
+            try:
+                pubsub = self._feed.subscribe()
+                # wait for the subscription to be confirmed, so no events are lost between the snapshot and the stream
+                pubsub.get_message(timeout=self.ping_interval)
+                self._resync()
+                self._consume(pubsub)
+            except Exception:
+                logger.exception("Revocation feed subscription dropped, falling back to Redis")
+            finally:
+                self._synced.clear()
+                if pubsub is not None:
+                    pubsub.close()
+            self._stopped.wait(self.reconnect_delay)
+
+    def _resync(self) -> None:
+        revoked_tokens = self._feed.get_revoked_tokens()
+        generations = self._feed.get_user_generations()
+        # snapshots are merged: revocations received after they were read must not be lost
+        with self._lock:
+            for jti, expires_at in revoked_tokens.items():
+                self._add(jti, expires_at)
+            self._prune()
+            for user_id, generation in self._generations.items():
+                if not self._feed.is_generation_expired(generation):
+                    generations[user_id] = max(generation, generations.get(user_id, 0))
+            self._generations = generations
+        for handler in self._resync_handlers:
+            handler()
+        self._synced.set()
+
+    def _consume(self, pubsub: PubSub) -> None:
+        last_seen = time.monotonic()
+        while not self._stopped.is_set():
+            message = pubsub.get_message(timeout=self.ping_interval)
+            if message is not None:
+                last_seen = time.monotonic()
+                if message["type"] == "message":
+                    self._handle_event(json.loads(message["data"]))
+                continue
+            if time.monotonic() - last_seen > 2 * self.ping_interval:
+                raise ConnectionError("Revocation feed subscription is not responding")
+            pubsub.ping()
+
+    def _handle_event(self, event: dict) -> None:
+        if event["type"] == "jti":
+            self.add(event["jti"], event["exp"])
+        elif event["type"] == "generation":
+            self.set_user_generation(event["user_id"], event["generation"])
+        for handler in self._event_handlers[event["type"]]:
+            handler(event)
+
+    def _add(self, jti: str, expires_at: float) -> None:
+        self._revoked[jti] = expires_at
+        heapq.heappush(self._expirations, (expires_at, jti))
+
+    def _prune(self) -> None:
+        now = time.time()
+        while self._expirations and self._expirations[0][0] <= now:
+            _, jti = heapq.heappop(self._expirations)
+            if self._revoked.get(jti, now + 1) <= now:
+                del self._revoked[jti]
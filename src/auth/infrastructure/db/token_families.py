@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import enum
+import time
+from datetime import timedelta
+from typing import TYPE_CHECKING, NamedTuple
+
+from auth.common.types import seconds
+
+if TYPE_CHECKING:
+    from .redis import RedisClient
+
+
+# check the presented refresh token against the family state and rotate it in a single round trip;
+# a token that has already been rotated marks the whole family as reused and removes it from the user sessions
+ROTATE_SCRIPT = """
+local state = redis.call("HMGET", KEYS[1], "jti", "reused")
+if not state[1] then
+    return 0
+end
+if state[2] then
+    return -2
+end
+if state[1] ~= ARGV[1] then
+    redis.call("HSET", KEYS[1], "reused", ARGV[1])
+    redis.call("ZREM", KEYS[2], ARGV[4])
+    return -1
+end
+redis.call("HSET", KEYS[1], "jti", ARGV[2])
+redis.call("EXPIRE", KEYS[1], ARGV[3])
+redis.call("ZADD", KEYS[2], ARGV[5], ARGV[4])
+redis.call("ZREMRANGEBYSCORE", KEYS[2], "-inf", ARGV[6])
+redis.call("EXPIRE", KEYS[2], ARGV[3])
+return 1
+"""
+
+METADATA_FIELDS = ("created_at", "ip_addr", "user_agent", "device_type")
+
+
+class RotationResult(enum.IntEnum):
+    """Result of the refresh token rotation."""
+
+    ROTATED = 1
+    # family has expired or has been revoked
+    UNKNOWN = 0
+    # rotated token has been presented, family is marked as reused now
+    REUSED = -1
+    # family has been marked as reused before
+    DEAD = -2
+
+
+class FamilyState(NamedTuple):
+    """Active family of the user sessions index."""
+
+    family_id: str
+    expires_at: float
+    metadata: dict[str, str]
+
+
+class RefreshTokenFamilies:
+    """Redis storage of refresh token families.
+
+    Family is a chain of refresh tokens issued by rotation starting from a login. Its state is a small hash
+    (user ID, JTI of the current refresh token and the login device metadata) that lives as long as the current
+    refresh token. Presenting any other token of the family means that a rotated token has leaked, so the family
+    is marked as reused and is never rotated again.
+
+    Active families of a user are indexed in a sorted set scored by the expiration time of their current refresh
+    tokens, expired families are pruned on writes. Keys of a user share the hash tag, so they are stored
+    on the same Redis shard and are updated together in a single round trip.
+
+    Attributes:
+        key_prefix: prefix of the families hashes keys.
+        sessions_key_prefix: prefix of the users sessions indexes keys.
+    """
+
+    def __init__(self, redis_client: RedisClient, key_prefix: str, sessions_key_prefix: str) -> None:
+        self.key_prefix = key_prefix
+        self.sessions_key_prefix = sessions_key_prefix
+
+        self._redis_client = redis_client
+        self._rotate = None
+
+    def start(
+        self,
+        user_id: str,
+        family_id: str,
+        jti: str,
+        timeout: seconds | timedelta,
+        metadata: dict[str, str] | None = None,
+    ) -> None:
+        """Start a new family with the given refresh token and add it to the user sessions."""
+        key, sessions_key = self._get_key(user_id, family_id), self._get_sessions_key(user_id)
+        timeout = _to_seconds(timeout)
+        now = time.time()
+        client = self._redis_client.get_client(key, write=True)
+        pipeline = client.pipeline(transaction=False)
+        pipeline.hset(key, mapping={"user": user_id, "jti": jti, "created_at": int(now), **(metadata or {})})
+        pipeline.expire(key, timeout)
+        pipeline.zadd(sessions_key, {family_id: now + timeout})
+        pipeline.zremrangebyscore(sessions_key, "-inf", now)
+        pipeline.expire(sessions_key, timeout)
+        pipeline.execute()
+
+    def rotate(
+        self, user_id: str, family_id: str, jti: str, new_jti: str, timeout: seconds | timedelta,
+    ) -> RotationResult:
+        """Replace the current refresh token of the family if the presented token is the current one."""
+        key, sessions_key = self._get_key(user_id, family_id), self._get_sessions_key(user_id)
+        timeout = _to_seconds(timeout)
+        now = time.time()
+        client = self._redis_client.get_client(key, write=True)
+        if self._rotate is None:
+            self._rotate = client.register_script(ROTATE_SCRIPT)
+        result = self._rotate(
+            keys=[key, sessions_key], args=[jti, new_jti, timeout, family_id, now + timeout, now], client=client,
+        )
+        return RotationResult(int(result))
+
+    def revoke(self, user_id: str, family_id: str) -> bool:
+        """Delete family, so its refresh tokens can't be rotated anymore, and remove it from the user sessions."""
+        sessions_key = self._get_sessions_key(user_id)
+        client = self._redis_client.get_client(sessions_key, write=True)
+        pipeline = client.pipeline(transaction=False)
+        pipeline.delete(self._get_key(user_id, family_id))
+        pipeline.zrem(sessions_key, family_id)
+        deleted, removed = pipeline.execute()
+        return bool(deleted or removed)
+
+    def revoke_all(self, user_id: str) -> None:
+        """Drop the user sessions index, families are left to expire."""
+        self._redis_client.delete(self._get_sessions_key(user_id))
+
+    def get_active(self, user_id: str) -> list[FamilyState]:
+        """Get active families of the user, the most recently used first."""
+        sessions_key = self._get_sessions_key(user_id)
+        client = self._redis_client.get_client(sessions_key)
+        families = client.zrevrangebyscore(sessions_key, "+inf", time.time(), withscores=True)
+        if not families:
+            return []
+        pipeline = client.pipeline(transaction=False)
+        for family_id, _ in families:
+            pipeline.hmget(self._get_key(user_id, family_id), METADATA_FIELDS)
+        return [
+            FamilyState(family_id, expires_at, dict(zip(METADATA_FIELDS, values)))
+            for (family_id, expires_at), values in zip(families, pipeline.execute())
+            # family could expire between the commands
+            if values[0] is not None
+        ]
+
+    def _get_key(self, user_id: str, family_id: str) -> str:
+        return f"{self.key_prefix}{{{user_id}}}:{family_id}"
+
+    def _get_sessions_key(self, user_id: str) -> str:
+        return f"{self.sessions_key_prefix}{{{user_id}}}"
+
+
+def _to_seconds(timeout: seconds | timedelta) -> int:
+    if isinstance(timeout, timedelta):
+        return int(timeout.total_seconds())
+    return int(timeout)
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
 from typing import TYPE_CHECKING
+from uuid import UUID
 
 from dependency_injector.wiring import Provide, inject
 from flask_jwt_extended import JWTManager
+from flask_jwt_extended.exceptions import JWTDecodeError
 
+from flask import g
+
+from auth.common.exceptions import ImproperlyConfiguredError
 from auth.containers import Container
 from auth.core.config import get_settings
 from auth.domain.users import types
@@ -12,6 +17,7 @@ from auth.domain.users import types
 if TYPE_CHECKING:
     from flask import Flask
 
+    from auth.domain.users.keyring import KeyRing, PrivateKey, PublicKey
     from auth.domain.users.repositories import UserRepository
     from auth.infrastructure.db.jwt_storage import JWTStorage
 
@@ -25,12 +31,18 @@ jwt_manager = JWTManager()
 def user_lookup_callback(
     jwt_header: dict, jwt_data: dict,
     user_repository: UserRepository = Provide[Container.user_package.user_repository],
-) -> types.User | None:
+) -> types.User | types.LazyUser | None:
     """Get user by identity claim from token.
 
+    If lazy user loading is enabled, user is built from the token claims,
+    and the database is queried only when endpoint needs other user fields.
+
     https://flask-jwt-extended.readthedocs.io/en/stable/api/#flask_jwt_extended.JWTManager.user_lookup_loader
     """
     identity = jwt_data["sub"]
+    if settings.JWT_LAZY_USER_LOADING:
+        return types.LazyUser(
+            id=UUID(identity), roles_names=jwt_data.get("roles", []), loader=user_repository.get_active_or_none)
     user = user_repository.get_active_or_none(identity)
     return user
 
@@ -42,15 +54,68 @@ def revoked_token_callback(
 ) -> bool:
     """Validate tokens.
 
+    Token is revoked by its JTI, by its refresh token family or by the user tokens generation.
+
     https://flask-jwt-extended.readthedocs.io/en/stable/api/#flask_jwt_extended.JWTManager.token_in_blocklist_loader
     """
-    jti = jwt_payload["jti"]
-    return jwt_storage.is_token_revoked(jti)
+    revocation_ids = [jwt_payload["jti"], jwt_payload["fid"]] if "fid" in jwt_payload else [jwt_payload["jti"]]
+    if jwt_storage.is_any_revoked(revocation_ids):
+        return True
+    return jwt_storage.is_generation_revoked(jwt_payload["sub"], jwt_payload.get("gen", 0))
+
+
+@jwt_manager.additional_headers_loader
+@inject
+def additional_headers_callback(identity: str, key_ring: KeyRing = Provide[Container.user_package.key_ring]) -> dict:
+    """Add `kid` and `alg` of the signing key to the token header.
+
+    The key is stored for `encode_key_callback`, so the header and the signature match even if the key is rotated
+    between callbacks. `alg` overrides `JWT_ALGORITHM`: the key of the previous algorithm signs tokens
+    until a key of the configured one is activated.
+    """
+    signing_key = g.jwt_signing_key = key_ring.active_key
+    if signing_key is None:
+        return {}
+    return {"kid": signing_key.kid, "alg": signing_key.algorithm}
+
+
+@jwt_manager.encode_key_loader
+def encode_key_callback(identity: str) -> str | PrivateKey:
+    """Get key for signing a token."""
+    signing_key = g.pop("jwt_signing_key", None)
+    if signing_key is not None:
+        return signing_key.private_key
+    if settings.JWT_ALGORITHM != "HS256":
+        raise ImproperlyConfiguredError(message="There is no active token signing key")
+    return settings.JWT_SECRET_KEY
+
+
+@jwt_manager.decode_key_loader
+@inject
+def decode_key_callback(
+    jwt_header: dict, jwt_data: dict, key_ring: KeyRing = Provide[Container.user_package.key_ring],
+) -> str | PublicKey:
+    """Get key for verifying a token by the `kid` header.
+
+    Key is accepted only for its own algorithm, so a public key can't be used as an HMAC secret.
+    """
+    kid = jwt_header.get("kid")
+    if kid is None:
+        accept_secret_key = settings.JWT_ALGORITHM == "HS256" or settings.JWT_ACCEPT_SECRET_KEY_TOKENS
+        if jwt_header["alg"] == "HS256" and accept_secret_key:
+            return settings.JWT_SECRET_KEY
+        raise JWTDecodeError("Token signing key is not specified")
+    verification_key = key_ring.get_key(kid)
+    if verification_key is None or verification_key.algorithm != jwt_header["alg"]:
+        raise JWTDecodeError("Unknown token signing key")
+    return verification_key.public_key
 
 
 def init_jwt(app: Flask) -> None:
     """JWT configuration."""
     app.config["JWT_SECRET_KEY"] = settings.JWT_SECRET_KEY
+    app.config["JWT_ALGORITHM"] = settings.JWT_ALGORITHM
+    app.config["JWT_DECODE_ALGORITHMS"] = ["HS256", "RS256", "EdDSA"]
     app.config["JWT_ACCESS_TOKEN_EXPIRES"] = settings.JWT_ACCESS_TOKEN_EXPIRES
     app.config["JWT_REFRESH_TOKEN_EXPIRES"] = settings.JWT_REFRESH_TOKEN_EXPIRES
     jwt_manager.init_app(app)
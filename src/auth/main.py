@@ -2,6 +2,7 @@ import logging
 
 from flask import Flask
 
+from auth.commands import init_commands
 from auth.containers import Container, override_providers
 from auth.core.config import get_settings
 from auth.domain.social.authlib import init_authlib
@@ -36,15 +37,18 @@ def create_app() -> Flask:
     init_jwt(app)
     init_limiter(app)
     init_authlib(app, container.social_package)
+    init_commands(app)
 
     _configure_tracer(app)
 
     app.container = container
 
     from auth.api.v1.namespaces import blueprint as api_v1  # noqa: F401
+    from auth.api.well_known import well_known
 
     init_error_handlers(app)
     app.register_blueprint(api_v1)
+    app.register_blueprint(well_known)
     return app
 
 
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Callable
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    """Monotonically increasing counter."""
+
+    def __init__(self) -> None:
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def collect(self) -> int:
+        return self._value
+
+
+class Gauge:
+    """Current value, either set explicitly or read from the callback on collection."""
+
+    def __init__(self, callback: Callable[[], float] | None = None) -> None:
+        self._value = 0
+        self._callback = callback
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def collect(self) -> float:
+        if self._callback is not None:
+            return self._callback()
+        return self._value
+
+
+class Histogram:
+    """Distribution of observed values (e.g. latencies in seconds) with cumulative buckets."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._count += 1
+            self._sum += value
+            self._max = max(self._max, value)
+
+    def collect(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            count, sum_, max_ = self._count, self._sum, self._max
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = count
+        return {"count": count, "sum": sum_, "max": max_, "buckets": buckets}
+
+
+class MetricsRegistry:
+    """Process-local registry of service metrics.
+
+    Metrics are identified by name, repeated registrations return the existing metric.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str) -> Counter:
+        return self._register(name, Counter)
+
+    def gauge(self, name: str, callback: Callable[[], float] | None = None) -> Gauge:
+        return self._register(name, Gauge, callback)
+
+    def histogram(self, name: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(name, Histogram, buckets)
+
+    def collect(self) -> dict:
+        """Get current values of all metrics."""
+        return {name: metric.collect() for name, metric in sorted(self._metrics.items())}
+
+    def _register(self, name: str, metric_class: type, *args):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(*args)
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"Metric <{name}> is already registered as {type(metric).__name__}")
+        return metric
+
+
+metrics = MetricsRegistry()
@@ -14,6 +14,9 @@ def register_before_request(app: Flask) -> None:
 
     @app.before_request
     def before_request() -> None:
+        # public discovery documents are fetched by generic clients
+        if request.blueprint == "well_known":
+            return
         request_id = request.headers.get("X-Request-Id")
         if not request_id:
             raise RequiredHeaderMissingError(message="Required header `X-Request-Id` is missing")
@@ -8,6 +8,8 @@ from flask import current_app
 
 from alembic import context
 
+from auth.infrastructure.db.postgres import disable_statement_timeout
+
 if TYPE_CHECKING:
     from sqlalchemy import Table
 
@@ -84,6 +86,8 @@ def run_migrations_online():
         )
 
         with context.begin_transaction():
+            # migrations are run in a single transaction, DDL on large tables must not be cancelled halfway
+            disable_statement_timeout(connection)
             context.run_migrations()
 
 
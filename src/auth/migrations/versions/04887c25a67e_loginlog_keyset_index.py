@@ -0,0 +1,22 @@
+"""Login History keyset pagination index.
+
+Revision ID: 04887c25a67e
+Revises: 485b289b185c
+Create Date: 2026-10-18 14:21:07.530918
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "04887c25a67e"
+down_revision = "485b289b185c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("loginlog_user_id_created_at_id_idx", "loginlog", ["user_id", "created_at", "id"])
+
+
+def downgrade():
+    op.drop_index("loginlog_user_id_created_at_id_idx", table_name="loginlog")
@@ -0,0 +1,77 @@
+"""Login History monthly partitions.
+
+Revision ID: 485b289b185c
+Revises: 3c98c28c5d5b
+Create Date: 2026-10-18 12:04:51.218403
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "485b289b185c"
+down_revision = "3c98c28c5d5b"
+branch_labels = None
+depends_on = None
+
+DEVICE_TYPES = ("PC", "MOBILE", "TABLET")
+
+
+def upgrade():
+    # unique constraints of a partitioned table have to include all partition keys
+    op.drop_constraint("loginlog_uq_id_device_type", "loginlog", type_="unique")
+    op.drop_constraint("loginlog_id_device_type_key", "loginlog", type_="unique")
+    op.drop_constraint("loginlog_pkey", "loginlog", type_="primary")
+    for device_type in DEVICE_TYPES:
+        partition = f"loginlog_{device_type.lower()}"
+        op.execute(f"""ALTER TABLE loginlog DETACH PARTITION {partition}""")
+        op.execute(f"""ALTER TABLE {partition} RENAME TO {partition}_legacy""")
+    op.create_primary_key("loginlog_pkey", "loginlog", ["id", "device_type", "created_at"])
+
+    # existing records stay in the legacy partitions, which are attached as ranges up to the current month;
+    # records of the current month are moved to the default partitions until monthly partitions are created
+    current_month = op.get_bind().execute(sa.text("SELECT CAST(date_trunc('month', LOCALTIMESTAMP) AS date)")).scalar()
+    for device_type in DEVICE_TYPES:
+        partition = f"loginlog_{device_type.lower()}"
+        op.execute(f"""
+            CREATE TABLE {partition} PARTITION OF loginlog FOR VALUES IN ('{device_type}')
+            PARTITION BY RANGE (created_at)
+        """)
+        op.execute(f"""CREATE TABLE {partition}_default PARTITION OF {partition} DEFAULT""")
+        op.execute(f"""
+            WITH moved AS (DELETE FROM {partition}_legacy WHERE created_at >= '{current_month}' RETURNING *)
+            INSERT INTO loginlog SELECT * FROM moved
+        """)
+        op.execute(f"""
+            ALTER TABLE {partition} ATTACH PARTITION {partition}_legacy
+            FOR VALUES FROM (MINVALUE) TO ('{current_month}')
+        """)
+
+
+def downgrade():
+    op.execute("""CREATE TABLE loginlog_backup AS SELECT * FROM loginlog""")
+    op.drop_table("loginlog")
+    op.create_table(
+        "loginlog",
+        sa.Column("created_at", sa.TIMESTAMP(), nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(), nullable=False),
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("user_agent", sa.String(length=255), nullable=False),
+        sa.Column("ip_addr", sa.String(length=255), nullable=True),
+        sa.Column(
+            "device_type",
+            postgresql.ENUM(*DEVICE_TYPES, name="device_type", create_type=False),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(("user_id",), ["user.id"]),
+        sa.PrimaryKeyConstraint("id", "device_type"),
+        sa.UniqueConstraint("id", "device_type"),
+        postgresql_partition_by="LIST (device_type)",
+    )
+    op.create_unique_constraint("loginlog_uq_id_device_type", "loginlog", ["id", "device_type"])
+    for device_type in DEVICE_TYPES:
+        op.execute(f"""CREATE TABLE loginlog_{device_type.lower()} PARTITION OF loginlog FOR VALUES IN ('{device_type}')""")
+    op.execute("""INSERT INTO loginlog SELECT * FROM loginlog_backup""")
+    op.execute("""DROP TABLE loginlog_backup""")
@@ -0,0 +1,33 @@
+"""JWT signing keys.
+
+Revision ID: 9f3b2d71c4a8
+Revises: 04887c25a67e
+Create Date: 2026-10-18 16:42:13.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "9f3b2d71c4a8"
+down_revision = "04887c25a67e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "jwt_signing_key",
+        sa.Column("created_at", sa.TIMESTAMP(), nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(), nullable=False),
+        sa.Column("kid", sa.String(length=64), nullable=False),
+        sa.Column("algorithm", sa.String(length=16), nullable=False),
+        sa.Column("private_key", sa.Text(), nullable=False),
+        sa.Column("activates_at", sa.TIMESTAMP(), nullable=False),
+        sa.Column("expires_at", sa.TIMESTAMP(), nullable=True),
+        sa.PrimaryKeyConstraint("kid"),
+    )
+
+
+def downgrade():
+    op.drop_table("jwt_signing_key")
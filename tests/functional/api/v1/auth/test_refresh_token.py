@@ -51,6 +51,21 @@ class TestRefreshToken(BaseClientTest):
 
         self.client.post("/api/v1/auth/refresh", headers=refresh_headers, expected_status_code=401, as_response=True)
 
+    def test_refresh_token_reuse(self, user_dto):
+        """Reuse of a rotated refresh token revokes all tokens issued since the login."""
+        _, refresh_token = self._user_login(self.client, user_dto)
+
+        refresh_headers = {"Authorization": f"Bearer {refresh_token}"}
+        got = self.client.post("/api/v1/auth/refresh", headers=refresh_headers, expected_status_code=200)["data"]
+        self.client.post("/api/v1/auth/refresh", headers=refresh_headers, expected_status_code=401, as_response=True)
+
+        new_refresh_headers = {"Authorization": f"Bearer {got['refresh_token']}"}
+        self.client.post(
+            "/api/v1/auth/refresh", headers=new_refresh_headers, expected_status_code=401, as_response=True,
+        )
+        access_headers = {"Authorization": f"Bearer {got['access_token']}"}
+        self.client.post("/api/v1/auth/logout", headers=access_headers, expected_status_code=401, as_response=True)
+
     def test_invalid_refresh_token(self, user_dto):
         """If refresh token from request headers is invalid, client will receive an appropriate error."""
         self._user_login(self.client, user_dto)
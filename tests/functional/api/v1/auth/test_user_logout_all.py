@@ -0,0 +1,44 @@
+from tests.functional.api.v1.base import AuthClientTest
+
+
+class TestUserLogoutAll(AuthClientTest):
+    """Tests for logging out from all devices."""
+
+    endpoint = "/api/v1/auth/logout-all"
+    method = "post"
+
+    jwt_invalid_access_token_status_code = 422
+
+    def test_ok(self, user_dto):
+        """After logging out from all devices, tokens from all sessions become invalid."""
+        access_token, refresh_token = self._user_login(user_dto)
+        another_access_token, another_refresh_token = self._user_login(user_dto)
+
+        access_headers = {"Authorization": f"Bearer {access_token}"}
+        self.anon_client.post("/api/v1/auth/logout-all", headers=access_headers, expected_status_code=204, anon=True)
+
+        another_access_headers = {"Authorization": f"Bearer {another_access_token}"}
+        another_refresh_headers = {"Authorization": f"Bearer {another_refresh_token}"}
+        self.anon_client.post(
+            "/api/v1/auth/logout", headers=another_access_headers, expected_status_code=401, anon=True)
+        self.anon_client.post(
+            "/api/v1/auth/refresh", headers=another_refresh_headers, expected_status_code=401, anon=True)
+
+    def test_can_login_again(self, user_dto):
+        """User can log in after logging out from all devices."""
+        access_token, _ = self._user_login(user_dto)
+        access_headers = {"Authorization": f"Bearer {access_token}"}
+        self.anon_client.post("/api/v1/auth/logout-all", headers=access_headers, expected_status_code=204, anon=True)
+
+        new_access_token, _ = self._user_login(user_dto)
+
+        new_access_headers = {"Authorization": f"Bearer {new_access_token}"}
+        self.anon_client.get(
+            "/api/v1/users/me/login-history", headers=new_access_headers, expected_status_code=200, anon=True)
+
+    def _user_login(self, user_dto) -> tuple[str, str]:
+        body = {"email": user_dto.email, "password": user_dto.password}
+        self.anon_client.post("/api/v1/auth/register", data=body, anon=True)
+        credentials = self.anon_client.post(
+            "/api/v1/auth/login", data=body, expected_status_code=200, anon=True)["data"]
+        return credentials["access_token"], credentials["refresh_token"]
@@ -1,5 +1,21 @@
+from ..base import Auth0ClientTest
+
+
 def test_ok(anon_client):
     """Endpoint /healthcheck returns 200 HTTP status."""
     got = anon_client.get("/api/v1/health/")
 
     assert got["status"] == "ok"
+
+
+class TestMetrics(Auth0ClientTest):
+    """Tests for the worker process metrics."""
+
+    endpoint = "/api/v1/health/metrics"
+    method = "get"
+
+    def test_ok(self):
+        """Endpoint /health/metrics returns metrics of the worker process to services."""
+        got = self.client.get(self.endpoint)
+
+        assert "password_hashing.in_flight" in got
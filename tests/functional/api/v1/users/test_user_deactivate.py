@@ -0,0 +1,40 @@
+import pytest
+
+from ..base import Auth0ClientTest
+
+
+class TestUserDeactivate(Auth0ClientTest):
+    """Tests for user deactivation."""
+
+    endpoint = "/api/v1/users/{user_id}/deactivate"
+    method = "post"
+    format_url = True
+
+    def test_ok(self, user_dto):
+        """After deactivation user can't log in and user tokens become invalid."""
+        user_id = self._register(user_dto)["id"]
+        body = {"email": user_dto.email, "password": user_dto.password}
+        credentials = self.anon_client.post("/api/v1/auth/login", data=body, expected_status_code=200)["data"]
+
+        self.client.post(f"/api/v1/users/{user_id}/deactivate", expected_status_code=204)
+
+        access_headers = {"Authorization": f"Bearer {credentials['access_token']}"}
+        self.anon_client.post("/api/v1/auth/logout", headers=access_headers, expected_status_code=401, anon=True)
+        self.anon_client.post("/api/v1/auth/login", data=body, expected_status_code=404)
+
+    def test_user_does_not_exist(self, user_uuid):
+        """If there is no user with the given ID, client will receive an appropriate error."""
+        self.client.post(f"/api/v1/users/{user_uuid}/deactivate", expected_status_code=404)
+
+    @pytest.fixture
+    def pre_auth_invalid_access_token(self, user_uuid):
+        return {"user_id": user_uuid}
+
+    @pytest.fixture
+    def pre_auth_no_credentials(self, user_uuid):
+        return {"user_id": user_uuid}
+
+    def _register(self, user_dto):
+        body = {"email": user_dto.email, "password": user_dto.password}
+        got = self.anon_client.post("/api/v1/auth/register", data=body)["data"]
+        return got
@@ -1,5 +1,10 @@
+import time
+
 from ..base import AuthClientTest
 
+# login history is written in background, with `NAA_LOGIN_LOG_FLUSH_INTERVAL` delay
+LOGIN_HISTORY_TIMEOUT = 5
+
 
 class TestUserLoginHistory(AuthClientTest):
     """Tests for receiving login history."""
@@ -11,7 +16,7 @@ class TestUserLoginHistory(AuthClientTest):
 
     def test_ok(self, user_dto):
         """User login history is recorded correctly."""
-        got = self.client.get("/api/v1/users/me/login-history")["data"]
+        got = self._get_login_history(expected_count=1)
 
         assert len(got) == 1
         assert got[0]["device_type"] == "pc"
@@ -21,10 +26,31 @@ class TestUserLoginHistory(AuthClientTest):
         for _ in range(2):
             self._login(user_dto)
 
-        pagination_params = {"page": 1, "per_page": 2}
-        got = self.client.get("/api/v1/users/me/login-history", params=pagination_params)["data"]
-
-        assert len(got) == 2
+        self._get_login_history(expected_count=3)
+
+        first_page = self.client.get("/api/v1/users/me/login-history", params={"per_page": 2, "with_count": "true"})
+        pagination_params = {"per_page": 2, "cursor": first_page["next"]}
+        last_page = self.client.get("/api/v1/users/me/login-history", params=pagination_params)
+
+        assert len(first_page["data"]) == 2
+        assert first_page["count"] == 3
+        assert len(last_page["data"]) == 1
+        assert last_page["next"] is None
+        assert "count" not in last_page
+        login_dates = [login_log["created_at"] for login_log in first_page["data"] + last_page["data"]]
+        assert login_dates == sorted(login_dates, reverse=True)
+
+    def test_invalid_cursor(self):
+        """Client receives an error if the cursor is malformed."""
+        self.client.get("/api/v1/users/me/login-history", params={"cursor": "XXX"}, expected_status_code=400)
+
+    def _get_login_history(self, expected_count: int) -> list[dict]:
+        deadline = time.monotonic() + LOGIN_HISTORY_TIMEOUT
+        while True:
+            got = self.client.get("/api/v1/users/me/login-history", params={"per_page": expected_count})["data"]
+            if len(got) >= expected_count or time.monotonic() > deadline:
+                return got
+            time.sleep(0.2)
 
     def _login(self, user_dto):
         body = {"email": user_dto.email, "password": user_dto.password}
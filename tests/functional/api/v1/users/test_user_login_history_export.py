@@ -0,0 +1,45 @@
+import csv
+import io
+import json
+import time
+
+from ..base import AuthClientTest
+
+# login history is written in background, with `NAA_LOGIN_LOG_FLUSH_INTERVAL` delay
+LOGIN_HISTORY_TIMEOUT = 5
+
+
+class TestUserLoginHistoryExport(AuthClientTest):
+    """Tests for exporting login history."""
+
+    endpoint = "/api/v1/users/me/login-history/export"
+    method = "get"
+
+    jwt_invalid_access_token_status_code = 422
+
+    def test_ndjson(self, user_dto):
+        """User login history is exported as NDJSON."""
+        self._wait_login_history()
+
+        got = self.client.get(self.endpoint, as_response=True)
+
+        assert got.headers["Content-Type"].startswith("application/x-ndjson")
+        records = [json.loads(line) for line in got.text.splitlines()]
+        assert len(records) == 1
+        assert records[0]["device_type"] == "pc"
+
+    def test_csv(self, user_dto):
+        """User login history is exported as CSV."""
+        self._wait_login_history()
+
+        got = self.client.get(self.endpoint, params={"format": "csv"}, as_response=True)
+
+        assert got.headers["Content-Type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(got.text)))
+        assert len(rows) == 1
+        assert rows[0]["device_type"] == "pc"
+
+    def _wait_login_history(self) -> None:
+        deadline = time.monotonic() + LOGIN_HISTORY_TIMEOUT
+        while not self.client.get("/api/v1/users/me/login-history")["data"] and time.monotonic() < deadline:
+            time.sleep(0.2)
@@ -0,0 +1,62 @@
+import pytest
+
+from ..base import Auth0ClientTest
+
+
+class TestUserRolesBulkCheck(Auth0ClientTest):
+    """Tests for bulk verification of users roles."""
+
+    endpoint = "/api/v1/users/roles/check"
+    method = "post"
+
+    def test_pairs(self, user_dto, role_dto):
+        """Client receives a bitmap with the result for every (user, role) pair."""
+        user_id = self._register(user_dto)["id"]
+        role_id = self._create_role(role_dto)["id"]
+        self.client.post(f"/api/v1/users/{user_id}/roles/{role_id}")
+        body = {
+            "pairs": [
+                {"user_id": user_id, "role_id": role_id},
+                {"user_id": user_id, "role_id": user_id},
+                {"user_id": role_id, "role_id": role_id},
+            ],
+        }
+
+        got = self.client.post(self.endpoint, json=body, expected_status_code=200)["data"]
+
+        assert got["bitmap"] == "100"
+
+    def test_combinations(self, user_dto, role_dto, user_uuid):
+        """Client receives a bitmap for all combinations of the given users and roles, user by user."""
+        user_id = self._register(user_dto)["id"]
+        role_id = self._create_role(role_dto)["id"]
+        self.client.post(f"/api/v1/users/{user_id}/roles/{role_id}")
+        body = {"user_ids": [user_uuid, user_id], "role_ids": [role_id, user_uuid]}
+
+        got = self.client.post(self.endpoint, json=body, expected_status_code=200)["data"]
+
+        assert got["bitmap"] == "0010"
+
+    def test_invalid_request(self, user_uuid):
+        """If request is incomplete or contains invalid IDs, client will receive an appropriate error."""
+        self.client.post(self.endpoint, json={"user_ids": [user_uuid]}, expected_status_code=400)
+        invalid_pairs = {"pairs": [{"user_id": "XXX", "role_id": "XXX"}]}
+        self.client.post(self.endpoint, json=invalid_pairs, expected_status_code=400)
+
+    @pytest.fixture
+    def pre_auth_invalid_access_token(self):
+        return {}
+
+    @pytest.fixture
+    def pre_auth_no_credentials(self):
+        return {}
+
+    def _register(self, user_dto):
+        body = {"email": user_dto.email, "password": user_dto.password}
+        got = self.anon_client.post("/api/v1/auth/register", data=body)["data"]
+        return got
+
+    def _create_role(self, role_dto):
+        body = {"name": role_dto.name, "description": role_dto.description}
+        got = self.client.post("/api/v1/roles", data=body)["data"]
+        return got
@@ -0,0 +1,53 @@
+import pytest
+
+from ..base import Auth0ClientTest
+
+
+class TestUserRolesGrant(Auth0ClientTest):
+    """Tests for bulk roles assignment."""
+
+    endpoint = "/api/v1/users/roles/grant"
+    method = "post"
+
+    def test_ok(self, user_dto, role_dto):
+        """All given roles are assigned to all given users, existing assignments are ignored."""
+        user_id = self._register(user_dto)["id"]
+        role_id = self._create_role(role_dto)["id"]
+        self.client.post(f"/api/v1/users/{user_id}/roles/{role_id}")
+        another_role_id = self._create_role(role_dto, name="another")["id"]
+        body = {"user_ids": [user_id], "role_ids": [role_id, another_role_id]}
+
+        got = self.client.post(self.endpoint, json=body, expected_status_code=200)["data"]
+
+        assert got["granted"] == 1
+        self.client.head(f"/api/v1/users/{user_id}/roles/{another_role_id}", expected_status_code=204)
+
+    def test_unknown_ids(self, user_uuid, role_uuid):
+        """Unknown users and roles are ignored."""
+        body = {"user_ids": [user_uuid], "role_ids": [role_uuid]}
+
+        got = self.client.post(self.endpoint, json=body, expected_status_code=200)["data"]
+
+        assert got["granted"] == 0
+
+    def test_invalid_request(self, user_uuid):
+        """If users or roles are missing, client will receive an appropriate error."""
+        self.client.post(self.endpoint, json={"user_ids": [user_uuid], "role_ids": []}, expected_status_code=400)
+
+    @pytest.fixture
+    def pre_auth_invalid_access_token(self):
+        return {}
+
+    @pytest.fixture
+    def pre_auth_no_credentials(self):
+        return {}
+
+    def _register(self, user_dto):
+        body = {"email": user_dto.email, "password": user_dto.password}
+        got = self.anon_client.post("/api/v1/auth/register", data=body)["data"]
+        return got
+
+    def _create_role(self, role_dto, name: str | None = None):
+        body = {"name": name or role_dto.name, "description": role_dto.description}
+        got = self.client.post("/api/v1/roles", data=body)["data"]
+        return got
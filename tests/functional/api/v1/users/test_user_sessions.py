@@ -0,0 +1,49 @@
+from ..base import AuthClientTest
+
+
+class TestUserSessions(AuthClientTest):
+    """Tests for listing and revoking active sessions."""
+
+    endpoint = "/api/v1/users/me/sessions"
+    method = "get"
+
+    jwt_invalid_access_token_status_code = 422
+
+    def test_ok(self, user_dto):
+        """Every login is an active session, the session of the request is marked as current."""
+        self._login(user_dto)
+
+        got = self.client.get("/api/v1/users/me/sessions")["data"]
+
+        assert len(got) == 2
+        assert [session["current"] for session in got].count(True) == 1
+        assert all(session["device_type"] == "pc" for session in got)
+
+    def test_revoke(self, user_dto):
+        """Tokens of the revoked session are rejected."""
+        access_token, refresh_token = self._login(user_dto)
+        sessions = self.client.get("/api/v1/users/me/sessions")["data"]
+        other_session = next(session for session in sessions if not session["current"])
+
+        self.client.delete(
+            f"/api/v1/users/me/sessions/{other_session['id']}", expected_status_code=204, as_response=True,
+        )
+
+        assert len(self.client.get("/api/v1/users/me/sessions")["data"]) == 1
+        self.anon_client.post(
+            "/api/v1/auth/refresh", headers={"Authorization": f"Bearer {refresh_token}"},
+            expected_status_code=401, as_response=True,
+        )
+        self.anon_client.post(
+            "/api/v1/auth/logout", headers={"Authorization": f"Bearer {access_token}"},
+            expected_status_code=401, as_response=True,
+        )
+
+    def test_revoke_unknown_session(self):
+        """Client receives an error if there is no such session."""
+        self.client.delete("/api/v1/users/me/sessions/XXX", expected_status_code=404)
+
+    def _login(self, user_dto) -> tuple[str, str]:
+        body = {"email": user_dto.email, "password": user_dto.password}
+        credentials = self.anon_client.post("/api/v1/auth/login", data=body, expected_status_code=200)["data"]
+        return credentials["access_token"], credentials["refresh_token"]
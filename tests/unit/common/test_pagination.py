@@ -0,0 +1,31 @@
+import datetime
+import uuid
+
+import pytest
+
+from auth.common.exceptions import InvalidCursorError
+from auth.common.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip():
+    """Cursor is decoded to the encoded ordering keys."""
+    created_at = datetime.datetime(2022, 6, 1, 12, 30, 15, 1234)
+    login_log_id = uuid.uuid4()
+
+    cursor = encode_cursor(created_at, login_log_id)
+
+    assert decode_cursor(cursor, datetime.datetime, uuid.UUID) == (created_at, login_log_id)
+
+
+@pytest.mark.parametrize("cursor", [
+    "!!!",
+    "bm90LWpzb24",
+    encode_cursor("2022-06-01"),
+    encode_cursor("xxx", "yyy"),
+    encode_cursor("2022-06-01T00:00:00", 5),
+    encode_cursor(None, str(uuid.uuid4())),
+])
+def test_invalid_cursor(cursor):
+    """Malformed cursors are rejected."""
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, datetime.datetime, uuid.UUID)
@@ -0,0 +1,28 @@
+import time
+
+from auth.domain.oauth.cache import VerifiedTokenCache
+
+
+def test_payload_cached_until_exp():
+    """Payload is served from cache until the token expires."""
+    cache = VerifiedTokenCache(maxsize=10)
+    cache.set("valid", {"exp": time.time() + 60, "scope": "read:roles"})
+    cache.set("expired", {"exp": time.time() - 1})
+
+    assert cache.get("valid")["scope"] == "read:roles"
+    assert cache.get("expired") is None
+    assert cache.get("unknown") is None
+
+
+def test_lru_eviction():
+    """The least recently used payload is evicted when cache is full."""
+    cache = VerifiedTokenCache(maxsize=2)
+    exp = time.time() + 60
+    cache.set("token1", {"exp": exp})
+    cache.set("token2", {"exp": exp})
+    cache.get("token1")
+    cache.set("token3", {"exp": exp})
+
+    assert len(cache) == 2
+    assert cache.get("token2") is None
+    assert cache.get("token1") is not None
@@ -0,0 +1,50 @@
+import pytest
+
+from auth.domain.oauth.exceptions import OAuthError
+from auth.domain.oauth.jwks import JWKSKeyStore
+
+JWKS_URL = "https://dummy.com/.well-known/jwks.json"
+
+
+def _jwks(*kids: str) -> dict:
+    return {"keys": [{"kty": "RSA", "kid": kid, "use": "sig", "n": "n", "e": "AQAB"} for kid in kids]}
+
+
+@pytest.fixture
+def jwks_store():
+    store = JWKSKeyStore(
+        JWKS_URL, default_ttl=600, min_ttl=60, max_ttl=3600, refresh_cooldown=30, request_timeout=5)
+    yield store
+    store.close()
+
+
+def test_keys_cached(jwks_store, requests_mock):
+    """Keys are fetched once and then served from memory."""
+    jwks_mock = requests_mock.get(JWKS_URL, json=_jwks("kid1"))
+
+    for _ in range(5):
+        key = jwks_store.get_key("kid1")
+
+    assert key["kid"] == "kid1"
+    assert jwks_mock.call_count == 1
+
+
+def test_ttl_from_cache_control(jwks_store):
+    """Keys ttl is taken from the `Cache-Control` header and clamped to configured bounds."""
+    assert jwks_store._get_ttl("public, max-age=120") == 120
+    assert jwks_store._get_ttl("max-age=5") == 60
+    assert jwks_store._get_ttl("max-age=86400") == 3600
+    assert jwks_store._get_ttl("no-cache") == 60
+    assert jwks_store._get_ttl(None) == 600
+
+
+def test_unknown_kid_refresh_rate_limited(jwks_store, requests_mock):
+    """Unknown `kid` triggers a single refresh within the cooldown."""
+    jwks_mock = requests_mock.get(JWKS_URL, [{"json": _jwks("kid1")}, {"json": _jwks("kid1", "kid2")}])
+    jwks_store.get_key("kid1")
+    jwks_store._last_refresh -= jwks_store.refresh_cooldown
+
+    assert jwks_store.get_key("kid2")["kid"] == "kid2"
+    with pytest.raises(OAuthError):
+        jwks_store.get_key("kid3")
+    assert jwks_mock.call_count == 2
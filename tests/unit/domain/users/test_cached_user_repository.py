@@ -0,0 +1,108 @@
+import dataclasses
+import uuid
+
+import pytest
+
+from auth.domain.users import types
+from auth.domain.users.repositories.cached_user_repository import CachedUserRepository
+from auth.domain.users.repositories.user_repository import UserRepository
+from auth.infrastructure.db.cache import LocalMemoryCache
+
+
+@pytest.fixture
+def user():
+    return types.User(id=uuid.uuid4(), email="user@example.com", password="hash", active=True, roles=[])
+
+
+@pytest.fixture
+def get_active_or_none(mocker, user):
+    return mocker.patch.object(UserRepository, "get_active_or_none", return_value=user)
+
+
+@pytest.fixture
+def local_revocation_cache(mocker):
+    cache = mocker.MagicMock()
+    cache.is_available.return_value = True
+    return cache
+
+
+@pytest.fixture
+def revocation_feed(mocker):
+    return mocker.MagicMock()
+
+
+@pytest.fixture
+def repository(mocker, revocation_feed, local_revocation_cache):
+    return CachedUserRepository(
+        mocker.MagicMock(),
+        mocker.MagicMock(),
+        LocalMemoryCache(maxsize=100),
+        LocalMemoryCache(maxsize=100),
+        revocation_feed,
+        local_revocation_cache,
+        ttl=300,
+        local_ttl=5,
+    )
+
+
+def test_cache_hit(repository, get_active_or_none, user):
+    """User is loaded from the database once."""
+    repository.get_active_or_none(user.id)
+
+    assert repository.get_active_or_none(user.id) == dataclasses.replace(user, password=None)
+    get_active_or_none.assert_called_once()
+
+
+def test_password_not_cached(repository, get_active_or_none, user):
+    """Password hash isn't copied to the shared cache."""
+    repository.get_active_or_none(user.id)
+
+    assert "hash" not in repository.cache.get(repository._get_user_key(user.id))
+    assert repository.get_active_or_none(user.id).password is None
+
+
+@pytest.mark.parametrize(
+    ("method", "args"),
+    [
+        ("change_password", lambda user: (user, "password")),
+        ("deactivate", lambda user: (user.id,)),
+        ("assign_role", lambda user: (user.id, uuid.uuid4())),
+        ("revoke_role", lambda user: (user.id, uuid.uuid4())),
+    ],
+)
+def test_invalidation(mocker, repository, get_active_or_none, revocation_feed, user, method, args):
+    """User changes drop the cached user in all processes."""
+    mocker.patch.object(UserRepository, method, return_value=user)
+    repository.get_active_or_none(user.id)
+
+    getattr(repository, method)(*args(user))
+    repository.get_active_or_none(user.id)
+
+    assert get_active_or_none.call_count == 2
+    revocation_feed.publish_event.assert_called_once_with("user", user_ids=[str(user.id)])
+
+
+def test_stale_write_back(repository, get_active_or_none, user):
+    """User loaded before a concurrent change is not written back to the cache."""
+    def load_before_change(user_id):
+        repository.invalidate(user_id)
+        return user
+
+    get_active_or_none.side_effect = load_before_change
+
+    repository.get_active_or_none(user.id)
+    get_active_or_none.side_effect = None
+    repository.get_active_or_none(user.id)
+
+    assert get_active_or_none.call_count == 2
+
+
+def test_user_event(repository, get_active_or_none, local_revocation_cache, user):
+    """Local entries are dropped on the `user` events of other processes."""
+    repository.get_active_or_none(user.id)
+    event_type, handler = local_revocation_cache.add_event_handler.call_args.args
+    assert event_type == "user"
+
+    handler({"type": "user", "user_ids": [str(user.id)]})
+
+    assert repository.local_cache.get(repository._get_user_key(user.id)) is None
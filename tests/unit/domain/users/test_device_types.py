@@ -0,0 +1,28 @@
+from auth.domain.users import types
+from auth.domain.users.device_types import DeviceTypeClassifier
+from auth.infrastructure.db.cache import LocalMemoryCache
+
+IPHONE_USER_AGENT = "Mozilla/5.0 (iPhone; CPU iPhone OS 13_2_3 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148"
+
+
+def test_classification_memoized(mocker):
+    """The same 'User Agent' is parsed only once."""
+    classifier = DeviceTypeClassifier(LocalMemoryCache(maxsize=10))
+    parse = mocker.spy(classifier, "_parse")
+
+    for _ in range(3):
+        device_type = classifier.classify(IPHONE_USER_AGENT)
+
+    assert device_type == types.LoginLog.DeviceType.MOBILE
+    assert parse.call_count == 1
+
+
+def test_warm_up(mocker):
+    """Known classifications are not parsed."""
+    classifier = DeviceTypeClassifier(LocalMemoryCache(maxsize=10))
+    parse = mocker.spy(classifier, "_parse")
+
+    classifier.warm_up({IPHONE_USER_AGENT: types.LoginLog.DeviceType.TABLET})
+
+    assert classifier.classify(IPHONE_USER_AGENT) == types.LoginLog.DeviceType.TABLET
+    parse.assert_not_called()
@@ -0,0 +1,58 @@
+import csv
+import datetime
+import io
+import json
+import uuid
+
+import pytest
+
+from auth.domain.users import types
+from auth.domain.users.export import EXPORT_FIELDS, LoginHistoryExporter
+
+
+class LoginLogRepositoryStub:
+
+    def __init__(self, records):
+        self.records = records
+        self.filters = None
+
+    def iter_login_history(self, **filters):
+        self.filters = filters
+        yield from self.records
+
+
+@pytest.fixture
+def records():
+    return [
+        (uuid.uuid4(), uuid.uuid4(), datetime.datetime(2022, 6, 1, hour), 'Mozilla/5.0 "Test", 1', None, device_type)
+        for hour, device_type in enumerate(types.LoginLog.DeviceType)
+    ]
+
+
+def test_ndjson(records):
+    """Every record is exported as a separate JSON line, chunks contain up to `batch_size` records."""
+    exporter = LoginHistoryExporter(LoginLogRepositoryStub(records), batch_size=2)
+
+    chunks = list(exporter.export_user_history(uuid.uuid4(), types.LoginLog.ExportFormat.NDJSON))
+
+    assert len(chunks) == 2
+    lines = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert [line["id"] for line in lines] == [str(record[0]) for record in records]
+    assert lines[0]["created_at"] == "2022-06-01T00:00:00"
+    assert lines[0]["ip_addr"] is None
+    assert lines[-1]["device_type"] == "tablet"
+
+
+def test_csv(records):
+    """Records are exported as CSV with a header."""
+    repository = LoginLogRepositoryStub(records)
+    exporter = LoginHistoryExporter(repository, batch_size=2)
+    since, until = datetime.datetime(2022, 6, 1), datetime.datetime(2022, 7, 1)
+
+    chunks = list(exporter.export_history(since, until, types.LoginLog.ExportFormat.CSV))
+
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert rows[0] == list(EXPORT_FIELDS)
+    assert len(rows) == len(records) + 1
+    assert rows[1][3] == 'Mozilla/5.0 "Test", 1'
+    assert repository.filters == {"since": since, "until": until, "yield_per": 2}
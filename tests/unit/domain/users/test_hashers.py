@@ -0,0 +1,33 @@
+import pytest
+
+from auth.domain.users.hashers import Argon2PasswordHasher, HasherRegistry, PBKDF2PasswordHasher, ScryptPasswordHasher
+
+
+@pytest.fixture
+def hashers():
+    hashers_ = [
+        PBKDF2PasswordHasher(iterations=1000),
+        ScryptPasswordHasher(cost=2 ** 10, block_size=8, parallelism=1),
+        Argon2PasswordHasher(time_cost=1, memory_cost=1024, parallelism=1),
+    ]
+    return HasherRegistry(default="argon2", hashers=hashers_)
+
+
+@pytest.mark.parametrize("algorithm", ["pbkdf2", "scrypt", "argon2"])
+def test_hash_and_verify(hashers, algorithm):
+    """Hashes are identified and verified by the hasher that created them."""
+    hasher = hashers.hashers[algorithm]
+    encoded = hasher.encode("password")
+
+    assert hashers.identify(encoded) is hasher
+    assert hasher.verify(encoded, "password") is True
+    assert hasher.verify(encoded, "wrong") is False
+
+
+def test_needs_update(hashers):
+    """Hashes of non-default hashers or with outdated parameters have to be updated."""
+    outdated_argon2 = Argon2PasswordHasher(time_cost=2, memory_cost=1024, parallelism=1)
+
+    assert hashers.needs_update(hashers.default.encode("password")) is False
+    assert hashers.needs_update(hashers.hashers["pbkdf2"].encode("password")) is True
+    assert hashers.needs_update(outdated_argon2.encode("password")) is True
@@ -0,0 +1,60 @@
+import threading
+import time
+
+import pytest
+
+from auth.domain.users.exceptions import PasswordHashingUnavailableError
+from auth.domain.users.hashers import HasherRegistry, PBKDF2PasswordHasher
+from auth.domain.users.hashing import PasswordHasher
+
+
+@pytest.fixture
+def hashers():
+    return HasherRegistry(default="pbkdf2", hashers=[PBKDF2PasswordHasher(iterations=1000)])
+
+
+def test_hash_and_verify(hashers):
+    """Hashes are verified in the hashing process pool."""
+    hasher = PasswordHasher(hashers, workers=1, queue_size=1, timeout=30)
+    try:
+        hashed_password = hasher.hash_password("password")
+
+        assert hasher.verify_password(hashed_password, "password") is True
+        assert hasher.verify_password(hashed_password, "wrong") is False
+    finally:
+        hasher.shutdown()
+
+
+def test_queue_full(mocker, hashers):
+    """New jobs are rejected when the queue is full."""
+    hasher = PasswordHasher(hashers, workers=0, queue_size=0, timeout=30)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_hash(password: str) -> str:
+        started.set()
+        release.wait()
+        return password
+
+    mocker.patch.object(hashers.default, "encode", side_effect=slow_hash)
+    job = threading.Thread(target=hasher.hash_password, args=("password",))
+    job.start()
+    started.wait()
+
+    with pytest.raises(PasswordHashingUnavailableError):
+        hasher.hash_password("password")
+    release.set()
+    job.join()
+
+
+def test_timed_out_job_keeps_slot(hashers):
+    """Timed out job can't be stopped, so its slot is released only when the job completes."""
+    hasher = PasswordHasher(hashers, workers=1, queue_size=0, timeout=0.1)
+    try:
+        with pytest.raises(PasswordHashingUnavailableError):
+            hasher._run(time.sleep, 1)
+
+        assert hasher._slots.acquire(blocking=False) is False
+    finally:
+        hasher.shutdown()
+
+    assert hasher._slots.acquire(blocking=False) is True
@@ -0,0 +1,132 @@
+import time
+
+import pytest
+from jwt import ExpiredSignatureError
+
+from auth.domain.users.introspection import INACTIVE, TokenIntrospector
+from auth.infrastructure.db.cache import LocalMemoryCache
+
+USER_ID = "3f7b6a3e-1a1d-4d3e-9a3b-8e1c2b5d6f70"
+
+
+@pytest.fixture
+def claims():
+    now = int(time.time())
+    return {"sub": USER_ID, "jti": "jti-1", "type": "access", "iat": now, "exp": now + 300, "gen": 0}
+
+
+@pytest.fixture
+def decode_token(mocker, claims):
+    return mocker.patch("auth.domain.users.introspection.decode_token", return_value=claims)
+
+
+@pytest.fixture
+def jwt_storage(mocker):
+    storage = mocker.MagicMock()
+    storage.is_any_revoked.return_value = False
+    storage.is_generation_revoked.return_value = False
+    return storage
+
+
+@pytest.fixture
+def user_repository(mocker):
+    repository = mocker.MagicMock()
+    user = repository.get_active_or_none.return_value
+    user.roles = [mocker.MagicMock()]
+    user.roles[0].name = "subscriber"
+    return repository
+
+
+@pytest.fixture
+def local_revocation_cache(mocker):
+    cache = mocker.MagicMock()
+    cache.is_available.return_value = True
+    return cache
+
+
+@pytest.fixture
+def introspector(jwt_storage, user_repository, local_revocation_cache):
+    return TokenIntrospector(jwt_storage, user_repository, local_revocation_cache, LocalMemoryCache(maxsize=10))
+
+
+def user_event_handler(local_revocation_cache):
+    event_type, handler = local_revocation_cache.add_event_handler.call_args.args
+    assert event_type == "user"
+    return handler
+
+
+def test_active_token(introspector, decode_token, claims):
+    """Active token claims are returned with the current user roles."""
+    response = introspector.introspect("token")
+
+    assert response == {
+        "active": True,
+        "sub": USER_ID,
+        "jti": "jti-1",
+        "token_type": "access",
+        "iat": claims["iat"],
+        "exp": claims["exp"],
+        "roles": ["subscriber"],
+    }
+
+
+def test_invalid_token(introspector, decode_token):
+    """Only `active: false` is returned for invalid tokens."""
+    decode_token.side_effect = ExpiredSignatureError
+
+    assert introspector.introspect("token") == INACTIVE
+
+
+def test_revoked_token(introspector, decode_token, jwt_storage):
+    """Revoked tokens are inactive."""
+    jwt_storage.is_generation_revoked.return_value = True
+
+    assert introspector.introspect("token") == INACTIVE
+
+
+def test_inactive_user(introspector, decode_token, user_repository):
+    """Tokens of deactivated users are inactive."""
+    user_repository.get_active_or_none.return_value = None
+
+    assert introspector.introspect("token") == INACTIVE
+
+
+def test_cached_result(introspector, decode_token, jwt_storage):
+    """Repeated introspection doesn't decode the token again, but revocation is checked on every hit."""
+    introspector.introspect("token")
+    assert introspector.introspect("token")["active"] is True
+    assert decode_token.call_count == 1
+
+    jwt_storage.is_any_revoked.return_value = True
+
+    assert introspector.introspect("token") == INACTIVE
+
+
+def test_user_event(introspector, decode_token, user_repository, local_revocation_cache):
+    """Cached results are dropped on the user changes."""
+    introspector.introspect("token")
+    user_event_handler(local_revocation_cache)({"type": "user", "user_ids": [USER_ID]})
+    user_repository.get_active_or_none.return_value.roles = []
+
+    assert introspector.introspect("token")["roles"] == []
+    assert decode_token.call_count == 2
+
+
+def test_cache_unavailable(introspector, decode_token, local_revocation_cache):
+    """Results aren't cached while the revocation feed is not synced."""
+    local_revocation_cache.is_available.return_value = False
+
+    introspector.introspect("token")
+    introspector.introspect("token")
+
+    assert decode_token.call_count == 2
+
+
+def test_introspect_many(introspector, decode_token, claims):
+    """Batch results are returned in the order of tokens, repeated tokens are decoded once."""
+    decode_token.side_effect = [claims, ExpiredSignatureError()]
+
+    responses = introspector.introspect_many(["valid", "expired", "valid"])
+
+    assert [response["active"] for response in responses] == [True, False, True]
+    assert decode_token.call_count == 2
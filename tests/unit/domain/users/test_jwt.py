@@ -0,0 +1,146 @@
+import datetime
+import time
+import uuid
+
+import pytest
+from flask_jwt_extended import decode_token
+
+from auth.domain.users import types
+from auth.domain.users.device_types import DeviceTypeClassifier
+from auth.domain.users.exceptions import RefreshTokenReuseError, RefreshTokenRevokedError, SessionNotFoundError
+from auth.domain.users.jwt import JWTAuth
+from auth.infrastructure.db.cache import LocalMemoryCache
+from auth.infrastructure.db.token_families import FamilyState, RotationResult
+
+MOBILE_USER_AGENT = "Mozilla/5.0 (iPhone; CPU iPhone OS 15_0 like Mac OS X) Mobile/15E148"
+
+
+@pytest.fixture
+def jwt_storage(mocker):
+    storage = mocker.MagicMock()
+    storage.get_user_generation.return_value = 0
+    return storage
+
+
+@pytest.fixture
+def token_families(mocker):
+    return mocker.MagicMock()
+
+
+@pytest.fixture
+def jwt_auth(app, jwt_storage, token_families):
+    with app.test_request_context():
+        yield JWTAuth(jwt_storage, token_families, DeviceTypeClassifier(LocalMemoryCache(maxsize=10)))
+
+
+@pytest.fixture
+def user(mocker):
+    return mocker.MagicMock(id=uuid.uuid4(), roles=[])
+
+
+def test_generate_tokens(jwt_auth, token_families, user):
+    """Login starts a new family with the issued refresh token and the device of the login."""
+    login_event = types.LoginEvent(
+        user_id=user.id, ip_addr=None, user_agent=MOBILE_USER_AGENT, created_at=datetime.datetime.utcnow(),
+    )
+
+    credentials = jwt_auth.generate_tokens(user, login_event=login_event)
+
+    access_jwt, refresh_jwt = decode_token(credentials.access_token), decode_token(credentials.refresh_token)
+    assert access_jwt["fid"] == refresh_jwt["fid"]
+    assert access_jwt["refresh_jti"] == refresh_jwt["jti"]
+    user_id, family_id, jti, _ = token_families.start.call_args.args
+    assert (user_id, family_id, jti) == (str(user.id), refresh_jwt["fid"], refresh_jwt["jti"])
+    assert token_families.start.call_args.kwargs["metadata"] == {
+        "user_agent": MOBILE_USER_AGENT, "device_type": "mobile",
+    }
+
+
+def test_refresh_tokens(jwt_auth, token_families, jwt_storage, user):
+    """Refresh token is rotated within its family without blacklisting."""
+    token_families.rotate.return_value = RotationResult.ROTATED
+
+    credentials = jwt_auth.refresh_tokens({"sub": str(user.id), "jti": "jti-1", "fid": "family"}, user)
+
+    refresh_jwt = decode_token(credentials.refresh_token)
+    assert refresh_jwt["fid"] == "family"
+    assert token_families.rotate.call_args.args[:4] == (str(user.id), "family", "jti-1", refresh_jwt["jti"])
+    jwt_storage.invalidate_token.assert_not_called()
+
+
+def test_refresh_tokens_generation(jwt_auth, token_families, jwt_storage, user):
+    """Login reads the current generation from Redis, refreshed tokens keep the generation of the refresh token."""
+    jwt_storage.get_user_generation.return_value = 5
+    token_families.rotate.return_value = RotationResult.ROTATED
+
+    login_credentials = jwt_auth.generate_tokens(user)
+    credentials = jwt_auth.refresh_tokens({"sub": str(user.id), "jti": "jti-1", "fid": "family", "gen": 3}, user)
+
+    assert decode_token(login_credentials.access_token)["gen"] == 5
+    assert decode_token(credentials.access_token)["gen"] == 3
+    jwt_storage.get_user_generation.assert_called_once_with(str(user.id))
+
+
+def test_refresh_token_reuse(jwt_auth, token_families, jwt_storage, user):
+    """Reuse of a rotated refresh token revokes the whole family."""
+    token_families.rotate.return_value = RotationResult.REUSED
+
+    with pytest.raises(RefreshTokenReuseError):
+        jwt_auth.refresh_tokens({"sub": str(user.id), "jti": "jti-1", "fid": "family"}, user)
+
+    assert jwt_storage.invalidate_token.call_args.args[0] == "family"
+
+
+@pytest.mark.parametrize("result", [RotationResult.UNKNOWN, RotationResult.DEAD])
+def test_refresh_token_revoked(jwt_auth, token_families, jwt_storage, user, result):
+    """Tokens of expired, revoked or reused families can't be refreshed."""
+    token_families.rotate.return_value = result
+
+    with pytest.raises(RefreshTokenRevokedError):
+        jwt_auth.refresh_tokens({"sub": str(user.id), "jti": "jti-1", "fid": "family"}, user)
+
+    jwt_storage.invalidate_token.assert_not_called()
+
+
+def test_refresh_legacy_token(jwt_auth, token_families, jwt_storage, user):
+    """Refresh token issued without a family is blacklisted, and a new family is started."""
+    credentials = jwt_auth.refresh_tokens({"jti": "jti-1"}, user)
+
+    assert jwt_storage.invalidate_token.call_args.args[0] == "jti-1"
+    assert decode_token(credentials.refresh_token)["fid"] == token_families.start.call_args.args[1]
+    token_families.rotate.assert_not_called()
+
+
+def test_get_sessions(jwt_auth, token_families, user):
+    """Active families are returned as sessions, the session of the request is marked."""
+    now = time.time()
+    token_families.get_active.return_value = [
+        FamilyState("current", now + 60, {"created_at": str(int(now)), "device_type": "mobile", "ip_addr": None}),
+        FamilyState("social", now + 30, {"created_at": str(int(now)), "device_type": None, "ip_addr": None}),
+    ]
+
+    sessions = jwt_auth.get_sessions(user.id, current_session_id="current")
+
+    assert [(session.id, session.current) for session in sessions] == [("current", True), ("social", False)]
+    assert sessions[0].device_type == types.LoginLog.DeviceType.MOBILE
+    assert sessions[1].device_type is None
+
+
+def test_revoke_session(jwt_auth, token_families, jwt_storage, user):
+    """Revoked session is removed, and its access tokens are revoked."""
+    token_families.revoke.return_value = True
+
+    jwt_auth.revoke_session(user.id, "family")
+
+    token_families.revoke.assert_called_once_with(str(user.id), "family")
+    assert jwt_storage.invalidate_token.call_args.args[0] == "family"
+
+
+def test_revoke_unknown_session(jwt_auth, token_families, jwt_storage, user):
+    """Sessions of other users and expired sessions can't be revoked."""
+    token_families.revoke.return_value = False
+
+    with pytest.raises(SessionNotFoundError):
+        jwt_auth.revoke_session(user.id, "family")
+
+    jwt_storage.invalidate_token.assert_not_called()
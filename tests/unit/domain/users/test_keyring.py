@@ -0,0 +1,160 @@
+import dataclasses
+import datetime
+
+import jwt
+import pytest
+from flask_jwt_extended import create_access_token
+
+from auth.domain.users.keyring import KeyRing, KeyRotation, SigningKey, init_key_ring
+
+NOW = datetime.datetime(2022, 6, 15, 12)
+
+
+@pytest.fixture
+def signing_key_repository(mocker):
+    return mocker.MagicMock()
+
+
+@pytest.fixture
+def key_rotation(signing_key_repository):
+    return KeyRotation(
+        signing_key_repository,
+        algorithm="EdDSA",
+        rotation_interval=datetime.timedelta(days=30),
+        publish_lead=60 * 60,
+        verify_period=datetime.timedelta(days=3),
+    )
+
+
+def make_key(**kwargs) -> SigningKey:
+    return dataclasses.replace(SigningKey.generate("EdDSA"), **kwargs)
+
+
+@pytest.mark.parametrize("algorithm", ["RS256", "EdDSA"])
+def test_signing_key(algorithm):
+    """Tokens signed with the private key are verified with the published public key."""
+    signing_key = SigningKey.generate(algorithm)
+    token = jwt.encode({"sub": "user"}, signing_key.private_key, algorithm=algorithm, headers={"kid": signing_key.kid})
+
+    jwk = KeyRing([signing_key]).jwks()["keys"][0]
+    public_key = jwt.PyJWK(jwk).key
+
+    assert jwk["kid"] == jwt.get_unverified_header(token)["kid"]
+    assert jwt.decode(token, public_key, algorithms=[algorithm]) == {"sub": "user"}
+
+
+def test_kid_is_stable():
+    """Key id is derived from the public key."""
+    signing_key = SigningKey.generate("EdDSA")
+
+    assert SigningKey.from_pem(signing_key.to_pem(), "EdDSA").kid == signing_key.kid
+
+
+def test_algorithm_mismatch():
+    """Key has to match the signing algorithm."""
+    with pytest.raises(ValueError):
+        SigningKey.from_pem(SigningKey.generate("EdDSA").to_pem(), "RS256")
+
+
+def test_key_ring(tmp_path):
+    """The first key signs tokens, all keys verify them."""
+    keys = [SigningKey.generate("EdDSA") for _ in range(2)]
+    paths = []
+    for index, key in enumerate(keys):
+        path = tmp_path / f"key-{index}.pem"
+        path.write_bytes(key.to_pem())
+        paths.append(str(path))
+
+    key_ring = next(init_key_ring("EdDSA", paths, signing_key_repository=None, refresh_interval=60))
+
+    assert key_ring.active_key.kid == keys[0].kid
+    assert key_ring.get_key(keys[1].kid).kid == keys[1].kid
+    assert [jwk["kid"] for jwk in key_ring.jwks()["keys"]] == [key.kid for key in keys]
+    assert next(init_key_ring("HS256", paths, signing_key_repository=None, refresh_interval=60)).active_key is None
+
+
+def test_key_ring_activation(mocker):
+    """Key signs tokens from its activation, expired keys don't verify tokens."""
+    now = datetime.datetime.utcnow()
+    expired_key = make_key(activates_at=now - datetime.timedelta(days=60), expires_at=now - datetime.timedelta(days=1))
+    old_key = make_key(activates_at=now - datetime.timedelta(days=30), expires_at=now + datetime.timedelta(days=3))
+    active_key = make_key(activates_at=now - datetime.timedelta(hours=1))
+    next_key = make_key(activates_at=now + datetime.timedelta(hours=1))
+    loader = mocker.Mock(return_value=[expired_key, old_key, active_key, next_key])
+
+    key_ring = KeyRing([], loader=loader, refresh_interval=60)
+
+    assert key_ring.active_key == active_key
+    assert key_ring.get_key(old_key.kid) == old_key
+    assert key_ring.get_key(expired_key.kid) is None
+    assert [jwk["kid"] for jwk in key_ring.jwks()["keys"]] == [old_key.kid, active_key.kid, next_key.kid]
+    loader.assert_called_once()
+
+
+def test_key_ring_refresh_failure(mocker):
+    """Current keys are used if refresh fails."""
+    signing_key = make_key(activates_at=datetime.datetime.utcnow())
+    loader = mocker.Mock(side_effect=[[signing_key], Exception])
+    key_ring = KeyRing([], loader=loader, refresh_interval=0)
+
+    assert key_ring.active_key == signing_key
+    assert key_ring.active_key == signing_key
+    assert loader.call_count == 2
+
+
+def test_first_key(key_rotation, signing_key_repository):
+    """The first key is activated immediately."""
+    signing_key_repository.get_unexpired.return_value = []
+
+    signing_key = key_rotation.rotate(now=NOW)
+
+    assert signing_key.activates_at == NOW
+    signing_key_repository.add.assert_called_once_with(signing_key)
+    signing_key_repository.set_expiration.assert_not_called()
+
+
+def test_rotation(key_rotation, signing_key_repository):
+    """Next key is published before the end of the rotation interval, the active key expires after verify period."""
+    active_key = make_key(activates_at=NOW - datetime.timedelta(days=30))
+    signing_key_repository.get_unexpired.return_value = [active_key]
+
+    signing_key = key_rotation.rotate(now=NOW)
+
+    assert signing_key.activates_at == NOW + datetime.timedelta(hours=1)
+    signing_key_repository.set_expiration.assert_called_once_with(
+        active_key.kid, NOW + datetime.timedelta(days=3, hours=1))
+
+
+def test_rotation_not_due(key_rotation, signing_key_repository):
+    """Keys are not rotated before the rotation interval ends or if the next key is already scheduled."""
+    signing_key_repository.get_unexpired.return_value = [make_key(activates_at=NOW - datetime.timedelta(days=1))]
+    assert key_rotation.rotate(now=NOW) is None
+
+    signing_key_repository.get_unexpired.return_value = [
+        make_key(activates_at=NOW - datetime.timedelta(days=30)),
+        make_key(activates_at=NOW + datetime.timedelta(minutes=30)),
+    ]
+    assert key_rotation.rotate(now=NOW, force=True) is None
+    signing_key_repository.add.assert_not_called()
+
+
+def test_algorithm_change(app, mocker):
+    """After the algorithm change the previous key signs tokens with its own algorithm until the new key activates."""
+    now = datetime.datetime.utcnow()
+    old_key = dataclasses.replace(SigningKey.generate("RS256"), activates_at=now - datetime.timedelta(days=1))
+    new_key = make_key(activates_at=now + datetime.timedelta(hours=1))
+    loader = mocker.Mock(return_value=[old_key, new_key])
+    key_ring = KeyRing([], algorithm="EdDSA", loader=loader, refresh_interval=0)
+    app.config["JWT_ALGORITHM"] = "EdDSA"
+
+    with app.container.user_package.key_ring.override(key_ring), app.test_request_context():
+        token = create_access_token("user")
+        header = jwt.get_unverified_header(token)
+        assert (header["kid"], header["alg"]) == (old_key.kid, "RS256")
+        assert jwt.decode(token, old_key.public_key, algorithms=["RS256"])["sub"] == "user"
+
+        # the older key of the configured algorithm is preferred
+        new_key = dataclasses.replace(new_key, activates_at=now - datetime.timedelta(hours=2))
+        loader.return_value = [old_key, new_key]
+        header = jwt.get_unverified_header(create_access_token("user"))
+        assert (header["kid"], header["alg"]) == (new_key.kid, "EdDSA")
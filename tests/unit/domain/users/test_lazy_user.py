@@ -0,0 +1,41 @@
+import uuid
+
+import pytest
+
+from auth.domain.users import types
+from auth.domain.users.exceptions import UserInvalidCredentialsError
+
+
+@pytest.fixture
+def user(model_factory) -> types.User:
+    return model_factory.create_factory(types.User).build(email="user@test.com", password="test", active=True, roles=[])
+
+
+def test_claims_fields_without_loading(mocker, user):
+    """User fields from token claims are available without database queries."""
+    loader = mocker.Mock(return_value=user)
+    lazy_user = types.LazyUser(id=user.id, roles_names=["viewers"], loader=loader)
+
+    assert lazy_user.id == user.id
+    assert lazy_user.roles_names == ["viewers"]
+    loader.assert_not_called()
+
+
+def test_load_on_access(mocker, user):
+    """User is loaded once on the first access to other fields."""
+    loader = mocker.Mock(return_value=user)
+    lazy_user = types.LazyUser(id=user.id, roles_names=[], loader=loader)
+
+    assert lazy_user.email == user.email
+    lazy_user.password = "new"
+
+    assert user.password == "new"
+    loader.assert_called_once_with(user.id)
+
+
+def test_user_not_found(mocker):
+    """If user is not found, client will receive an authorization error."""
+    lazy_user = types.LazyUser(id=uuid.uuid4(), roles_names=[], loader=mocker.Mock(return_value=None))
+
+    with pytest.raises(UserInvalidCredentialsError):
+        lazy_user.email
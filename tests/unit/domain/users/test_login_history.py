@@ -0,0 +1,51 @@
+import datetime
+import uuid
+
+import pytest
+
+from auth.domain.users import types
+from auth.domain.users.login_history import LoginLogWriter
+
+
+class LoginLogRepositoryStub:
+
+    def __init__(self) -> None:
+        self.batches: list[list[types.LoginEvent]] = []
+
+    def create_log_records(self, login_events: list[types.LoginEvent]) -> int:
+        self.batches.append(login_events)
+        return len(login_events)
+
+    def warm_up_device_types(self) -> None:
+        pass
+
+
+@pytest.fixture
+def login_log_repository():
+    return LoginLogRepositoryStub()
+
+
+def _login_event() -> types.LoginEvent:
+    return types.LoginEvent(
+        user_id=uuid.uuid4(), ip_addr="127.0.0.1", user_agent="Mozilla/5.0", created_at=datetime.datetime.utcnow(),
+    )
+
+
+def test_batched_writes(app, login_log_repository):
+    """Login events are written in background in batches."""
+    writer = LoginLogWriter(login_log_repository, enabled=True, buffer_size=10, batch_size=2, flush_interval=0.1)
+
+    with app.app_context():
+        for _ in range(3):
+            writer.add(_login_event())
+    writer.close()
+
+    assert [len(batch) for batch in login_log_repository.batches] == [2, 1]
+
+
+def test_sync_writes(app, login_log_repository):
+    """Login events are written synchronously if the writer is disabled."""
+    disabled_writer = LoginLogWriter(login_log_repository, enabled=False, buffer_size=1, batch_size=1, flush_interval=1)
+    disabled_writer.add(_login_event())
+
+    assert len(login_log_repository.batches) == 1
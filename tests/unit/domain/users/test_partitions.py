@@ -0,0 +1,82 @@
+import datetime
+
+import pytest
+
+from auth.domain.users.partitions import LoginLogPartitionManager, MonthPartition, add_months
+
+
+@pytest.fixture
+def engine(mocker):
+    db = mocker.patch("auth.domain.users.partitions.db")
+    return db.engine
+
+
+def test_add_months():
+    """Months are shifted across years."""
+    assert add_months(datetime.date(2022, 11, 1), 2) == datetime.date(2023, 1, 1)
+    assert add_months(datetime.date(2022, 1, 1), -13) == datetime.date(2020, 12, 1)
+
+
+def test_month_partition():
+    """Monthly partition covers the whole month."""
+    partition = MonthPartition("loginlog_pc", datetime.date(2022, 12, 1))
+
+    assert partition.name == "loginlog_pc_2022_12"
+    assert partition.start == datetime.date(2022, 12, 1)
+    assert partition.end == datetime.date(2023, 1, 1)
+
+
+def test_ensure_partitions(engine, mocker):
+    """Partitions are created for the current and next months, existing partitions are skipped."""
+    manager = LoginLogPartitionManager(months_ahead=1, retention_months=12)
+    mocker.patch.object(manager, "_exists", side_effect=lambda _, name: name == "loginlog_pc_2022_06")
+    create_partition = mocker.patch.object(manager, "_create_partition")
+
+    created = manager.ensure_partitions(today=datetime.date(2022, 6, 15))
+
+    assert set(created) == {
+        "loginlog_pc_2022_07",
+        "loginlog_mobile_2022_06", "loginlog_mobile_2022_07",
+        "loginlog_tablet_2022_06", "loginlog_tablet_2022_07",
+    }
+    assert create_partition.call_count == 5
+
+
+def test_remove_expired(engine, mocker):
+    """Only partitions with records older than the retention period are detached, they aren't dropped by default."""
+    manager = LoginLogPartitionManager(months_ahead=1, retention_months=2)
+    mocker.patch.object(manager, "_get_range_partitions", side_effect=lambda _, device_partition: [
+        (f"{device_partition}_legacy", datetime.datetime(2022, 3, 1)),
+        (f"{device_partition}_2022_04", datetime.datetime(2022, 5, 1)),
+    ])
+    connection = engine.begin.return_value.__enter__.return_value
+
+    removed = manager.remove_expired(today=datetime.date(2022, 6, 15))
+
+    assert removed == ["loginlog_pc_legacy", "loginlog_mobile_legacy", "loginlog_tablet_legacy"]
+    statements = [str(call.args[0]) for call in connection.execute.call_args_list]
+    assert statements[:2] == [
+        "SET LOCAL statement_timeout = 0", "ALTER TABLE loginlog_pc DETACH PARTITION loginlog_pc_legacy",
+    ]
+    assert not any(statement.startswith("DROP") for statement in statements)
+
+
+def test_drop_expired(engine, mocker):
+    """Expired partitions are dropped only if it is requested explicitly."""
+    manager = LoginLogPartitionManager(months_ahead=1, retention_months=2)
+    expired = [("loginlog_legacy", datetime.datetime(2022, 3, 1))]
+    mocker.patch.object(manager, "_get_range_partitions", return_value=expired)
+    connection = engine.begin.return_value.__enter__.return_value
+
+    manager.remove_expired(today=datetime.date(2022, 6, 15), drop=True)
+
+    statements = [str(call.args[0]) for call in connection.execute.call_args_list]
+    assert statements.count("DROP TABLE loginlog_legacy") == 3
+
+
+def test_retention_disabled(engine):
+    """Partitions are kept forever if retention is disabled."""
+    manager = LoginLogPartitionManager(months_ahead=1, retention_months=0)
+
+    assert manager.remove_expired() == []
+    engine.begin.assert_not_called()
@@ -0,0 +1,27 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from auth.domain.users.commands import _hot_path_queries
+
+DIALECT = postgresql.dialect(paramstyle="format")
+
+
+def render(statement, params: dict | None = None) -> tuple[str, list]:
+    compiled = statement.compile(dialect=DIALECT)
+    values = compiled.construct_params(params)
+    return str(compiled), [values[name] for name in compiled.positiontup]
+
+
+@pytest.mark.parametrize("name", ["active user", "user exists", "has role", "roles by names"])
+def test_precompiled_statements(app, name):
+    """Precompiled statements render the same SQL and parameters as the ORM queries they replaced."""
+    with app.app_context():
+        build_orm_query, statement, params = _hot_path_queries()[name]
+        orm_sql, orm_values = render(build_orm_query())
+
+    sql, values = render(statement, params)
+    assert sql == orm_sql
+    if name == "roles by names":
+        # the removed query wrapped names into a nested array, `ANY` compares with its elements all the same
+        orm_values = [orm_values[0][0]]
+    assert values == orm_values
@@ -0,0 +1,68 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from auth.infrastructure.db.cache import LocalMemoryCache, RedisCache
+from auth.infrastructure.db.redis import RedisClient
+
+
+@pytest.fixture
+def local_cache():
+    return LocalMemoryCache(maxsize=2, default_ttl=60)
+
+
+def test_lru_eviction(local_cache):
+    """Least recently used keys are evicted when the cache is full."""
+    local_cache.set("first", 1)
+    local_cache.set("second", 2)
+    local_cache.get("first")
+    local_cache.set("third", 3)
+
+    assert local_cache.get("first") == 1
+    assert local_cache.get("second") is None
+    assert local_cache.get("third") == 3
+
+
+def test_expiration(local_cache, mocker):
+    """Expired keys are not returned."""
+    local_cache.set("key", "value", timeout=10)
+    mocker.patch("auth.infrastructure.db.cache.time.monotonic", return_value=10 ** 10)
+
+    assert local_cache.get("key") is None
+    assert local_cache.exists("key") == 0
+
+
+def test_many_keys(local_cache, mocker):
+    """Multiple keys are saved with per-key timeouts, read and deleted at once."""
+    local_cache.set_many({"first": 1, "second": 2}, timeout={"first": 10, "second": 100})
+
+    assert local_cache.get_many(["first", "second", "missing"]) == [1, 2, None]
+    mocker.patch("auth.infrastructure.db.cache.time.monotonic", return_value=time.monotonic() + 50)
+    assert local_cache.get_many(["first", "second"]) == [None, 2]
+    assert local_cache.delete_many(["first", "second"]) == 1
+
+
+def test_redis_set_many_round_trips(mocker):
+    """Keys with timeouts are saved with a single pipeline, keys without timeouts - with a single `MSET`."""
+    redis = mocker.Mock()
+    redis_cache = RedisCache(RedisClient(redis))
+    pipeline = redis.pipeline.return_value
+    pipeline.execute.return_value = [True, True]
+
+    assert redis_cache.set_many({"access": "", "refresh": ""}, timeout={"access": 60, "refresh": timedelta(days=1)})
+    redis_cache.set_many({"key": "value"})
+
+    pipeline.set.assert_has_calls([mocker.call("access", "", ex=60), mocker.call("refresh", "", ex=timedelta(days=1))])
+    pipeline.execute.assert_called_once()
+    redis.mset.assert_called_once_with({"key": "value"})
+
+
+def test_set_if_unchanged(local_cache):
+    """Data is saved only while the guard counter has the value read before."""
+    assert local_cache.set_if_unchanged("key", "first", guard_key="version", guard_value=None)
+    local_cache.incr_many(["version"])
+
+    assert not local_cache.set_if_unchanged("key", "second", guard_key="version", guard_value=None)
+    assert local_cache.set_if_unchanged("key", "third", guard_key="version", guard_value="1")
+    assert local_cache.get("key") == "third"
@@ -0,0 +1,26 @@
+import pytest
+from sqlalchemy.exc import TimeoutError
+
+from auth.infrastructure.db.postgres import InstrumentedQueuePool
+from auth.metrics import metrics
+
+
+def test_queue_pool_metrics(mocker):
+    """Checked out connections, overflow hits and timeouts are counted."""
+    overflow_hits = metrics.collect().get("db.pool.overflow_hits", 0)
+    timeouts = metrics.collect().get("db.pool.timeouts", 0)
+    pool = InstrumentedQueuePool(mocker.Mock, pool_size=1, max_overflow=1, timeout=0.01)
+
+    first = pool.connect()
+    second = pool.connect()
+    with pytest.raises(TimeoutError):
+        pool.connect()
+
+    collected = metrics.collect()
+    assert collected["db.pool.checked_out"] == 2
+    assert collected["db.pool.overflow"] == 1
+    assert collected["db.pool.overflow_hits"] == overflow_hits + 1
+    assert collected["db.pool.timeouts"] == timeouts + 1
+    first.close()
+    second.close()
+    assert metrics.collect()["db.pool.checked_out"] == 0
@@ -0,0 +1,104 @@
+import pytest
+from redis.connection import Connection
+from redis.exceptions import ConnectionError
+
+from auth.infrastructure.db.redis import HashRing, InstrumentedConnectionPool, RedisClient, RedisNode, RedisShard
+from auth.metrics import metrics
+
+
+class FakeConnection(Connection):
+
+    def connect(self):
+        if self._sock:
+            return
+        self._sock = object()
+        for ref in self._connect_callbacks:
+            ref()(self)
+
+    def disconnect(self, *args):
+        self._sock = None
+
+    def can_read(self, timeout=0):
+        return False
+
+
+@pytest.fixture
+def shard(mocker):
+    primary = RedisNode(mocker.Mock(name="primary"), "primary:6379")
+    replicas = [RedisNode(mocker.Mock(name=f"replica-{index}"), f"replica-{index}:6379") for index in range(2)]
+    return RedisShard(primary, replicas)
+
+
+def test_routing(shard):
+    """Reads are spread over replicas, writes go to the primary."""
+    redis_client = RedisClient(shard.primary.client, shards=[shard])
+
+    read_clients = {redis_client.get_client("key") for _ in range(4)}
+
+    assert read_clients == {replica.client for replica in shard.replicas}
+    assert redis_client.get_client("key", write=True) is shard.primary.client
+
+
+def test_read_failover(shard):
+    """Reads fail over to other nodes, failed node is skipped until the cooldown ends."""
+    failed_replica, replica = shard.replicas
+    failed_replica.client.get.side_effect = ConnectionError
+    replica.client.get.return_value = "value"
+    redis_client = RedisClient(shard.primary.client, shards=[shard])
+
+    values = [redis_client.get("key") for _ in range(4)]
+
+    assert values == ["value"] * 4
+    assert failed_replica.client.get.call_count == 1
+    assert not failed_replica.healthy
+
+
+def test_consistent_hashing(mocker):
+    """Keys are spread over shards, adding a shard moves only a part of the keys."""
+    shards = [RedisShard(RedisNode(mocker.Mock(), f"redis-{index}:6379")) for index in range(4)]
+    keys = [f"key-{index}" for index in range(1000)]
+
+    ring = HashRing(shards[:3])
+    placement = {key: ring.get_shard(key) for key in keys}
+    new_placement = {key: HashRing(shards).get_shard(key) for key in keys}
+
+    assert len(set(placement.values())) == 3
+    moved = [key for key in keys if placement[key] is not new_placement[key]]
+    assert all(new_placement[key] is shards[3] for key in moved)
+    assert len(moved) < len(keys) / 2
+    assert ring.get_shard("{user}:roles") is ring.get_shard("{user}:email")
+
+
+def test_multi_key_commands(mocker):
+    """Multi-key commands are split by shards."""
+    shards = [RedisShard(RedisNode(mocker.Mock(), f"redis-{index}:6379")) for index in range(3)]
+    for shard in shards:
+        shard.primary.client.mget.side_effect = lambda keys: [f"value-{key}" for key in keys]
+    redis_client = RedisClient(shards[0].primary.client, shards=shards)
+    keys = [f"key-{index}" for index in range(30)]
+
+    values = redis_client.get_many(keys)
+
+    assert values == [f"value-{key}" for key in keys]
+    assert all(shard.primary.client.mget.call_count == 1 for shard in shards)
+
+
+def test_connection_pool_metrics():
+    """Pool is limited by `max_connections`, checked out connections and connects are counted."""
+    pool = InstrumentedConnectionPool(name="test", connection_class=FakeConnection, max_connections=2, timeout=0.01)
+
+    first = pool.get_connection("GET")
+    second = pool.get_connection("GET")
+    with pytest.raises(ConnectionError):
+        pool.get_connection("GET")
+    pool.release(first)
+    pool.get_connection("GET")
+
+    collected = metrics.collect()
+    assert collected["redis.pool.test.connections"] == 2
+    assert collected["redis.pool.test.checked_out"] == 2
+    assert collected["redis.pool.test.connects"] == 2
+    assert collected["redis.pool.test.exhausted"] == 1
+    assert collected["redis.pool.test.wait_time"]["count"] == 3
+    pool.release(second)
+    assert metrics.collect()["redis.pool.test.checked_out"] == 1
@@ -0,0 +1,134 @@
+import datetime
+import time
+
+import pytest
+
+from auth.infrastructure.db.jwt_storage import JWTStorage
+from auth.infrastructure.db.revocation import LocalRevocationCache, RevocationFeed
+
+
+class RevocationFeedStub:
+
+    def __init__(self, revoked_tokens: dict[str, float], generations: dict[str, int]) -> None:
+        self.revoked_tokens = revoked_tokens
+        self.generations = generations
+
+    def get_revoked_tokens(self) -> dict[str, float]:
+        return self.revoked_tokens
+
+    def get_user_generations(self) -> dict[str, int]:
+        return dict(self.generations)
+
+    @staticmethod
+    def is_generation_expired(generation: int) -> bool:
+        return generation < 2
+
+
+@pytest.fixture
+def local_cache(mocker):
+    feed = RevocationFeedStub({"revoked": time.time() + 60, "expired": time.time() - 1}, {"user": 2})
+    local_cache_ = LocalRevocationCache(feed)
+    mocker.patch.object(local_cache_, "start")
+    yield local_cache_
+    local_cache_.stop()
+
+
+def test_not_synced(local_cache):
+    """Local cache doesn't answer until it is synced with the snapshot."""
+    assert local_cache.is_revoked("revoked") is None
+
+
+def test_synced(local_cache):
+    """Synced local cache answers without Redis."""
+    local_cache._resync()
+    local_cache.add("new", time.time() + 60)
+
+    assert local_cache.is_revoked("revoked") is True
+    assert local_cache.is_revoked("new") is True
+    assert local_cache.is_revoked("expired") is False
+    assert local_cache.is_revoked("valid") is False
+
+
+def test_user_generations(local_cache):
+    """Users tokens generations are synced and never go backwards."""
+    assert local_cache.get_user_generation("user") is None
+
+    local_cache._resync()
+    local_cache.set_user_generation("user", 1)
+    local_cache.set_user_generation("another", 1)
+
+    assert local_cache.get_user_generation("user") == 2
+    assert local_cache.get_user_generation("another") == 1
+    assert local_cache.get_user_generation("unknown") == 0
+
+
+def test_resync_merge(local_cache):
+    """Resync doesn't lose revocations received after the snapshot has been read, expired generations are dropped."""
+    local_cache._resync()
+    local_cache.set_user_generation("user", 3)
+    local_cache.set_user_generation("expired", 1)
+    local_cache.add("new", time.time() + 60)
+
+    local_cache._resync()
+
+    assert local_cache.get_user_generation("user") == 3
+    assert "expired" not in local_cache._generations
+    assert local_cache.is_revoked("new") is True
+
+
+def test_feed_reads_primary(mocker):
+    """Snapshots are read and the channel is subscribed on the primary, not on a lagging replica."""
+    redis_client = mocker.MagicMock()
+    feed = RevocationFeed(redis_client, "channel", "index", "generations", datetime.timedelta(days=3))
+
+    feed.get_revoked_tokens()
+    feed.get_user_generations()
+    feed.subscribe()
+
+    assert redis_client.get_client.call_args_list == [mocker.call("channel", write=True)] * 3
+
+
+def test_disabled(local_cache):
+    """Disabled local cache never answers."""
+    local_cache.enabled = False
+    local_cache._resync()
+
+    assert local_cache.is_revoked("revoked") is None
+
+
+def test_event_handlers(local_cache, mocker):
+    """Events of other local caches are dispatched to registered handlers, resync drops local data."""
+    on_user_event = mocker.Mock()
+    on_resync = mocker.Mock()
+    local_cache.add_event_handler("user", on_user_event)
+    local_cache.add_resync_handler(on_resync)
+
+    local_cache._resync()
+    local_cache._handle_event({"type": "user", "user_id": "user"})
+
+    on_user_event.assert_called_once_with({"type": "user", "user_id": "user"})
+    on_resync.assert_called_once_with()
+
+
+def test_generation_expiration(mocker):
+    """Generation bumped longer than tokens lifetime ago doesn't revoke tokens, legacy counters never expire."""
+    feed = RevocationFeed(mocker.MagicMock(), "channel", "index", "generations", datetime.timedelta(days=3))
+    now = int(time.time() * 1000)
+
+    assert feed.is_generation_expired(now - 4 * 24 * 60 * 60 * 1000) is True
+    assert feed.is_generation_expired(now - 60 * 1000) is False
+    assert feed.is_generation_expired(3) is False
+
+
+def test_generation_revoked(mocker):
+    """Tokens are revoked by the current generation until it expires."""
+    feed = RevocationFeed(mocker.MagicMock(), "channel", "index", "generations", datetime.timedelta(days=3))
+    storage = JWTStorage(mocker.MagicMock(), feed)
+    now = int(time.time() * 1000)
+
+    mocker.patch.object(feed, "get_user_generation", return_value=now)
+    assert storage.is_generation_revoked("user", now - 1) is True
+    assert storage.is_generation_revoked("user", now) is False
+
+    mocker.patch.object(feed, "get_user_generation", return_value=now - 4 * 24 * 60 * 60 * 1000)
+    assert storage.is_generation_revoked("user", 0) is False
@@ -0,0 +1,24 @@
+import pytest
+from flask_jwt_extended.exceptions import JWTDecodeError
+
+from auth.jwt_manager import decode_key_callback
+
+
+@pytest.fixture
+def settings(mocker):
+    return mocker.patch("auth.jwt_manager.settings", JWT_ALGORITHM="EdDSA", JWT_SECRET_KEY="secret")
+
+
+def test_secret_key_tokens_rejected(settings):
+    """Tokens signed with the secret key are rejected after switching to asymmetric keys by default."""
+    settings.JWT_ACCEPT_SECRET_KEY_TOKENS = False
+
+    with pytest.raises(JWTDecodeError):
+        decode_key_callback({"alg": "HS256"}, {}, key_ring=None)
+
+
+def test_secret_key_tokens_accepted(settings):
+    """Tokens signed with the secret key are accepted during the migration if it is enabled explicitly."""
+    settings.JWT_ACCEPT_SECRET_KEY_TOKENS = True
+
+    assert decode_key_callback({"alg": "HS256"}, {}, key_ring=None) == "secret"